@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Warm Browser Service
+====================
+Long-lived Chromium that stays logged in to the FusionSolar and Stark portals
+so the nightly pipeline steps do not each pay for a cold browser start and a
+fresh login.
+
+The service launches Chromium with a CDP port, logs in to each portal in its
+own context, and publishes under .browser_service/ (BROWSER_SERVICE_DIR):
+  endpoint.json               CDP endpoint + pid, read by browser_session.py
+  <portal>_state.json         Playwright storage state (cookies, localStorage)
+  <portal>_session.json       landing URL used to check the session is live
+
+Scripts connect through browser_session.launch_portal_browser(), open a new
+context seeded with the portal's storage state and skip the login form while
+the session is valid. Every --refresh-minutes the service re-checks each
+portal, logs in again if the session expired, and re-exports its state.
+
+Usage:
+    python browser_service.py --serve                 # run in the foreground
+    python browser_service.py --serve --portals stark
+    python browser_service.py --status
+    python browser_service.py --stop
+
+nightly_sync.py --warm-browser starts and stops the service around a run; to
+keep it resident, run `browser_service.py --serve` under launchd with KeepAlive.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from browser_session import (
+    PORTAL_HOSTS,
+    STEALTH_INIT_SCRIPT,
+    ResourceBlocker,
+    browser_options,
+    context_options,
+    launch_chromium,
+    pid_alive,
+    service_dir,
+    storage_state_path,
+)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CONFIG_PATH = SCRIPT_DIR / "config.json"
+DEFAULT_PORT = 9333
+DEFAULT_REFRESH_MINUTES = 20
+
+_stop_requested = False
+
+
+def _log(msg):
+    print(f"[browser-service {datetime.now().strftime('%H:%M:%S')}] {msg}")
+    sys.stdout.flush()
+
+
+def _load_config():
+    try:
+        with open(CONFIG_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json_atomic(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _login_fusionsolar(page, cfg):
+    from fusionsolar_monitor import login
+
+    return login(page, cfg)
+
+
+def _login_stark(page, cfg):
+    from stark_scraper import _login, _normalize_secret
+
+    stark_cfg = cfg.get("stark", {}) if isinstance(cfg.get("stark"), dict) else {}
+    username = _normalize_secret(stark_cfg.get("username") or os.environ.get("STARK_USERNAME"))
+    password = _normalize_secret(stark_cfg.get("password") or os.environ.get("STARK_PASSWORD"))
+    if not username or not password:
+        _log("Stark credentials missing; skipping Stark session")
+        return False
+    return _login(page, username, password)
+
+
+PORTAL_LOGINS = {
+    "fusionsolar": _login_fusionsolar,
+    "stark": _login_stark,
+}
+
+
+def _portal_configured(portal, cfg):
+    if portal == "fusionsolar":
+        return bool(cfg.get("domain") and cfg.get("credentials"))
+    return True
+
+
+def refresh_portal(portal, page, cfg):
+    """Log in (or confirm the existing session) and export the portal's state."""
+    try:
+        ok = PORTAL_LOGINS[portal](page, cfg)
+    except Exception as e:
+        _log(f"{portal}: login error: {e}")
+        ok = False
+    if not ok:
+        _log(f"{portal}: not logged in; clients will log in themselves")
+        storage_state_path(portal).unlink(missing_ok=True)
+        return False
+    page.context.storage_state(path=str(storage_state_path(portal)))
+    _write_json_atomic(
+        service_dir() / f"{portal}_session.json",
+        {"landing_url": page.url, "refreshed_at": datetime.now().isoformat(timespec="seconds")},
+    )
+    _log(f"{portal}: session ready ({page.url})")
+    return True
+
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    _stop_requested = True
+
+
+def serve(portals, port=DEFAULT_PORT, refresh_minutes=DEFAULT_REFRESH_MINUTES, headless=True):
+    from playwright.sync_api import sync_playwright
+
+    cfg = _load_config()
+    portals = [p for p in portals if _portal_configured(p, cfg)]
+    endpoint_file = service_dir() / "endpoint.json"
+    endpoint = f"http://127.0.0.1:{port}"
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    with sync_playwright() as p:
+        browser = launch_chromium(
+            p,
+            headless,
+            [
+                f"--remote-debugging-port={port}",
+                "--remote-debugging-address=127.0.0.1",
+                "--disable-blink-features=AutomationControlled",
+            ],
+        )
+        opts = browser_options(cfg)
+        pages = {}
+        for portal in portals:
+            context = browser.new_context(**context_options(browser))
+            context.add_init_script(STEALTH_INIT_SCRIPT)
+            if opts.get("block_resources") is not False:
+                ResourceBlocker(PORTAL_HOSTS[portal], opts.get("allow_hosts") or ()).install(context)
+            pages[portal] = context.new_page()
+            refresh_portal(portal, pages[portal], cfg)
+
+        _write_json_atomic(endpoint_file, {"endpoint": endpoint, "pid": os.getpid(), "portals": portals})
+        _log(f"Serving {', '.join(portals) or 'no portals'} at {endpoint}")
+
+        try:
+            next_refresh = time.time() + refresh_minutes * 60
+            while not _stop_requested and browser.is_connected():
+                time.sleep(1)
+                if time.time() >= next_refresh:
+                    for portal, page in pages.items():
+                        refresh_portal(portal, page, cfg)
+                    next_refresh = time.time() + refresh_minutes * 60
+        finally:
+            endpoint_file.unlink(missing_ok=True)
+            browser.close()
+            _log("Stopped")
+
+
+def running_endpoint():
+    """Endpoint of a live service, or None (a stale endpoint file is removed)."""
+    endpoint_file = service_dir() / "endpoint.json"
+    try:
+        info = json.loads(endpoint_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not pid_alive(info.get("pid")):
+        endpoint_file.unlink(missing_ok=True)
+        return None
+    return info.get("endpoint")
+
+
+def wait_until_ready(timeout_s=180):
+    """Block until a service has published its endpoint; returns it or None."""
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        endpoint = running_endpoint()
+        if endpoint:
+            return endpoint
+        time.sleep(1)
+    return None
+
+
+def stop():
+    endpoint_file = service_dir() / "endpoint.json"
+    if not endpoint_file.exists():
+        _log("No running service found")
+        return False
+    info = json.loads(endpoint_file.read_text(encoding="utf-8"))
+    try:
+        os.kill(int(info["pid"]), signal.SIGTERM)
+    except (OSError, KeyError, ValueError) as e:
+        _log(f"Could not signal service ({e}); removing stale endpoint file")
+        endpoint_file.unlink(missing_ok=True)
+        return False
+    _log(f"Sent stop to pid {info['pid']}")
+    return True
+
+
+def status():
+    if not running_endpoint():
+        print("Browser service: not running")
+        return False
+    info = json.loads((service_dir() / "endpoint.json").read_text(encoding="utf-8"))
+    print(f"Browser service: {info.get('endpoint')} (pid {info.get('pid')})")
+    for portal in info.get("portals", []):
+        session = service_dir() / f"{portal}_session.json"
+        detail = json.loads(session.read_text(encoding="utf-8")) if session.exists() else {}
+        print(f"  {portal:<12s} refreshed {detail.get('refreshed_at', 'never')}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm, logged-in browser shared by the portal scripts")
+    parser.add_argument("--serve", action="store_true", help="Run the service in the foreground")
+    parser.add_argument("--stop", action="store_true", help="Stop a running service")
+    parser.add_argument("--status", action="store_true", help="Show service status")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"CDP port (default: {DEFAULT_PORT})")
+    parser.add_argument(
+        "--portals", default=",".join(PORTAL_LOGINS),
+        help="Comma-separated portals to keep logged in (default: fusionsolar,stark)",
+    )
+    parser.add_argument(
+        "--refresh-minutes", type=float, default=DEFAULT_REFRESH_MINUTES,
+        help=f"Session re-check interval (default: {DEFAULT_REFRESH_MINUTES})",
+    )
+    parser.add_argument("--show-browser", action="store_true", help="Run Chromium headed")
+    args = parser.parse_args()
+
+    if args.stop:
+        raise SystemExit(0 if stop() else 1)
+    if args.status:
+        raise SystemExit(0 if status() else 1)
+    if args.serve:
+        portals = [p.strip() for p in args.portals.split(",") if p.strip() in PORTAL_LOGINS]
+        serve(portals, port=args.port, refresh_minutes=args.refresh_minutes, headless=not args.show_browser)
+        return
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
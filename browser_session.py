@@ -0,0 +1,387 @@
+"""
+Shared Playwright browser launch helper
+=======================================
+One place to launch Chromium for the Stark and FusionSolar portals, used by
+stark_scraper.py, fusionsolar_monitor.py and notion_sync.py.
+
+Every context gets request-level resource blocking: images, media and fonts
+are aborted before they hit the network, since we only ever read tables,
+JSON and CSV downloads. Blocking third-party hosts (analytics, map tiles,
+widgets) as well is opt-in per portal -- until the hosts each portal's
+front-end needs have been captured, a guessed allow list could break it.
+
+When a warm browser service is running (see browser_service.py), sessions
+connect to it over CDP instead of launching Chromium, and new contexts are
+seeded with the service's logged-in storage state for the portal.
+
+Configuration (all optional):
+  config.json  "browser": {"block_resources": true, "allow_hosts": ["cdn.example.com"],
+                           "block_third_party": ["fusionsolar"]}
+  BROWSER_BLOCK_RESOURCES=0          disable blocking entirely
+  BROWSER_BLOCK_THIRD_PARTY=stark,fusionsolar   portals that also block third-party hosts (1 = all)
+  BROWSER_ALLOW_HOSTS=a.com,b.net    extra hosts that must never be blocked
+  BROWSER_SERVICE_ENDPOINT=http://127.0.0.1:9333   CDP endpoint of the warm service
+  BROWSER_SERVICE=0                  ignore the warm service and always launch locally
+  BROWSER_SERVICE_DIR=path           service state directory (default .browser_service/)
+  BROWSER_HEADLESS_CHANNEL=chromium  Chromium channel for headless runs ("" = headless shell)
+"""
+
+import json
+import logging
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+DEFAULT_VIEWPORT = {"width": 1920, "height": 1080}
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+STEALTH_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+DEFAULT_LOCALE = "en-GB"
+DEFAULT_TIMEZONE = "Europe/London"
+
+# OS token matching navigator.platform, so the UA does not contradict the
+# rest of the fingerprint (a Windows UA on a Linux runner is a headless tell).
+_UA_PLATFORMS = {
+    "darwin": "Macintosh; Intel Mac OS X 10_15_7",
+    "win32": "Windows NT 10.0; Win64; x64",
+}
+
+# First-party hosts per portal (suffix match, so subdomains are included).
+PORTAL_HOSTS = {
+    "stark": ("stark.co.uk",),
+    "fusionsolar": ("fusionsolar.huawei.com", "huawei.com"),
+}
+
+# Resource types we never need: the portals are read via tables, JSON and CSV.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Public JS CDNs the portal front-ends may load their frameworks from.
+DEFAULT_ALLOW_HOSTS = (
+    "cdnjs.cloudflare.com",
+    "cdn.jsdelivr.net",
+    "code.jquery.com",
+    "ajax.googleapis.com",
+    "unpkg.com",
+)
+
+
+def service_dir():
+    """Directory holding the warm service endpoint file and per-portal storage state."""
+    return Path(os.environ.get("BROWSER_SERVICE_DIR") or SCRIPT_DIR / ".browser_service")
+
+
+def storage_state_path(portal):
+    return service_dir() / f"{portal}_state.json"
+
+
+def _read_json(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def service_endpoint():
+    """
+    Return the CDP endpoint of the warm browser service, or None.
+
+    BROWSER_SERVICE_ENDPOINT wins; otherwise the endpoint file written by
+    browser_service.py is used, as long as the pid it records is still
+    alive (a crashed service leaves the file behind). BROWSER_SERVICE=0
+    disables both.
+    """
+    if not _env_flag("BROWSER_SERVICE", default=True):
+        return None
+    endpoint = os.environ.get("BROWSER_SERVICE_ENDPOINT", "").strip()
+    if endpoint:
+        return endpoint
+    info = _read_json(service_dir() / "endpoint.json") or {}
+    if not info.get("endpoint"):
+        return None
+    if not pid_alive(info.get("pid")):
+        log.info("Browser service pid %s is not running; launching locally", info.get("pid"))
+        return None
+    return info["endpoint"]
+
+
+def pid_alive(pid):
+    """True if a process with this pid exists (signal 0 probe)."""
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return False
+    return True
+
+
+def warm_landing_url(portal):
+    """
+    URL the warm service landed on after logging in to a portal, or None.
+
+    Login helpers visit this first when their context was seeded with
+    storage state; if the portal does not bounce them back to its sign-in
+    page the existing session is reused and the credential flow is skipped.
+    """
+    info = _read_json(service_dir() / f"{portal}_session.json") or {}
+    return info.get("landing_url") or None
+
+
+def resume_warm_session(page, portal, on_signin_page, timeout_ms=30000):
+    """
+    Reuse the warm service's portal session if this page's context was seeded
+    with its storage state. Returns True when the portal accepted the session.
+    """
+    landing_url = warm_landing_url(portal)
+    if not landing_url or not page.context.cookies():
+        return False
+    try:
+        page.goto(landing_url, wait_until="networkidle", timeout=timeout_ms)
+    except Exception as e:
+        log.info("Warm %s session check failed (%s); logging in", portal, e)
+        return False
+    if on_signin_page(page):
+        log.info("Warm %s session has expired; logging in", portal)
+        return False
+    log.info("Reusing warm %s session (%s)", portal, page.url)
+    return True
+
+
+def _env_flag(name, default=True):
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return str(raw).strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _host_matches(host, suffixes):
+    host = (host or "").lower()
+    for suffix in suffixes:
+        suffix = suffix.lower().lstrip(".")
+        if host == suffix or host.endswith("." + suffix):
+            return True
+    return False
+
+
+def browser_options(cfg):
+    """Return launch_portal_browser() kwargs from the optional config "browser" section."""
+    browser_cfg = cfg.get("browser", {}) if isinstance(cfg.get("browser"), dict) else {}
+    return {
+        "allow_hosts": browser_cfg.get("allow_hosts") or (),
+        "block_resources": browser_cfg.get("block_resources"),
+        "block_third_party": browser_cfg.get("block_third_party"),
+    }
+
+
+def _blocks_third_party(portal, setting=None):
+    """
+    Whether a portal's contexts also block third-party hosts. setting is the
+    config value (bool, or a list of portal names); None falls back to
+    BROWSER_BLOCK_THIRD_PARTY, which is off unless set.
+    """
+    if setting is None:
+        raw = os.environ.get("BROWSER_BLOCK_THIRD_PARTY", "").strip().lower()
+        if raw in {"", "0", "false", "no", "off"}:
+            return False
+        if raw in {"1", "true", "yes", "on"}:
+            return True
+        setting = raw.split(",")
+    if isinstance(setting, bool):
+        return setting
+    return portal in {str(p).strip().lower() for p in setting}
+
+
+class ResourceBlocker:
+    """
+    Context-wide route handler that aborts non-essential requests and keeps
+    counters so each run can report what was saved.
+
+    Aborted requests never reach the network, so their size is unknown; the
+    summary reports the aborted request count alongside the bytes actually
+    transferred (from Content-Length) so runs can be compared with blocking
+    switched off via BROWSER_BLOCK_RESOURCES=0.
+    """
+
+    def __init__(self, first_party_hosts, allow_hosts=(), blocked_types=BLOCKED_RESOURCE_TYPES,
+                 block_third_party=True):
+        self.first_party_hosts = tuple(first_party_hosts)
+        self.block_third_party = block_third_party
+        self.allow_hosts = tuple(DEFAULT_ALLOW_HOSTS) + tuple(h.strip() for h in allow_hosts if h and h.strip())
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_by_type = Counter()
+        self.blocked_hosts = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    def should_block(self, url, resource_type):
+        """Return the reason a request should be aborted, or None to let it through."""
+        host = urlparse(url).hostname or ""
+        if not host:
+            return None  # data:, blob: and about: URLs
+        if _host_matches(host, self.allow_hosts):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if (self.block_third_party and resource_type != "document"
+                and not _host_matches(host, self.first_party_hosts)):
+            return "third-party"
+        return None
+
+    def handle_route(self, route):
+        request = route.request
+        reason = self.should_block(request.url, request.resource_type)
+        if reason:
+            self.blocked_by_type[reason] += 1
+            self.blocked_hosts[urlparse(request.url).hostname or ""] += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def handle_response(self, response):
+        self.allowed_requests += 1
+        try:
+            self.allowed_bytes += int(response.headers.get("content-length") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def install(self, context):
+        context.route("**/*", self.handle_route)
+        context.on("response", self.handle_response)
+        return self
+
+    @property
+    def blocked_requests(self):
+        return sum(self.blocked_by_type.values())
+
+    def summary(self):
+        by_type = ", ".join(f"{k}={v}" for k, v in self.blocked_by_type.most_common()) or "none"
+        top_hosts = ", ".join(h for h, _ in self.blocked_hosts.most_common(5)) or "none"
+        return (
+            f"Resource blocking: saved {self.blocked_requests} request(s) ({by_type}); "
+            f"top blocked hosts: {top_hosts}; "
+            f"loaded {self.allowed_requests} request(s), {self.allowed_bytes / 1024:.0f} KB"
+        )
+
+
+def user_agent_for(browser):
+    """
+    Headed-Chrome UA for the running browser build. Headless Chromium
+    advertises "HeadlessChrome/<version>", which portals can reject; the
+    version is kept real so it matches the Sec-CH-UA client hints.
+    """
+    try:
+        version = browser.version
+    except Exception:
+        return DEFAULT_USER_AGENT
+    if not version:
+        return DEFAULT_USER_AGENT
+    platform = _UA_PLATFORMS.get(sys.platform, "X11; Linux x86_64")
+    return (
+        f"Mozilla/5.0 ({platform}) AppleWebKit/537.36 "
+        f"(KHTML, like Gecko) Chrome/{version} Safari/537.36"
+    )
+
+
+def context_options(browser):
+    """new_context() kwargs shared by every portal context (headed or headless)."""
+    return {
+        "viewport": DEFAULT_VIEWPORT,
+        "screen": DEFAULT_VIEWPORT,
+        "user_agent": user_agent_for(browser),
+        "locale": DEFAULT_LOCALE,
+        "timezone_id": DEFAULT_TIMEZONE,
+        "accept_downloads": True,
+    }
+
+
+def launch_chromium(playwright, headless, launch_args):
+    """
+    Headless runs use the full Chromium build in new-headless mode
+    (channel "chromium") rather than the stripped headless shell, so
+    rendering and JS APIs match a headed browser. Falls back to the default
+    build if only the headless shell is installed.
+    """
+    channel = os.environ.get("BROWSER_HEADLESS_CHANNEL", "chromium").strip()
+    if headless and channel:
+        try:
+            return playwright.chromium.launch(headless=True, channel=channel, args=launch_args)
+        except Exception as e:
+            log.info("Chromium channel %r unavailable (%s); using default build", channel, e)
+    return playwright.chromium.launch(headless=headless, args=launch_args)
+
+
+def _connect_service(playwright, endpoint):
+    try:
+        browser = playwright.chromium.connect_over_cdp(endpoint, timeout=10000)
+        log.info("Connected to warm browser service at %s", endpoint)
+        return browser
+    except Exception as e:
+        log.warning("Warm browser service unavailable at %s (%s); launching locally", endpoint, e)
+        return None
+
+
+def launch_portal_browser(
+    playwright,
+    portal,
+    headless=True,
+    stealth=False,
+    allow_hosts=(),
+    block_resources=None,
+    use_service=True,
+    block_third_party=None,
+):
+    """
+    Launch Chromium (or connect to the warm service) and open a context
+    configured for one portal.
+
+    browser.close() on a service connection only drops our contexts and
+    disconnects; the service's own browser keeps running.
+
+    Args:
+        playwright:       the object yielded by sync_playwright()
+        portal:           key into PORTAL_HOSTS ("stark" or "fusionsolar")
+        headless:         launch headless
+        stealth:          hide navigator.webdriver and the automation blink flag
+        allow_hosts:      extra hosts exempt from blocking (config "browser.allow_hosts")
+        block_resources:  override BROWSER_BLOCK_RESOURCES (None = use env, default on)
+        use_service:      connect to the warm browser service when one is advertised
+        block_third_party: config "browser.block_third_party" (bool or portal names);
+                          None = BROWSER_BLOCK_THIRD_PARTY, default off
+
+    Returns:
+        (browser, context, blocker) -- blocker is None when blocking is disabled.
+    """
+    browser = None
+    state_path = None
+    endpoint = service_endpoint() if use_service else None
+    if endpoint:
+        browser = _connect_service(playwright, endpoint)
+        if browser and storage_state_path(portal).exists():
+            state_path = storage_state_path(portal)
+    if browser is None:
+        launch_args = ["--disable-blink-features=AutomationControlled"] if stealth else []
+        browser = launch_chromium(playwright, headless, launch_args)
+    context_kwargs = context_options(browser)
+    if state_path:
+        context_kwargs["storage_state"] = str(state_path)
+    context = browser.new_context(**context_kwargs)
+    if stealth:
+        context.add_init_script(STEALTH_INIT_SCRIPT)
+
+    if block_resources is None:
+        block_resources = _env_flag("BROWSER_BLOCK_RESOURCES", default=True)
+    blocker = None
+    if block_resources:
+        env_hosts = [h for h in os.environ.get("BROWSER_ALLOW_HOSTS", "").split(",") if h.strip()]
+        blocker = ResourceBlocker(
+            first_party_hosts=PORTAL_HOSTS[portal],
+            allow_hosts=list(allow_hosts or ()) + env_hosts,
+            block_third_party=_blocks_third_party(portal, block_third_party),
+        ).install(context)
+    return browser, context, blocker
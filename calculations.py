@@ -4,12 +4,28 @@ Solar Performance Calculations
 Pure functions for Performance Ratio (PR) and Availability metrics.
 Used by fusionsolar_monitor.py and notion_sync.py.
 
+Each scalar KPI has an array twin (*_array) that takes NumPy-compatible
+arrays (None/NaN for missing values), applies the same validity rules and
+rounding, and returns a float array with NaN wherever the scalar version
+returns None -- for portfolio views over many sites and days at once.
+
+Daylight comes from daylight_table(), a year of sunrise/sunset per site from
+the NOAA solar equations, cached per (site, year).
+
+KpiAccumulator keeps trailing-window / month- and year-to-date PR and
+availability as running sums, updated one day at a time.
+
 PR methodology follows IEC 61724-1:2021 guidelines.
 """
 
 import logging
-from datetime import date, datetime
-from typing import Optional, List, Dict
+import math
+from collections import deque
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, List, Dict, NamedTuple
+
+import numpy as np
 
 log = logging.getLogger(__name__)
 
@@ -151,7 +167,7 @@ def time_based_availability(
     Args:
         check_results:    List of check dicts with 'online_count' key
         total_inverters:  Expected total number of inverters
-        daylight_hours:   Total daylight hours for the day (from astral)
+        daylight_hours:   Total daylight hours for the day (get_daylight_hours())
         checks_per_day:   Number of checks performed during daylight
 
     Returns:
@@ -196,9 +212,343 @@ def energy_based_availability(
 
 
 # ---------------------------------------------------------------------------
-# Daylight hours helper (uses astral)
+# Array kernels
+# ---------------------------------------------------------------------------
+
+def _as_float_array(values) -> np.ndarray:
+    """float64 array with None -> NaN."""
+    return np.asarray(values, dtype=float)
+
+
+def _round_like_scalar(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    np.round, with values sitting on a rounding tie redone by round() so the
+    result matches the scalar functions exactly (np.round scales by 10**d
+    first and can land on the other side of a half).
+    """
+    out = np.array(np.round(values, decimals), dtype=float)
+    scaled = values * 10.0 ** decimals
+    tie = np.isfinite(values) & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if tie.any():
+        out[tie] = [round(float(v), decimals) for v in values[tie]]
+    return out
+
+
+def _ratio_pct(numerator: np.ndarray, denominator: np.ndarray, valid: np.ndarray, decimals: int = 2) -> np.ndarray:
+    out = np.full(np.broadcast(numerator, denominator, valid).shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = numerator / denominator * 100.0
+    valid = np.broadcast_to(valid, out.shape)
+    out[valid] = np.broadcast_to(pct, out.shape)[valid]
+    return _round_like_scalar(out, decimals)
+
+
+def performance_ratio_array(actual_yield_kwh, irradiance_kwh_m2, capacity_kwp) -> np.ndarray:
+    """
+    performance_ratio() over broadcastable arrays, e.g. (sites, days) yields
+    and irradiance with a (sites, 1) capacity column. NaN where the scalar
+    version returns None.
+    """
+    y = _as_float_array(actual_yield_kwh)
+    g = _as_float_array(irradiance_kwh_m2)
+    c = _as_float_array(capacity_kwp)
+    bad_capacity = ~(c > 0)
+    if bad_capacity.any():
+        log.warning("PR calc: %d invalid capacity_kwp value(s)", int(bad_capacity.sum()))
+    valid = (c > 0) & (g > 0) & (y >= 0)
+    return _ratio_pct(y, g * c, valid)
+
+
+def performance_ratio_period_array(
+    actual_yield_kwh,
+    irradiance_kwh_m2,
+    capacity_kwp,
+    axis: int = -1,
+) -> np.ndarray:
+    """
+    performance_ratio_period() reduced along axis: irradiance-weighted PR per
+    row of a (sites, days) array. Days with missing/negative yield or
+    missing/zero irradiance are left out, as in the scalar version.
+    """
+    y = _as_float_array(actual_yield_kwh)
+    g = _as_float_array(irradiance_kwh_m2)
+    c = _as_float_array(capacity_kwp)
+    y, g, c = np.broadcast_arrays(y, g, c)
+    day_ok = (g > 0) & (y >= 0)
+    total_yield = np.where(day_ok, y, 0.0).sum(axis=axis)
+    with np.errstate(invalid="ignore"):
+        total_reference = np.where(day_ok, g * c, 0.0).sum(axis=axis)
+    capacity_ok = (c > 0).all(axis=axis)
+    valid = capacity_ok & (total_reference > 0)
+    return _ratio_pct(total_yield, total_reference, valid)
+
+
+def specific_yield_array(actual_yield_kwh, capacity_kwp) -> np.ndarray:
+    """specific_yield() over broadcastable arrays; NaN where invalid."""
+    y = _as_float_array(actual_yield_kwh)
+    c = _as_float_array(capacity_kwp)
+    valid = (c > 0) & (y >= 0)
+    out = np.full(np.broadcast(y, c).shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[valid] = np.broadcast_to(y / c, out.shape)[valid]
+    return _round_like_scalar(out, 3)
+
+
+def inverter_availability_array(online_count, total_count) -> np.ndarray:
+    """inverter_availability() over broadcastable arrays; NaN where total is zero/missing."""
+    online = _as_float_array(online_count)
+    total = _as_float_array(total_count)
+    return _ratio_pct(online, total, (total > 0) & ~np.isnan(online))
+
+
+def energy_based_availability_array(actual_yield_kwh, expected_yield_kwh) -> np.ndarray:
+    """energy_based_availability() over broadcastable arrays; NaN where invalid."""
+    actual = _as_float_array(actual_yield_kwh)
+    expected = _as_float_array(expected_yield_kwh)
+    return _ratio_pct(actual, expected, (expected > 0) & (actual >= 0))
+
+
+# ---------------------------------------------------------------------------
+# Rolling accumulators
+# ---------------------------------------------------------------------------
+
+CALENDAR_WINDOWS = ("mtd", "ytd")
+
+
+class _Day(NamedTuple):
+    day: date
+    yield_kwh: float      # PR numerator contribution (0 if the day is not PR-valid)
+    reference_kwh: float  # irradiance × capacity (0 if not PR-valid)
+    availability: Optional[float]  # online fraction 0..1, None if unknown
+
+
+class KpiAccumulator:
+    """
+    Irradiance-weighted PR and mean availability over a trailing window of
+    days (window=7/30/365) or month/year to date (window="mtd"/"ytd"),
+    updated a day at a time.
+
+    Running sums are adjusted as days are added and evicted, so each update
+    is O(1) (amortised) instead of re-summing the window like
+    performance_ratio_period(). Days must arrive in date order; re-adding the
+    latest day replaces it. to_dict()/from_dict() round-trip through JSON so
+    the state can be kept between nightly runs.
+    """
+
+    def __init__(self, capacity_kwp: float, window=30):
+        if window not in CALENDAR_WINDOWS and not (isinstance(window, int) and window > 0):
+            raise ValueError(f"window must be a positive number of days or one of {CALENDAR_WINDOWS}: {window!r}")
+        self.capacity_kwp = capacity_kwp
+        self.window = window
+        self._days = deque()
+        self._resum()
+
+    def _resum(self):
+        self._yield = math.fsum(d.yield_kwh for d in self._days)
+        self._reference = math.fsum(d.reference_kwh for d in self._days)
+        known = [d.availability for d in self._days if d.availability is not None]
+        self._availability = math.fsum(known)
+        self._availability_days = len(known)
+
+    def _push(self, entry: _Day):
+        self._days.append(entry)
+        self._yield += entry.yield_kwh
+        self._reference += entry.reference_kwh
+        if entry.availability is not None:
+            self._availability += entry.availability
+            self._availability_days += 1
+
+    def _pop(self, from_left: bool = True):
+        entry = self._days.popleft() if from_left else self._days.pop()
+        if not self._days:
+            self._resum()  # back to exact zeros, no drift carried forward
+            return
+        self._yield -= entry.yield_kwh
+        self._reference -= entry.reference_kwh
+        if entry.availability is not None:
+            self._availability -= entry.availability
+            self._availability_days -= 1
+
+    def _in_window(self, first: date, day: date) -> bool:
+        if self.window == "mtd":
+            return (first.year, first.month) == (day.year, day.month)
+        if self.window == "ytd":
+            return first.year == day.year
+        return (day - first).days < self.window
+
+    @property
+    def last_day(self) -> Optional[date]:
+        return self._days[-1].day if self._days else None
+
+    def advance(self, day: date):
+        """Evict days that fall outside the window ending on day (for an 'as of' view on a day with no data)."""
+        while self._days and not self._in_window(self._days[0].day, day):
+            self._pop()
+
+    def add(
+        self,
+        day: date,
+        pv_kwh: Optional[float],
+        irradiance_kwh_m2: Optional[float],
+        availability_pct: Optional[float] = None,
+    ):
+        """
+        Add one day. Yield/irradiance follow performance_ratio_period()'s rules
+        (missing, negative yield or zero irradiance leave PR untouched);
+        availability_pct is the day's availability (e.g. time_based_availability()).
+        """
+        last = self.last_day
+        if last is not None and day < last:
+            raise ValueError(f"days must be added in order: {day} is before {last}")
+        if day == last:
+            self._pop(from_left=False)
+        self.advance(day)
+
+        pr_ok = (self.capacity_kwp and self.capacity_kwp > 0 and pv_kwh is not None
+                 and irradiance_kwh_m2 is not None and irradiance_kwh_m2 > 0 and pv_kwh >= 0)
+        self._push(_Day(
+            day,
+            float(pv_kwh) if pr_ok else 0.0,
+            float(irradiance_kwh_m2) * self.capacity_kwp if pr_ok else 0.0,
+            availability_pct / 100.0 if availability_pct is not None else None,
+        ))
+
+    @property
+    def days(self) -> int:
+        return len(self._days)
+
+    @property
+    def performance_ratio(self) -> Optional[float]:
+        """Irradiance-weighted PR (%) over the window, or None if no reference energy."""
+        if self._reference <= 0:
+            return None
+        return round(self._yield / self._reference * 100.0, 2)
+
+    @property
+    def availability(self) -> Optional[float]:
+        """Mean daily availability (%) over the days that reported one."""
+        if not self._availability_days:
+            return None
+        return round(self._availability / self._availability_days * 100.0, 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "capacity_kwp": self.capacity_kwp,
+            "window": self.window,
+            "days": [[d.day.isoformat(), d.yield_kwh, d.reference_kwh, d.availability] for d in self._days],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KpiAccumulator":
+        acc = cls(data["capacity_kwp"], data["window"])
+        acc._days.extend(
+            _Day(date.fromisoformat(day), y, ref, avail) for day, y, ref, avail in data.get("days", [])
+        )
+        acc._resum()
+        return acc
+
+
+# ---------------------------------------------------------------------------
+# Daylight hours
 # ---------------------------------------------------------------------------
 
+SUNRISE_ZENITH_DEG = 90.833  # refraction + solar disc radius, as astral and NOAA use
+
+
+class Site(NamedTuple):
+    latitude: float
+    longitude: float
+    timezone: str = "Europe/London"
+
+    @classmethod
+    def from_config(cls, cfg: Dict) -> "Site":
+        """From config.json's "location" block."""
+        loc = cfg["location"]
+        return cls(float(loc["latitude"]), float(loc["longitude"]), loc.get("timezone", "Europe/London"))
+
+
+class DaylightTable(NamedTuple):
+    """One year of sun times for a site; index i is day-of-year i+1."""
+
+    dates: np.ndarray           # datetime64[D]
+    sunrise: np.ndarray         # local clock hours (e.g. 7.85), NaN on polar days/nights
+    sunset: np.ndarray
+    daylight_hours: np.ndarray  # 0 in polar night, 24 in polar day
+
+
+def _julian_day(days: np.ndarray) -> np.ndarray:
+    """Julian day at 00:00 UTC for datetime64[D] values."""
+    return (days - np.datetime64("2000-01-01")).astype(float) + 2451544.5
+
+
+def _sun_times_utc(days: np.ndarray, lat: float, lon: float):
+    """
+    NOAA solar-position equations evaluated at each day's solar noon.
+    Returns (solar noon, half day length) in minutes, and cos(hour angle).
+    """
+    jc = (_julian_day(days) + 0.5 - lon / 360.0 - 2451545.0) / 36525.0
+    mean_long = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360.0)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    ecc = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    centre = (np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * jc)
+    app_long = np.radians(np.degrees(mean_long) + centre - 0.00569 - 0.00478 * np.sin(omega))
+    mean_obliq = 23.0 + (26.0 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60.0) / 60.0
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliq) * np.sin(app_long))
+
+    y = np.tan(obliq / 2.0) ** 2
+    eq_time_min = 4.0 * np.degrees(
+        y * np.sin(2 * mean_long) - 2 * ecc * np.sin(mean_anom)
+        + 4 * ecc * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long) - 1.25 * ecc * ecc * np.sin(2 * mean_anom)
+    )
+    phi = np.radians(lat)
+    cos_ha = (np.cos(np.radians(SUNRISE_ZENITH_DEG)) / (np.cos(phi) * np.cos(declination))
+              - np.tan(phi) * np.tan(declination))
+    half_day_min = 4.0 * np.degrees(np.arccos(np.clip(cos_ha, -1.0, 1.0)))
+    solar_noon_min = 720.0 - 4.0 * lon - eq_time_min
+    return solar_noon_min, half_day_min, cos_ha
+
+
+@lru_cache(maxsize=64)
+def daylight_table(site: Site, year: int) -> DaylightTable:
+    """Sunrise, sunset and daylight for every day of year at site, computed in one pass."""
+    import pytz
+
+    dates = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+    noon, half_day, cos_ha = _sun_times_utc(dates, site.latitude, site.longitude)
+    tz = pytz.timezone(site.timezone)
+    offset_h = np.array([
+        tz.utcoffset(datetime(year, 1, 1, 12) + timedelta(days=i)).total_seconds() / 3600.0
+        for i in range(dates.size)
+    ])
+    sun_rises = np.abs(cos_ha) <= 1.0
+    sunrise = np.where(sun_rises, (noon - half_day) / 60.0 + offset_h, np.nan)
+    sunset = np.where(sun_rises, (noon + half_day) / 60.0 + offset_h, np.nan)
+    daylight = np.round(2.0 * half_day / 60.0, 2)
+    for arr in (dates, sunrise, sunset, daylight):
+        arr.setflags(write=False)  # shared through the cache
+    return DaylightTable(dates, sunrise, sunset, daylight)
+
+
+def daylight_hours(site: Site, dates) -> np.ndarray:
+    """
+    Daylight hours (2 dp) for an array of dates (date objects, ISO strings or
+    datetime64), looked up in each year's cached daylight_table().
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    years = days.astype("datetime64[Y]").astype(int) + 1970
+    out = np.empty(days.shape)
+    for year in np.unique(years):
+        mask = years == year
+        table = daylight_table(site, int(year))
+        out[mask] = table.daylight_hours[(days[mask] - table.dates[0]).astype(int)]
+    return out
+
+
 def get_daylight_hours(
     lat: float,
     lon: float,
@@ -206,29 +556,14 @@ def get_daylight_hours(
     timezone_str: str = "Europe/London",
 ) -> float:
     """
-    Calculate daylight hours for a given location and date using astral.
+    Daylight hours for a given location and date, from the cached
+    daylight_table() for that year.
 
     Returns:
         Daylight duration in hours.
+
+    Raises:
+        pytz.UnknownTimeZoneError for an unknown timezone_str, ValueError
+        for a value that is not a date.
     """
-    try:
-        from astral import LocationInfo
-        from astral.sun import sun
-        import pytz
-
-        location = LocationInfo(
-            name="Site",
-            region="",
-            timezone=timezone_str,
-            latitude=lat,
-            longitude=lon,
-        )
-        tz = pytz.timezone(timezone_str)
-        s = sun(location.observer, date=target_date, tzinfo=tz)
-        sunrise = s["sunrise"]
-        sunset = s["sunset"]
-        delta = sunset - sunrise
-        return round(delta.total_seconds() / 3600.0, 2)
-    except Exception as e:
-        log.warning("Could not calculate daylight hours: %s", e)
-        return 0.0
+    return float(daylight_hours(Site(lat, lon, timezone_str), [target_date])[0])
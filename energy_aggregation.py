@@ -0,0 +1,262 @@
+"""
+Energy Aggregation
+==================
+Vectorised power -> energy roll-ups for FusionSolar 5-minute power series
+(the energy-balance API's productPower, kW).
+
+One pass produces three resolutions:
+  - 5-minute energy (kWh)
+  - settlement periods SP1..SPn (half-hours counted from local midnight;
+    46 on the spring clock-change day, 50 in autumn, 48 otherwise)
+  - hourly energy, labelled with the local clock hour ("HH:00")
+
+Sample i is taken to cover [i*5, i*5+5) minutes after local midnight, so a
+day holds 276 / 288 / 300 samples. Missing samples (None, "", "null", "-")
+are tracked per bucket and either counted as zero or linearly interpolated.
+Days of equal length are aggregated together as one 2-D array.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+SAMPLE_MINUTES = 5
+SAMPLES_PER_SP = 30 // SAMPLE_MINUTES
+SAMPLES_PER_HOUR = 60 // SAMPLE_MINUTES
+SAMPLES_PER_DAY = 24 * SAMPLES_PER_HOUR
+DEFAULT_TZ = "Europe/London"
+_MISSING = {"", "null", "none", "-", "--", "nan"}
+
+
+@dataclass(frozen=True)
+class DayEnergy:
+    """Energy for one day at 5-min, settlement-period and hourly resolution."""
+
+    day: Optional[date]
+    five_min_kwh: np.ndarray
+    sp_kwh: np.ndarray
+    hourly_kwh: np.ndarray
+    hour_labels: List[str]
+    sp_missing: np.ndarray
+    hourly_missing: np.ndarray
+    missing_samples: int = field(default=0)
+
+    @property
+    def total_kwh(self) -> float:
+        return float(self.five_min_kwh.sum())
+
+    @property
+    def coverage(self) -> float:
+        """Share of the day's samples that were actually reported."""
+        n = self.five_min_kwh.size
+        return 1.0 - self.missing_samples / n if n else 0.0
+
+    def sp_dict(self, decimals: int = 3) -> Dict[int, float]:
+        """{settlement_period: kWh} with SPs numbered from 1."""
+        return {i + 1: round(float(v), decimals) for i, v in enumerate(self.sp_kwh)}
+
+    def hourly_dict(self, decimals: int = 3) -> Dict[str, float]:
+        """{"HH:00": kWh}; the repeated autumn hour is summed into one label."""
+        out: Dict[str, float] = {}
+        for label, v in zip(self.hour_labels, self.hourly_kwh):
+            out[label] = out.get(label, 0.0) + float(v)
+        return {k: round(v, decimals) for k, v in out.items()}
+
+
+def _zone(tz: str):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(tz)
+    except Exception:
+        return None
+
+
+def day_slots(day: date, tz: str = DEFAULT_TZ) -> int:
+    """5-minute samples in the local day: 276 / 288 / 300 around clock changes."""
+    zone = _zone(tz)
+    if zone is None:
+        return SAMPLES_PER_DAY
+    start = datetime.combine(day, datetime.min.time(), tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=zone)
+    minutes = (end.astimezone(timezone.utc) - start.astimezone(timezone.utc)).total_seconds() / 60
+    return int(round(minutes / SAMPLE_MINUTES))
+
+
+def hour_labels(n_hours: int, day: Optional[date] = None, tz: str = DEFAULT_TZ) -> List[str]:
+    """Local clock label of each elapsed hour from midnight."""
+    zone = _zone(tz)
+    if day is not None and zone is not None:
+        start = datetime.combine(day, datetime.min.time(), tzinfo=zone).astimezone(timezone.utc)
+        return [f"{(start + timedelta(hours=h)).astimezone(zone).hour:02d}:00" for h in range(n_hours)]
+    # No date: assume a GB-style change at 01:00 local (hour skipped or repeated)
+    if n_hours == 23:
+        return [f"{h:02d}:00" for h in range(24) if h != 1]
+    if n_hours == 25:
+        return [f"{h:02d}:00" for h in (0, 1, 1, *range(2, 24))]
+    return [f"{h % 24:02d}:00" for h in range(n_hours)]
+
+
+def parse_power(values: Iterable) -> np.ndarray:
+    """productPower values (numbers or strings) -> float array, NaN where missing."""
+    out = []
+    for v in values:
+        if v is None or (isinstance(v, str) and v.strip().lower() in _MISSING):
+            out.append(np.nan)
+            continue
+        try:
+            out.append(float(str(v).replace(",", "")) if isinstance(v, str) else float(v))
+        except (TypeError, ValueError):
+            out.append(np.nan)
+    return np.asarray(out, dtype=float)
+
+
+def place_samples(values: Sequence, timestamps: Sequence, day: date, tz: str = DEFAULT_TZ) -> np.ndarray:
+    """
+    Put timestamped samples on the day's 5-minute grid (NaN where absent).
+    timestamps are epoch milliseconds or datetimes (naive = local time).
+    """
+    zone = _zone(tz)
+    n = day_slots(day, tz)
+    start = datetime.combine(day, datetime.min.time(), tzinfo=zone)
+    start_ms = start.timestamp() * 1000
+    ms = []
+    for ts in timestamps:
+        if isinstance(ts, datetime):
+            ts = ts if ts.tzinfo else ts.replace(tzinfo=zone)
+            ms.append(ts.timestamp() * 1000)
+        else:
+            ms.append(float(ts))
+    idx = np.floor((np.asarray(ms, dtype=float) - start_ms) / (SAMPLE_MINUTES * 60000)).astype(int)
+    power = parse_power(values)
+    grid = np.full(n, np.nan)
+    ok = (idx >= 0) & (idx < n)
+    grid[idx[ok]] = power[ok]
+    return grid
+
+
+def _fill(power: np.ndarray, fill: str) -> np.ndarray:
+    if fill == "zero":
+        return np.nan_to_num(power, nan=0.0)
+    if fill != "interpolate":
+        raise ValueError(f"Unknown fill mode '{fill}' (use 'zero' or 'interpolate')")
+    out = power.copy()
+    x = np.arange(power.shape[-1])
+    for row in out.reshape(-1, power.shape[-1]):
+        known = ~np.isnan(row)
+        if not known.any():
+            row[:] = 0.0
+            continue
+        # Interior gaps are interpolated; leading/trailing gaps (night) are zero
+        row[~known] = np.interp(x[~known], x[known], row[known], left=0.0, right=0.0)
+    return out
+
+
+def aggregate_matrix(power_kw: np.ndarray, fill: str = "zero"):
+    """
+    Aggregate a (days, samples) power matrix whose rows share one length.
+    Returns (five_min_kwh, sp_kwh, hourly_kwh, sp_missing, hourly_missing).
+    """
+    power_kw = np.atleast_2d(np.asarray(power_kw, dtype=float))
+    n = power_kw.shape[1]
+    if n % SAMPLES_PER_HOUR:
+        raise ValueError(f"{n} samples is not a whole number of hours")
+    missing = np.isnan(power_kw)
+    filled = _fill(power_kw, fill)
+    days = power_kw.shape[0]
+    # kWh = sum(kW samples) / samples-per-hour
+    five_min = filled / SAMPLES_PER_HOUR
+    sp = filled.reshape(days, -1, SAMPLES_PER_SP).sum(axis=2) / SAMPLES_PER_HOUR
+    hourly = filled.reshape(days, -1, SAMPLES_PER_HOUR).sum(axis=2) / SAMPLES_PER_HOUR
+    sp_missing = missing.reshape(days, -1, SAMPLES_PER_SP).sum(axis=2)
+    hourly_missing = missing.reshape(days, -1, SAMPLES_PER_HOUR).sum(axis=2)
+    return five_min, sp, hourly, sp_missing, hourly_missing
+
+
+def _labels(n_hours: int, day: Optional[date], tz: str) -> List[str]:
+    # A 288-sample series on a clock-change day is on wall-clock slots
+    if day is not None and day_slots(day, tz) != n_hours * SAMPLES_PER_HOUR:
+        day = None
+    return hour_labels(n_hours, day, tz)
+
+
+def _normalise(power: np.ndarray, day: Optional[date], tz: str) -> np.ndarray:
+    """
+    Pad a partial day with NaN up to the day's length; reject over-long
+    series. A full 288-sample series is accepted on clock-change days too.
+    """
+    if day is not None:
+        n = day_slots(day, tz)
+        if power.size == SAMPLES_PER_DAY:
+            n = SAMPLES_PER_DAY
+    elif power.size in (SAMPLES_PER_DAY - SAMPLES_PER_HOUR, SAMPLES_PER_DAY, SAMPLES_PER_DAY + SAMPLES_PER_HOUR):
+        n = power.size
+    else:
+        n = SAMPLES_PER_DAY
+    if power.size > n:
+        raise ValueError(f"{power.size} samples for a {n}-sample day")
+    if power.size < n:
+        power = np.concatenate([power, np.full(n - power.size, np.nan)])
+    return power
+
+
+def aggregate_day(
+    values: Sequence,
+    day: Optional[date] = None,
+    timestamps: Optional[Sequence] = None,
+    tz: str = DEFAULT_TZ,
+    fill: str = "zero",
+) -> DayEnergy:
+    """Aggregate one day's productPower series (optionally timestamped)."""
+    if timestamps is not None:
+        if day is None:
+            raise ValueError("day is required when timestamps are given")
+        power = place_samples(values, timestamps, day, tz)
+    else:
+        power = _normalise(parse_power(values), day, tz)
+    five_min, sp, hourly, sp_missing, hourly_missing = aggregate_matrix(power[np.newaxis, :], fill)
+    return DayEnergy(
+        day=day,
+        five_min_kwh=five_min[0],
+        sp_kwh=sp[0],
+        hourly_kwh=hourly[0],
+        hour_labels=_labels(hourly.shape[1], day, tz),
+        sp_missing=sp_missing[0],
+        hourly_missing=hourly_missing[0],
+        missing_samples=int(np.isnan(power).sum()),
+    )
+
+
+def aggregate_days(
+    series_by_day: Mapping[date, Sequence],
+    tz: str = DEFAULT_TZ,
+    fill: str = "zero",
+) -> Dict[date, DayEnergy]:
+    """
+    Aggregate many days at once: days are grouped by length (276/288/300)
+    and each group is reduced as a single 2-D array.
+    """
+    groups: Dict[int, List[date]] = {}
+    rows: Dict[date, np.ndarray] = {}
+    for day, values in series_by_day.items():
+        rows[day] = _normalise(parse_power(values or []), day, tz)
+        groups.setdefault(rows[day].size, []).append(day)
+
+    results: Dict[date, DayEnergy] = {}
+    for n, days in groups.items():
+        matrix = np.vstack([rows[d] for d in days])
+        five_min, sp, hourly, sp_missing, hourly_missing = aggregate_matrix(matrix, fill)
+        missing = np.isnan(matrix).sum(axis=1)
+        for i, day in enumerate(days):
+            results[day] = DayEnergy(
+                day=day,
+                five_min_kwh=five_min[i],
+                sp_kwh=sp[i],
+                hourly_kwh=hourly[i],
+                hour_labels=_labels(hourly.shape[1], day, tz),
+                sp_missing=sp_missing[i],
+                hourly_missing=hourly_missing[i],
+                missing_samples=int(missing[i]),
+            )
+    return results
@@ -7,8 +7,11 @@ via Playwright browser automation against the Huawei FusionSolar portal.
 Usage:
     python fusionsolar_monitor.py --check        # Check inverter statuses
     python fusionsolar_monitor.py --report       # Report total generation
+    python fusionsolar_monitor.py --report --sync   # ... and sync Notion in the same session
     python fusionsolar_monitor.py --test-login   # Test login only
     python fusionsolar_monitor.py --check --dry-run   # Print but don't log
+    python fusionsolar_monitor.py --check --station NE=123   # One station of a "stations" list
+    python fusionsolar_monitor.py --watch --interval 10 --until 18:00   # Poll device status
 """
 
 import argparse
@@ -17,13 +20,21 @@ import json
 import logging
 import os
 import re
+import sqlite3
 import sys
 import subprocess
 import time
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from pathlib import Path
 
+import requests
+
+import monitor_store
+import northbound_client
+import payload_cache
+from browser_session import browser_options, launch_portal_browser, resume_warm_session
 from calculations import inverter_availability
+from energy_aggregation import aggregate_day
 
 # ---------------------------------------------------------------------------
 # Setup paths relative to this script
@@ -66,6 +77,32 @@ def load_config():
     with open(CONFIG_PATH, "r") as f:
         return json.load(f)
 
+
+def station_configs(cfg, only=None):
+    """
+    One config per monitored station. Entries of cfg["stations"] (each with
+    at least station_code and station_name) are laid over the shared settings
+    -- credentials, portal, Notion, location; without that list the top-level
+    station is the only one. only: station codes or names to keep.
+    """
+    base = {k: v for k, v in cfg.items() if k != "stations"}
+    stations = []
+    for i, entry in enumerate(cfg.get("stations") or []):
+        station = {**base, **entry}
+        # The first station keeps the legacy CSV names and the shared Notion
+        # databases; later stations get their own CSVs and skip Notion by default
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", station["station_code"]).strip("_")
+        station.setdefault("log_suffix", "" if i == 0 else slug)
+        station.setdefault("notion_sync", i == 0)
+        stations.append(station)
+    if not stations:
+        stations = [base]
+    if only:
+        wanted = {o.lower() for o in only}
+        stations = [s for s in stations
+                    if s.get("station_code", "").lower() in wanted or s.get("station_name", "").lower() in wanted]
+    return stations
+
 # ---------------------------------------------------------------------------
 # Browser automation helpers
 # ---------------------------------------------------------------------------
@@ -78,11 +115,18 @@ def build_station_url(cfg, page_name="overview"):
     return f"{base}?{params}#/view/station/{code}/{page_name}"
 
 
+def _on_login_page(page):
+    return "login" in page.url.lower()
+
+
 def login(page, cfg, timeout_ms=30000):
     """
     Log in to FusionSolar via the SSO login page.
     Returns True on success, False on failure.
     """
+    if resume_warm_session(page, "fusionsolar", _on_login_page, timeout_ms=timeout_ms):
+        return True
+
     login_url = f"https://{cfg['domain']}/unisso/login.action"
     log.info("Navigating to login page: %s", login_url)
     page.goto(login_url, wait_until="networkidle", timeout=timeout_ms)
@@ -132,7 +176,7 @@ def login(page, cfg, timeout_ms=30000):
     except Exception:
         # Fallback: check if we're still on login
         current = page.url
-        if "login" in current.lower():
+        if _on_login_page(page):
             log.error("Login appears to have failed. Current URL: %s", current)
             try:
                 error_text = page.evaluate("""
@@ -608,12 +652,395 @@ def extract_inverter_report(page):
 
 
 # ---------------------------------------------------------------------------
-# Logging helpers -- write to CSV
+# REST extraction -- same JSON endpoints the portal SPA calls, fetched from
+# inside the logged-in page so the session cookie and origin are reused.
+# The DOM scrapers above remain the fallback when a call fails or the
+# response shape is not what we expect.
+#
+# The device-list / KPI paths and the status codes below were inferred from
+# the SPA bundle, not confirmed against a captured session, so the lookups
+# are opt-in ("portal_rest": true or FUSIONSOLAR_PORTAL_REST=1); by default
+# every run uses the DOM scrapers.
 # ---------------------------------------------------------------------------
 
-def log_inverter_check(devices, dry_run=False):
-    """Write inverter check results to CSV."""
-    csv_path = LOGS_DIR / "inverter_checks.csv"
+API_SESSION = "/unisess/v1/auth/session"
+API_STATION_REAL_KPI = "/rest/pvms/web/station/v1/overview/station-real-kpi"
+API_STATION_LIST = "/rest/pvms/web/station/v1/station/station-list"
+API_DEVICE_LIST = "/rest/neteco/web/config/device/v1/device-list"
+API_ALARM_COUNT = "/rest/pvms/fm/v1/query-alarm-count"
+
+
+
+def portal_rest_enabled(cfg):
+    """True when the portal REST lookups are switched on -- env FUSIONSOLAR_PORTAL_REST wins over config."""
+    raw = os.environ.get("FUSIONSOLAR_PORTAL_REST")
+    if raw is None:
+        return bool(cfg.get("portal_rest", False))
+    return raw.strip().lower() not in {"", "0", "false", "no", "off"}
+
+
+# Device running-status values expected in device-list payloads -> monitor
+# status. Any other value makes the whole list fall back to the DOM scrape:
+# monitor_store.is_offline() would count an unknown code as online.
+_API_DEVICE_STATUS = {
+    "1": "Online", "connected": "Online", "online": "Online", "running": "Online", "normal": "Online",
+    "0": "Offline", "2": "Offline", "disconnected": "Offline", "offline": "Offline", "fault": "Offline",
+    "3": "Standby", "idle": "Standby", "standby": "Standby",
+}
+
+
+def _fetch_json(page, url, method="GET", payload=None):
+    """
+    fetch() a portal REST endpoint from inside the logged-in page.
+    Write calls carry the session's CSRF token in the "roarand" header, as
+    the SPA does. Returns the parsed JSON, or None on any failure.
+    """
+    try:
+        return page.evaluate("""
+            async ([url, method, payload, sessionUrl]) => {
+                const headers = { "Accept": "application/json" };
+                if (method !== "GET") {
+                    headers["Content-Type"] = "application/json";
+                    const sess = await fetch(sessionUrl);
+                    if (sess.ok) {
+                        const token = (await sess.json()).csrfToken;
+                        if (token) headers["roarand"] = token;
+                    }
+                }
+                const response = await fetch(url, {
+                    method,
+                    headers,
+                    body: payload === null ? undefined : JSON.stringify(payload),
+                });
+                if (!response.ok) {
+                    throw new Error("API call failed with status " + response.status);
+                }
+                return await response.json();
+            }
+        """, [url, method, payload, API_SESSION])
+    except Exception as e:
+        log.warning("  REST call %s failed: %s", url.split("?")[0], e)
+        return None
+
+
+def _api_data(resp):
+    """Unwrap the {success, data} envelope; None when the call reported failure."""
+    if not isinstance(resp, dict):
+        return None
+    if resp.get("success") is False:
+        return None
+    return resp.get("data", resp)
+
+
+def _first_number(obj, *keys):
+    for key in keys:
+        val = obj.get(key) if isinstance(obj, dict) else None
+        if val in (None, "", "-", "--"):
+            continue
+        try:
+            return float(str(val).replace(",", ""))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _fmt_number(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _fetch_json_many(page, calls):
+    """
+    Run several REST calls concurrently (Promise.all) in one evaluate.
+    calls is a list of (url, method, payload); returns the parsed JSON for
+    each call in order, None where that call failed.
+    """
+    if not calls:
+        return []
+    try:
+        results = page.evaluate("""
+            async ([calls, sessionUrl]) => {
+                let token = null;
+                if (calls.some(([, method]) => method !== "GET")) {
+                    const sess = await fetch(sessionUrl);
+                    if (sess.ok) token = (await sess.json()).csrfToken;
+                }
+                return await Promise.all(calls.map(async ([url, method, payload]) => {
+                    const headers = { "Accept": "application/json" };
+                    if (method !== "GET") {
+                        headers["Content-Type"] = "application/json";
+                        if (token) headers["roarand"] = token;
+                    }
+                    try {
+                        const response = await fetch(url, {
+                            method,
+                            headers,
+                            body: payload === null ? undefined : JSON.stringify(payload),
+                        });
+                        return response.ok ? await response.json() : null;
+                    } catch (e) {
+                        return null;
+                    }
+                }));
+            }
+        """, [[list(call) for call in calls], API_SESSION])
+    except Exception as e:
+        log.warning("  Batched REST calls failed: %s", e)
+        return [None] * len(calls)
+    if not isinstance(results, list) or len(results) != len(calls):
+        return [None] * len(calls)
+    return results
+
+
+# Each REST lookup is a (request builder, parser) pair so the same call can
+# be made for one station (_fetch_json) or for many at once (_fetch_json_many).
+
+def _device_list_request(cfg):
+    return API_DEVICE_LIST, "POST", {
+        "conditionParams": {"parentDn": cfg.get("station_code"), "curPage": 1, "pageSize": 500},
+    }
+
+
+def _parse_device_list(resp, cfg):
+    data = _api_data(resp)
+    items = (data.get("list") or data.get("data")) if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None
+
+    devices, unmapped = [], set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = item.get("name") or item.get("devName") or ""
+        if not name:
+            continue
+        raw_status = str(item.get("runningStatus", item.get("status", ""))).strip()
+        status = _API_DEVICE_STATUS.get(raw_status.lower())
+        if status is None:
+            unmapped.add(raw_status or "<blank>")
+            continue
+        devices.append({
+            "name": name,
+            "plant": item.get("stationName") or cfg.get("station_name", ""),
+            "type": item.get("mocTypeName") or item.get("devTypeName") or str(item.get("mocType", "")),
+            "sn": item.get("esn") or item.get("sn") or "",
+            "status": status,
+            "statusTitle": raw_status,
+            "statusClass": "",
+        })
+    if unmapped:
+        log.warning("Unmapped device status code(s) %s for %s -- using the Device Management table",
+                    ", ".join(sorted(unmapped)), cfg.get("station_code"))
+        return None
+    return devices or None
+
+
+def _station_kpi_request(cfg):
+    station_dn = cfg.get("station_code")
+    url = f"{API_STATION_REAL_KPI}?stationDn={station_dn}&clientTime={int(time.time() * 1000)}&timeZone=1"
+    return url, "GET", None
+
+
+def _parse_station_kpi(resp, cfg):
+    kpi = _api_data(resp)
+    if not isinstance(kpi, dict):
+        return None
+    daily = _first_number(kpi, "dailyEnergy", "dailyCap", "day_power")
+    total = _first_number(kpi, "cumulativeEnergy", "totalCap", "total_power")
+    if daily is None:
+        return None
+    data = {"yield_today_value": _fmt_number(daily), "yield_today_unit": "kWh"}
+    if total is not None:
+        data["total_yield_value"] = _fmt_number(total)
+        data["total_yield_unit"] = "kWh"
+    income = _first_number(kpi, "dailyIncome", "day_income")
+    if income is not None:
+        data["revenue"] = _fmt_number(income)
+    return data
+
+
+def _alarm_count_request(cfg):
+    return API_ALARM_COUNT, "POST", {"stationDn": cfg.get("station_code")}
+
+
+def _parse_alarm_counts(resp, cfg):
+    data = _api_data(resp)
+    if not isinstance(data, dict):
+        return None
+    alarms = {}
+    for level in ("critical", "major", "minor", "warning"):
+        value = next(
+            (v for k, v in data.items() if k.lower().startswith(level) and isinstance(v, (int, float))),
+            None,
+        )
+        alarms[level] = int(value) if value is not None else None
+    if all(v is None for v in alarms.values()):
+        return None
+    return alarms
+
+
+def _station_list_request(cfg):
+    return API_STATION_LIST, "POST", {
+        "curPage": 1,
+        "pageSize": 100,
+        "queryTime": int(datetime.combine(date.today(), datetime.min.time()).timestamp() * 1000),
+        "timeZone": 1,
+    }
+
+
+def _parse_station_irradiance(resp, cfg):
+    data = _api_data(resp)
+    rows = data.get("list") if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        return None
+    station_code = cfg.get("station_code", "")
+    station_name = cfg.get("station_name", "").lower()
+    match = next((r for r in rows if isinstance(r, dict) and r.get("dn") == station_code), None)
+    if match is None:
+        match = next(
+            (r for r in rows if isinstance(r, dict) and station_name
+             and station_name in str(r.get("name") or r.get("stationName") or "").lower()),
+            None,
+        )
+    if match is None and len(rows) == 1:
+        match = rows[0]
+    if not isinstance(match, dict):
+        return None
+    return _first_number(match, "radiationDosage", "globalIrradiation", "irradiation", "dailyRadiation")
+
+
+_REST_LOOKUPS = {
+    "devices": (_device_list_request, _parse_device_list),
+    "kpi": (_station_kpi_request, _parse_station_kpi),
+    "alarms": (_alarm_count_request, _parse_alarm_counts),
+    "irradiance": (_station_list_request, _parse_station_irradiance),
+}
+
+
+def fetch_device_statuses_api(page, cfg):
+    """Device list for the station via REST, in extract_inverter_statuses() format."""
+    if not portal_rest_enabled(cfg):
+        return None
+    return _parse_device_list(_fetch_json(page, *_device_list_request(cfg)), cfg)
+
+
+def fetch_station_kpi_api(page, cfg):
+    """Yield today / total yield / revenue via REST, in extract_overview_data() keys."""
+    if not portal_rest_enabled(cfg):
+        return None
+    return _parse_station_kpi(_fetch_json(page, *_station_kpi_request(cfg)), cfg)
+
+
+def fetch_alarm_counts_api(page, cfg):
+    """Active alarm counts by severity via REST: {critical, major, minor, warning}."""
+    if not portal_rest_enabled(cfg):
+        return None
+    return _parse_alarm_counts(_fetch_json(page, *_alarm_count_request(cfg)), cfg)
+
+
+def fetch_station_irradiance_api(page, cfg):
+    """Today's global irradiation (kWh/m²) from the plant-list REST payload."""
+    if not portal_rest_enabled(cfg):
+        return None
+    return _parse_station_irradiance(_fetch_json(page, *_station_list_request(cfg)), cfg)
+
+
+def fetch_stations_api(page, stations, lookups):
+    """
+    Run the named REST lookups ("devices", "kpi", "alarms", "irradiance")
+    for every station concurrently in one evaluate; identical requests (the
+    plant list) are sent once. Returns one {lookup: parsed or None} per
+    station, in order. With portal REST switched off every lookup is None.
+    """
+    if not portal_rest_enabled(stations[0]):
+        return [{name: None for name in lookups} for _ in stations]
+    calls, index, plan = [], {}, []
+    for cfg in stations:
+        row = {}
+        for name in lookups:
+            request = _REST_LOOKUPS[name][0](cfg)
+            key = json.dumps(request, sort_keys=True)
+            if key not in index:
+                index[key] = len(calls)
+                calls.append(request)
+            row[name] = index[key]
+        plan.append(row)
+    responses = _fetch_json_many(page, calls)
+    return [
+        {name: _REST_LOOKUPS[name][1](responses[i], cfg) for name, i in row.items()}
+        for cfg, row in zip(stations, plan)
+    ]
+
+
+def get_device_statuses(page, cfg, rest=None):
+    """
+    Device statuses via REST, falling back to the Device Management table.
+    rest is this station's fetch_stations_api() result, if already fetched.
+    """
+    devices = rest.get("devices") if rest is not None else fetch_device_statuses_api(page, cfg)
+    if devices:
+        log.info("Fetched %d devices via REST", len(devices))
+        return devices
+    log.info("Device REST call unavailable -- scraping Device Management table")
+    navigate_to_page(page, cfg, "device-manage")
+    return extract_inverter_statuses(page)
+
+
+def get_overview_data(page, cfg, rest=None):
+    """
+    Station KPIs and alarm counts via REST, falling back to the overview page
+    only when the KPIs are missing. If just the alarm call fails the REST
+    KPIs are kept and alarm counts are left unknown ({}), rather than
+    navigating away for them.
+    """
+    if rest is not None:
+        data, alarms = rest.get("kpi"), rest.get("alarms")
+    else:
+        data = fetch_station_kpi_api(page, cfg)
+        alarms = fetch_alarm_counts_api(page, cfg)
+    if data:
+        if alarms:
+            log.info("Fetched station KPIs and alarms via REST")
+        else:
+            log.warning("Alarm count REST call unavailable -- alarm counts unknown this run")
+        data["alarms"] = alarms or {}
+        return data
+    log.info("Station KPI REST call unavailable -- scraping overview page")
+    navigate_to_page(page, cfg, "overview")
+    scraped = extract_overview_data(page)
+    scraped.update(data or {})
+    if alarms:
+        scraped["alarms"] = alarms
+    return scraped
+
+
+def get_station_irradiance(page, cfg, rest=None):
+    """Plant irradiance via REST, falling back to the Plants list table."""
+    irradiance = rest.get("irradiance") if rest is not None else fetch_station_irradiance_api(page, cfg)
+    if irradiance is not None:
+        log.info("Fetched irradiance via REST: %s kWh/m²", irradiance)
+        return irradiance
+    return extract_station_irradiance(page, cfg)
+
+
+# ---------------------------------------------------------------------------
+# Logging helpers -- write to CSV and the indexed store (logs/monitor.db)
+# ---------------------------------------------------------------------------
+
+def _record(writer, *args):
+    """Mirror a log row into monitor_store; the CSV stays the record of truth."""
+    try:
+        writer(*args)
+    except sqlite3.Error as e:
+        log.warning("Could not write to %s: %s", monitor_store.db_path(), e)
+
+
+def _log_csv(name, log_suffix=""):
+    return LOGS_DIR / (f"{name}_{log_suffix}.csv" if log_suffix else f"{name}.csv")
+
+
+def log_inverter_check(devices, dry_run=False, station="", log_suffix=""):
+    """Write inverter check results to CSV and the monitor store."""
+    csv_path = _log_csv("inverter_checks", log_suffix)
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     is_new = not csv_path.exists()
 
@@ -633,12 +1060,13 @@ def log_inverter_check(devices, dry_run=False):
                 dev.get("status", ""),
                 dev.get("statusClass", ""),
             ])
+    _record(monitor_store.record_inverter_check, devices, ts, station)
     log.info("Wrote %d device records to %s", len(devices), csv_path)
 
 
-def log_generation(data, dry_run=False):
-    """Write daily generation record to CSV."""
-    csv_path = LOGS_DIR / "daily_generation.csv"
+def log_generation(data, dry_run=False, station="", log_suffix=""):
+    """Write daily generation record to CSV and the monitor store."""
+    csv_path = _log_csv("daily_generation", log_suffix)
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     today = date.today().isoformat()
     is_new = not csv_path.exists()
@@ -655,24 +1083,27 @@ def log_generation(data, dry_run=False):
         log.info("[DRY RUN] Would write generation record: %s %s", yield_val, yield_unit)
         return
 
+    row = [
+        ts, today, yield_val, yield_unit,
+        total_val, total_unit,
+        irr_val, irr_unit,
+        alarms.get("critical", ""),
+        alarms.get("major", ""),
+        alarms.get("minor", ""),
+        alarms.get("warning", ""),
+    ]
+    header = [
+        "timestamp", "date", "yield_today", "yield_unit",
+        "total_yield", "total_unit",
+        "irradiance", "irradiance_unit",
+        "alarms_critical", "alarms_major", "alarms_minor", "alarms_warning"
+    ]
     with open(csv_path, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         if is_new:
-            writer.writerow([
-                "timestamp", "date", "yield_today", "yield_unit",
-                "total_yield", "total_unit",
-                "irradiance", "irradiance_unit",
-                "alarms_critical", "alarms_major", "alarms_minor", "alarms_warning"
-            ])
-        writer.writerow([
-            ts, today, yield_val, yield_unit,
-            total_val, total_unit,
-            irr_val, irr_unit,
-            alarms.get("critical", ""),
-            alarms.get("major", ""),
-            alarms.get("minor", ""),
-            alarms.get("warning", ""),
-        ])
+            writer.writerow(header)
+        writer.writerow(row)
+    _record(monitor_store.record_generation, {**dict(zip(["ts"] + header[1:], row)), "station": station})
     log.info("Wrote generation record: %s %s, irradiance: %s %s (date: %s)",
              yield_val, yield_unit, irr_val, irr_unit, today)
 
@@ -681,172 +1112,472 @@ def log_generation(data, dry_run=False):
 # Main actions
 # ---------------------------------------------------------------------------
 
-def run_inverter_check(cfg, dry_run=False):
-    """Run a daylight inverter status check."""
-    from playwright.sync_api import sync_playwright
+def summarise_inverter_check(cfg, devices, dry_run=False):
+    """Print, log and CSV-record an inverter check; True when nothing is offline."""
+    # Analyse results
+    offline = [d for d in devices if monitor_store.is_offline(d.get("status", ""), d.get("statusClass", ""))]
+
+    # Print summary
+    print("\n" + "=" * 50)
+    print(f"  INVERTER CHECK -- {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print(f"  Station: {cfg['station_name']}")
+    print("=" * 50)
+    print(f"  Total devices found: {len(devices)}")
+    print(f"  Offline/Faulted:     {len(offline)}")
+    if offline:
+        print("\n  [!] OFFLINE DEVICES:")
+        for d in offline:
+            print(f"     - {d['name']} ({d.get('type','')}) -- {d.get('status','')}")
+    else:
+        print("\n  [OK] All devices appear online")
+    print("=" * 50 + "\n")
+
+    # Log results
+    log_inverter_check(devices, dry_run=dry_run,
+                       station=cfg.get("station_code", ""), log_suffix=cfg.get("log_suffix", ""))
+
+    if offline:
+        log.warning("[!] %d DEVICE(S) OFFLINE: %s",
+                    len(offline),
+                    ", ".join(d["name"] for d in offline))
+    else:
+        log.info("[OK] All %d devices online", len(devices))
+
+    # Calculate and log availability
+    online_count = len(devices) - len(offline)
+    avail = inverter_availability(online_count, len(devices))
+    if avail is not None:
+        log.info("Inverter availability: %.1f%% (%d/%d online)",
+                 avail, online_count, len(devices))
+
+    return len(offline) == 0
+
+
+def _northbound_devices(stations):
+    """{station_code: devices} from batched Northbound calls; missing stations fall back to the portal."""
+    try:
+        by_code = northbound_client.client_from_config(stations[0]).device_statuses_many(
+            {cfg["station_code"]: cfg.get("station_name", "") for cfg in stations})
+    except (northbound_client.NorthboundError, requests.RequestException, ValueError) as e:
+        log.warning("Northbound API unavailable (%s) -- falling back to the portal", e)
+        return {}
+    by_code = {code: devices for code, devices in by_code.items() if devices}
+    log.info("Fetched devices for %d/%d station(s) via Northbound API", len(by_code), len(stations))
+    return by_code
+
+
+def _portal_inverter_check(page, cfg, rest, dry_run=False):
+    """One station's check on a logged-in portal page; rest is its prefetched REST result."""
+    try:
+        # Device statuses (REST first, Device Management table as fallback)
+        devices = get_device_statuses(page, cfg, rest)
+        log.info("Found %d devices for %s", len(devices), cfg.get("station_name", cfg["station_code"]))
+
+        if not devices:
+            # Fallback: try overview page for alarm data
+            log.warning("No devices found on device-manage page, trying overview...")
+            navigate_to_page(page, cfg, "overview")
+            overview = extract_overview_data(page)
+            log.info("Overview data: %s", json.dumps(overview, indent=2, default=str))
+
+            # Also try report page for inverter data
+            navigate_to_page(page, cfg, "report")
+            inv_report = extract_inverter_report(page)
+            log.info("Inverter report entries: %d", len(inv_report))
+
+            # Convert report data to device-like format
+            for inv in inv_report:
+                devices.append({
+                    "name": inv["name"],
+                    "type": "Inverter",
+                    "status": "Online" if inv.get("yield") and inv["yield"] != "0" else "Unknown",
+                    "statusClass": "",
+                    "yield": inv.get("yield", "")
+                })
+
+        return summarise_inverter_check(cfg, devices, dry_run=dry_run)
+
+    except Exception as e:
+        log.exception("Error during inverter check for %s: %s", cfg["station_code"], e)
+        return False
 
+
+def run_inverter_checks(stations, dry_run=False):
+    """
+    Daylight inverter check for every station in one session: batched
+    Northbound calls, or a single portal login with all stations' device
+    lists fetched concurrently. Returns {station_code: ok}.
+    """
     log.info("=" * 60)
-    log.info("INVERTER STATUS CHECK -- %s", datetime.now().strftime("%Y-%m-%d %H:%M"))
+    log.info("INVERTER STATUS CHECK -- %s (%d station(s))", datetime.now().strftime("%Y-%m-%d %H:%M"), len(stations))
     log.info("=" * 60)
 
+    results = {}
+    pending = list(stations)
+    if northbound_client.use_northbound(stations[0]):
+        by_code = _northbound_devices(stations)
+        for cfg in stations:
+            if cfg["station_code"] in by_code:
+                results[cfg["station_code"]] = summarise_inverter_check(
+                    cfg, by_code[cfg["station_code"]], dry_run=dry_run)
+        pending = [cfg for cfg in stations if cfg["station_code"] not in results]
+        if not pending:
+            return results
+
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(pending[0]))
         page = context.new_page()
 
         try:
-            # Login
-            if not login(page, cfg):
+            # Login (one session serves every station on the account)
+            if not login(page, pending[0]):
                 log.error("Login failed -- aborting inverter check")
-                return False
+                return {**results, **{cfg["station_code"]: False for cfg in pending}}
 
-            # Navigate to device management
-            navigate_to_page(page, cfg, "device-manage")
+            rest = fetch_stations_api(page, pending, ("devices",))
+            for cfg, prefetched in zip(pending, rest):
+                results[cfg["station_code"]] = _portal_inverter_check(page, cfg, prefetched, dry_run=dry_run)
+            return results
 
-            # Extract device statuses
-            devices = extract_inverter_statuses(page)
-            log.info("Found %d devices", len(devices))
+        except Exception as e:
+            log.exception("Error during inverter check: %s", e)
+            return {**{cfg["station_code"]: False for cfg in pending}, **results}
+        finally:
+            if blocker:
+                log.info(blocker.summary())
+            browser.close()
 
-            if not devices:
-                # Fallback: try overview page for alarm data
-                log.warning("No devices found on device-manage page, trying overview...")
-                navigate_to_page(page, cfg, "overview")
-                overview = extract_overview_data(page)
-                log.info("Overview data: %s", json.dumps(overview, indent=2, default=str))
-
-                # Also try report page for inverter data
-                navigate_to_page(page, cfg, "report")
-                inv_report = extract_inverter_report(page)
-                log.info("Inverter report entries: %d", len(inv_report))
-
-                # Convert report data to device-like format
-                for inv in inv_report:
-                    devices.append({
-                        "name": inv["name"],
-                        "type": "Inverter",
-                        "status": "Online" if inv.get("yield") and inv["yield"] != "0" else "Unknown",
-                        "statusClass": "",
-                        "yield": inv.get("yield", "")
-                    })
-
-            # Analyse results
-            offline = [d for d in devices if "offline" in (d.get("status", "") + d.get("statusClass", "")).lower()
-                       or "disconnect" in (d.get("status", "") + d.get("statusClass", "")).lower()
-                       or "fault" in (d.get("status", "") + d.get("statusClass", "")).lower()]
-
-            # Print summary
-            print("\n" + "=" * 50)
-            print(f"  INVERTER CHECK -- {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-            print(f"  Station: {cfg['station_name']}")
-            print("=" * 50)
-            print(f"  Total devices found: {len(devices)}")
-            print(f"  Offline/Faulted:     {len(offline)}")
-            if offline:
-                print("\n  [!] OFFLINE DEVICES:")
-                for d in offline:
-                    print(f"     - {d['name']} ({d.get('type','')}) -- {d.get('status','')}")
-            else:
-                print("\n  [OK] All devices appear online")
-            print("=" * 50 + "\n")
 
-            # Log results
-            log_inverter_check(devices, dry_run=dry_run)
+def run_inverter_check(cfg, dry_run=False):
+    """Run a daylight inverter status check for a single station."""
+    return run_inverter_checks([cfg], dry_run=dry_run)[cfg["station_code"]]
 
-            if offline:
-                log.warning("[!] %d DEVICE(S) OFFLINE: %s",
-                            len(offline),
-                            ", ".join(d["name"] for d in offline))
-            else:
-                log.info("[OK] All %d devices online", len(devices))
 
-            # Calculate and log availability
-            online_count = len(devices) - len(offline)
-            avail = inverter_availability(online_count, len(devices))
-            if avail is not None:
-                log.info("Inverter availability: %.1f%% (%d/%d online)",
-                         avail, online_count, len(devices))
+# ---------------------------------------------------------------------------
+# Watch mode -- one long-lived session polling device status
+# ---------------------------------------------------------------------------
 
-            return len(offline) == 0
+WATCH_DEFAULT_INTERVAL_MIN = 10
+
+
+def watch_interval_s(cfg, minutes=None):
+    """Poll cadence: --interval, else schedule.watch_interval_min, else 10 minutes."""
+    if minutes is None:
+        minutes = cfg.get("schedule", {}).get("watch_interval_min", WATCH_DEFAULT_INTERVAL_MIN)
+    return max(float(minutes), 1.0) * 60
+
+
+def _session_expired(page):
+    """True when the portal no longer answers the session endpoint (or shows the login page)."""
+    return _on_login_page(page) or _fetch_json(page, API_SESSION) is None
+
+
+def _watch_devices(page, cfg, rest):
+    """One station's devices for a portal watch poll: REST if it answered, else the DOM table."""
+    if rest["devices"]:
+        return rest["devices"]
+    try:
+        return get_device_statuses(page, cfg, rest)
+    except Exception as e:
+        log.warning("[WATCH] %s: Device Management scrape failed: %s", cfg["station_code"], e)
+        return None
+
+
+def _record_watch_poll(cfg, devices, previous, dry_run=False):
+    """Log one poll for a station and any status changes; returns {device: offline}."""
+    log_inverter_check(devices, dry_run=dry_run,
+                       station=cfg.get("station_code", ""), log_suffix=cfg.get("log_suffix", ""))
+    state = {d.get("name", ""): monitor_store.is_offline(d.get("status", ""), d.get("statusClass", ""))
+             for d in devices}
+    for name, offline in state.items():
+        if name in previous and previous[name] != offline:
+            log.warning("[WATCH] %s %s %s", cfg.get("station_name", cfg["station_code"]), name,
+                        "went OFFLINE" if offline else "is back online")
+    log.info("[WATCH] %s: %d/%d devices online", cfg.get("station_name", cfg["station_code"]),
+             sum(1 for offline in state.values() if not offline), len(state))
+    return state
+
+
+def _watch_loop(stations, poll, interval_s, until=None, max_polls=None, dry_run=False,
+                sleep=time.sleep, clock=datetime.now):
+    """Call poll() -> {station_code: devices or None} every interval_s; returns the number of good polls."""
+    state = {cfg["station_code"]: {} for cfg in stations}
+    polls = good = 0
+    try:
+        while True:
+            started = clock()
+            by_code = poll()
+            for cfg in stations:
+                devices = by_code.get(cfg["station_code"])
+                if devices:
+                    state[cfg["station_code"]] = _record_watch_poll(
+                        cfg, devices, state[cfg["station_code"]], dry_run=dry_run)
+                else:
+                    log.warning("[WATCH] %s: no device data this poll", cfg["station_code"])
+            good += any(by_code.get(cfg["station_code"]) for cfg in stations)
+            polls += 1
+            if max_polls and polls >= max_polls:
+                break
+            wait = interval_s - (clock() - started).total_seconds()
+            if until and clock() + timedelta(seconds=max(wait, 0)) >= until:
+                break
+            if wait > 0:
+                sleep(wait)
+    except KeyboardInterrupt:
+        log.info("[WATCH] Stopped")
+    log.info("[WATCH] %d poll(s), %d with device data", polls, good)
+    return good
+
+
+def run_watch(stations, interval_s, until=None, max_polls=None, dry_run=False,
+              sleep=time.sleep, clock=datetime.now):
+    """
+    Poll every station's device status from one authenticated session
+    until `until` (a datetime), max_polls, or Ctrl-C. Northbound reuses one
+    client, which logs in again by itself on failCode 305; the portal keeps
+    one page logged in and only calls login() again when the JSON
+    endpoints stop answering. Each poll goes to the CSV log and monitor
+    store, so time_based_availability sees every sample.
+    """
+    log.info("=" * 60)
+    log.info("WATCH -- every %.0f min, %d station(s)%s", interval_s / 60, len(stations),
+             f", until {until:%H:%M}" if until else "")
+    log.info("=" * 60)
+    loop = dict(interval_s=interval_s, until=until, max_polls=max_polls, dry_run=dry_run,
+                sleep=sleep, clock=clock)
+
+    if northbound_client.use_northbound(stations[0]):
+        client = northbound_client.client_from_config(stations[0])
+        names = {cfg["station_code"]: cfg.get("station_name", "") for cfg in stations}
+
+        def poll_northbound():
+            try:
+                return client.device_statuses_many(names)
+            except (northbound_client.NorthboundError, requests.RequestException, ValueError) as e:
+                log.warning("[WATCH] Northbound poll failed: %s", e)
+                return {}
+
+        return _watch_loop(stations, poll_northbound, **loop) > 0
+
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(stations[0]))
+        page = context.new_page()
+
+        try:
+            if not login(page, stations[0]):
+                log.error("Login failed -- not starting watch")
+                return False
+
+            def poll_portal():
+                rest = fetch_stations_api(page, stations, ("devices",))
+                if all(r["devices"] is None for r in rest) and _session_expired(page):
+                    log.info("[WATCH] Session expired -- logging in again")
+                    if not login(page, stations[0]):
+                        log.error("[WATCH] Re-login failed -- will retry next poll")
+                        return {}
+                    rest = fetch_stations_api(page, stations, ("devices",))
+                return {cfg["station_code"]: _watch_devices(page, cfg, r) for cfg, r in zip(stations, rest)}
+
+            return _watch_loop(stations, poll_portal, **loop) > 0
 
         except Exception as e:
-            log.exception("Error during inverter check: %s", e)
+            log.exception("Error during watch: %s", e)
             return False
         finally:
+            if blocker:
+                log.info(blocker.summary())
             browser.close()
 
 
-def run_generation_report(cfg, dry_run=False):
-    """Run the 10 PM generation report."""
-    from playwright.sync_api import sync_playwright
+def summarise_generation(cfg, data, dry_run=False):
+    """Print and CSV-record the daily generation figures."""
+    # Print summary
+    yield_val = data.get("yield_today_value", "N/A")
+    yield_unit = data.get("yield_today_unit", "")
+    total_val = data.get("total_yield_value", "N/A")
+    total_unit = data.get("total_yield_unit", "")
+    alarms = data.get("alarms", {})
+
+    irr_val = data.get("irradiance_value", "N/A")
+    irr_unit = data.get("irradiance_unit", "")
+
+    print("\n" + "=" * 50)
+    print(f"  DAILY GENERATION REPORT -- {date.today().isoformat()}")
+    print(f"  Station: {cfg['station_name']}")
+    print("=" * 50)
+    print(f"  Yield today:   {yield_val} {yield_unit}")
+    print(f"  Total yield:   {total_val} {total_unit}")
+    print(f"  Irradiance:    {irr_val} {irr_unit}")
+    if alarms:
+        alarm_str = ", ".join(f"{k}: {v}" for k, v in alarms.items() if v is not None)
+        print(f"  Alarms:        {alarm_str}")
+    print("=" * 50 + "\n")
+
+    # Log results
+    log_generation(data, dry_run=dry_run,
+                   station=cfg.get("station_code", ""), log_suffix=cfg.get("log_suffix", ""))
+
+    return True
+
+
+def _northbound_generation(stations):
+    """{station_code: overview data + irradiance} from batched Northbound calls; missing stations fall back."""
+    client = northbound_client.client_from_config(stations[0])
+    codes = [cfg["station_code"] for cfg in stations]
+    try:
+        overview = client.overview_data_many(codes)
+        irradiance = client.station_irradiance_many(codes)
+    except (northbound_client.NorthboundError, requests.RequestException, ValueError) as e:
+        log.warning("Northbound API unavailable (%s) -- falling back to the portal", e)
+        return {}
+    by_code = {}
+    for code in codes:
+        data = overview.get(code)
+        if not data:
+            continue
+        if irradiance.get(code) is not None:
+            data["irradiance_value"] = str(irradiance[code])
+            data["irradiance_unit"] = "kWh/m²"
+        log.info("Overview data for %s (Northbound): %s", code, json.dumps(data, indent=2, default=str))
+        by_code[code] = data
+    return by_code
+
+
+def _setup_notion_sync(cfg):
+    """Import notion_sync and prepare its databases; (module, db_id, hh_db_id) or None."""
+    import notion_sync
+
+    db_id, hh_db_id = notion_sync.setup_notion(cfg)
+    if not db_id:
+        return None
+    return notion_sync, db_id, hh_db_id
+
+
+def _northbound_notion_sync(cfg, data):
+    """
+    Today's Notion row from Northbound data (no browser); only a failing
+    API call falls back to a portal session for the sync.
+    """
+    notion = _setup_notion_sync(cfg)
+    if not notion:
+        return
+    module, db_id, hh_db_id = notion
+    try:
+        module.sync_today_from_northbound(cfg, db_id, hh_db_id=hh_db_id, overview_data=data)
+    except (northbound_client.NorthboundError, requests.RequestException, ValueError) as e:
+        log.warning("Northbound Notion sync failed (%s) -- falling back to the portal", e)
+        if not module.sync_today_from_report(cfg, db_id, hh_db_id=hh_db_id):
+            log.warning("Notion sync did not complete")
+
+
+def _portal_generation_report(page, cfg, rest, dry_run=False, sync=False):
+    """One station's report on a logged-in portal page; rest is its prefetched REST result."""
+    try:
+        # Station KPIs + alarms (REST first, overview page as fallback)
+        data = get_overview_data(page, cfg, rest)
+        log.info("Overview data: %s", json.dumps(data, indent=2, default=str))
+
+        # Irradiance is NOT on the overview page -- fetch from Plants list
+        irradiance_kwh_m2 = get_station_irradiance(page, cfg, rest)
+        if irradiance_kwh_m2 is not None:
+            data["irradiance_value"] = str(irradiance_kwh_m2)
+            data["irradiance_unit"] = "kWh/m²"
+
+        ok = summarise_generation(cfg, data, dry_run=dry_run)
+
+        if sync and ok and cfg.get("notion_sync", True):
+            notion = _setup_notion_sync(cfg)
+            if notion:
+                module, db_id, hh_db_id = notion
+                log.info("Syncing today's generation to Notion (same session)...")
+                if not module.sync_today_on_page(page, cfg, db_id, hh_db_id=hh_db_id, overview_data=data):
+                    log.warning("Notion sync did not complete")
+
+        return ok
+
+    except Exception as e:
+        log.exception("Error during generation report for %s: %s", cfg["station_code"], e)
+        return False
+
 
+def run_generation_reports(stations, dry_run=False, sync=False):
+    """
+    Run the 10 PM generation report for every station in one session.
+    With sync=True the Notion daily sync runs in the same session for the
+    stations marked notion_sync, reusing the login and overview data.
+    Stations whose data_source is northbound are reported and synced from
+    the API without a browser; only the rest share a portal login.
+    Returns {station_code: ok}.
+    """
     log.info("=" * 60)
-    log.info("GENERATION REPORT -- %s", datetime.now().strftime("%Y-%m-%d %H:%M"))
+    log.info("GENERATION REPORT -- %s (%d station(s))", datetime.now().strftime("%Y-%m-%d %H:%M"), len(stations))
     log.info("=" * 60)
 
+    results = {}
+    northbound = [cfg for cfg in stations if northbound_client.use_northbound(cfg)]
+    if northbound:
+        by_code = _northbound_generation(northbound)
+        for cfg in northbound:
+            data = by_code.get(cfg["station_code"])
+            if not data:
+                continue
+            ok = summarise_generation(cfg, data, dry_run=dry_run)
+            if sync and ok and cfg.get("notion_sync", True):
+                _northbound_notion_sync(cfg, data)
+            results[cfg["station_code"]] = ok
+    pending = [cfg for cfg in stations if cfg["station_code"] not in results]
+    if not pending:
+        return results
+
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(pending[0]))
         page = context.new_page()
 
         try:
-            # Login
-            if not login(page, cfg):
+            # Login (one session serves every station on the account)
+            if not login(page, pending[0]):
                 log.error("Login failed -- aborting generation report")
-                return False
+                return {**results, **{cfg["station_code"]: False for cfg in pending}}
 
-            # Navigate to overview
-            navigate_to_page(page, cfg, "overview")
-
-            # Extract overview data
-            data = extract_overview_data(page)
-            log.info("Overview data: %s", json.dumps(data, indent=2, default=str))
-
-            # Irradiance is NOT on the overview page -- fetch from Plants list
-            irradiance_kwh_m2 = extract_station_irradiance(page, cfg)
-            if irradiance_kwh_m2 is not None:
-                data["irradiance_value"] = str(irradiance_kwh_m2)
-                data["irradiance_unit"] = "kWh/m²"
-
-            # Print summary
-            yield_val = data.get("yield_today_value", "N/A")
-            yield_unit = data.get("yield_today_unit", "")
-            total_val = data.get("total_yield_value", "N/A")
-            total_unit = data.get("total_yield_unit", "")
-            alarms = data.get("alarms", {})
-
-            irr_val = data.get("irradiance_value", "N/A")
-            irr_unit = data.get("irradiance_unit", "")
-
-            print("\n" + "=" * 50)
-            print(f"  DAILY GENERATION REPORT -- {date.today().isoformat()}")
-            print(f"  Station: {cfg['station_name']}")
-            print("=" * 50)
-            print(f"  Yield today:   {yield_val} {yield_unit}")
-            print(f"  Total yield:   {total_val} {total_unit}")
-            print(f"  Irradiance:    {irr_val} {irr_unit}")
-            if alarms:
-                alarm_str = ", ".join(f"{k}: {v}" for k, v in alarms.items() if v is not None)
-                print(f"  Alarms:        {alarm_str}")
-            print("=" * 50 + "\n")
-
-            # Log results
-            log_generation(data, dry_run=dry_run)
-
-            return True
+            rest = fetch_stations_api(page, pending, ("kpi", "alarms", "irradiance"))
+            for cfg, prefetched in zip(pending, rest):
+                results[cfg["station_code"]] = _portal_generation_report(
+                    page, cfg, prefetched, dry_run=dry_run, sync=sync)
+            return results
 
         except Exception as e:
             log.exception("Error during generation report: %s", e)
-            return False
+            return {**{cfg["station_code"]: False for cfg in pending}, **results}
         finally:
+            if blocker:
+                log.info(blocker.summary())
             browser.close()
 
 
+def run_generation_report(cfg, dry_run=False, sync=False):
+    """Run the 10 PM generation report for a single station."""
+    return run_generation_reports([cfg], dry_run=dry_run, sync=sync)[cfg["station_code"]]
+
+
+def _print_station_results(title, stations, results):
+    """Per-station status lines; silent for a single-station config."""
+    if len(stations) < 2:
+        return
+    print("\n" + "=" * 50)
+    print(f"  {title} -- {sum(1 for ok in results.values() if ok)}/{len(stations)} station(s) OK")
+    print("=" * 50)
+    for cfg in stations:
+        status = "OK" if results.get(cfg["station_code"]) else "FAIL"
+        print(f"  [{status:4}] {cfg.get('station_name', '')} ({cfg['station_code']})")
+    print("=" * 50 + "\n")
+
+
 def test_login_only(cfg):
     """Test that login works and print result."""
     from playwright.sync_api import sync_playwright
@@ -854,11 +1585,7 @@ def test_login_only(cfg):
     log.info("Testing login...")
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(cfg))
         page = context.new_page()
 
         try:
@@ -882,6 +1609,8 @@ def test_login_only(cfg):
             log.exception("Login test error: %s", e)
             return False
         finally:
+            if blocker:
+                log.info(blocker.summary())
             browser.close()
 
 
@@ -897,37 +1626,64 @@ def main():
 Examples:
   python fusionsolar_monitor.py --check             Daylight inverter check
   python fusionsolar_monitor.py --report            10 PM generation report
+  python fusionsolar_monitor.py --report --sync     Report + Notion sync in one browser session
   python fusionsolar_monitor.py --test-login        Test login only
   python fusionsolar_monitor.py --check --dry-run   Dry run (no CSV writes)
+  python fusionsolar_monitor.py --check --station NE=123   One station of a multi-station config
+  python fusionsolar_monitor.py --watch --until 18:00      Poll device status every 10 min until 18:00
         """
     )
     parser.add_argument("--check", action="store_true", help="Run inverter status check")
     parser.add_argument("--report", action="store_true", help="Run generation report")
     parser.add_argument("--test-login", action="store_true", help="Test login only")
     parser.add_argument("--dry-run", action="store_true", help="Don't write to CSV files")
+    parser.add_argument("--sync", action="store_true",
+                        help="With --report: sync to Notion in the same browser session")
     parser.add_argument("--no-sync", action="store_true", help="Skip Notion sync")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep one session open and poll device status (see --interval/--until)")
+    parser.add_argument("--interval", type=float, metavar="MIN",
+                        help="With --watch: minutes between polls (default: schedule.watch_interval_min or 10)")
+    parser.add_argument("--until", metavar="HH:MM", help="With --watch: stop at this local time today")
+    parser.add_argument("--station", action="append",
+                        help="Only this station code or name (repeatable; default: every configured station)")
 
     args = parser.parse_args()
 
-    if not any([args.check, args.report, args.test_login]):
+    if not any([args.check, args.report, args.test_login, args.watch]):
         parser.print_help()
         sys.exit(1)
 
     cfg = load_config()
+    stations = station_configs(cfg, only=args.station)
+    if not stations:
+        log.error("No configured station matches %s", ", ".join(args.station))
+        sys.exit(1)
 
     if args.test_login:
-        success = test_login_only(cfg)
+        success = test_login_only(stations[0])
         sys.exit(0 if success else 1)
 
+    if args.watch:
+        until = None
+        if args.until:
+            until = datetime.combine(date.today(), datetime.strptime(args.until, "%H:%M").time())
+        ok = run_watch(stations, watch_interval_s(cfg, args.interval), until=until, dry_run=args.dry_run)
+        sys.exit(0 if ok else 1)
+
     if args.check:
-        success = run_inverter_check(cfg, dry_run=args.dry_run)
-        sys.exit(0 if success else 1)
+        results = run_inverter_checks(stations, dry_run=args.dry_run)
+        _print_station_results("INVERTER CHECK", stations, results)
+        sys.exit(0 if results and all(results.values()) else 1)
 
     if args.report:
-        success = run_generation_report(cfg, dry_run=args.dry_run)
-        
+        in_process_sync = args.sync and not args.no_sync and not args.dry_run
+        results = run_generation_reports(stations, dry_run=args.dry_run, sync=in_process_sync)
+        _print_station_results("GENERATION REPORT", stations, results)
+        success = bool(results) and all(results.values())
+
         # Trigger Notion sync if report was successful and not disabled
-        if success and not args.no_sync and not args.dry_run:
+        if success and not in_process_sync and not args.no_sync and not args.dry_run:
             sync_script = SCRIPT_DIR / "notion_sync.py"
             if sync_script.exists():
                 print(f"\n[INFO] Triggering Notion sync...")
@@ -952,14 +1708,12 @@ Examples:
 
 
 
-def fetch_daily_energy_balance_api(page, cfg, target_date):
-    """
-    Fetch 5-minute interval power data (kW) from the 'energy-balance' API.
-    Returns the raw JSON response containing 'productPower' array (288 items).
-    """
+ENERGY_BALANCE_CONCURRENCY = 4
+
+
+def _energy_balance_url(cfg, target_date):
+    """Relative energy-balance API URL for one day."""
     station_dn = cfg.get("station_code")
-    if not station_dn or not station_dn.startswith("NE="):
-        log.warning("Station code '%s' does not look like a DN (NE=...). API call might fail.", station_dn)
 
     # Convert date to start-of-day timestamp (millis) and string
     # target_date is a datetime.date object
@@ -974,76 +1728,148 @@ def fetch_daily_energy_balance_api(page, cfg, target_date):
     # Construct query string
     # params: stationDn, timeDim=2 (day), timeZone=1.0 (approx), queryTime, dateStr
     query_string = f"?stationDn={station_dn}&timeDim=2&timeZone=1.0&queryTime={query_time_ms}&dateStr={date_str_param}"
-    full_url = api_path + query_string
+    return api_path + query_string
+
+
+def _check_station_dn(cfg):
+    station_dn = cfg.get("station_code")
+    if not station_dn or not station_dn.startswith("NE="):
+        log.warning("Station code '%s' does not look like a DN (NE=...). API call might fail.", station_dn)
+
+
+ENERGY_BALANCE_ENDPOINT = "energy-balance"
+
+
+def _product_power(data):
+    if data and isinstance(data.get("data"), dict) and data["data"].get("productPower"):
+        return data["data"]["productPower"]
+    return None
+
+
+def _cached_energy_balance(cfg, target_date):
+    """Raw energy-balance response from the payload cache, or None."""
+    return payload_cache.load(cfg.get("station_code"), ENERGY_BALANCE_ENDPOINT,
+                              target_date.isoformat(), target_date)
+
+
+def fetch_daily_energy_balance_api(page, cfg, target_date):
+    """
+    Fetch 5-minute interval power data (kW) from the 'energy-balance' API.
+    Returns the raw JSON response containing 'productPower' array (288 items).
+    The raw response is served from / written to the payload cache.
+    """
+    cached = _product_power(_cached_energy_balance(cfg, target_date))
+    if cached:
+        log.info("Energy balance for %s served from cache", target_date)
+        return cached
+
+    _check_station_dn(cfg)
+    full_url = _energy_balance_url(cfg, target_date)
 
     log.info("Fetching hourly data via API (relative): %s...", full_url)
     
+    # Fetch in the context of the logged-in browser
+    data = _fetch_json(page, full_url)
+    points = _product_power(data)
+    if points:
+        log.info("  Successfully fetched %d data points (5-min intervals)", len(points))
+        payload_cache.store(cfg.get("station_code"), ENERGY_BALANCE_ENDPOINT, target_date.isoformat(), data)
+        return points
+    log.warning("  API response invalid or missing 'productPower': %s", str(data)[:100])
+    return None
+
+
+def fetch_energy_balance_batch(page, cfg, dates, concurrency=ENERGY_BALANCE_CONCURRENCY):
+    """
+    Fetch the energy-balance 'productPower' array for many dates in a single
+    page.evaluate: a pool of `concurrency` in-page workers drains the date
+    list with Promise.all. Returns {date: productPower or None}.
+    Dates already in the payload cache are not fetched; when every date is
+    cached the page is never touched.
+    """
+    results = {}
+    dates = list(dates)
+    for d in dates:
+        points = _product_power(_cached_energy_balance(cfg, d))
+        if points:
+            results[d] = points
+    dates = [d for d in dates if d not in results]
+    if results:
+        log.info("Energy balance for %d dates served from cache", len(results))
+    if not dates:
+        return results
+    _check_station_dn(cfg)
+    urls = [_energy_balance_url(cfg, d) for d in dates]
+    log.info("Fetching energy balance for %d dates (%d in flight)...", len(dates), concurrency)
+
     try:
-        # Use page.evaluate to fetch in the context of the logged-in browser
-        data = page.evaluate("""
-            async (url) => {
-                const response = await fetch(url);
-                if (!response.ok) {
-                    throw new Error("API call failed with status " + response.status);
-                }
-                return await response.json();
+        bodies = page.evaluate("""
+            async ([urls, concurrency]) => {
+                const results = new Array(urls.length).fill(null);
+                let next = 0;
+                const worker = async () => {
+                    while (next < urls.length) {
+                        const i = next++;
+                        try {
+                            const response = await fetch(urls[i]);
+                            if (!response.ok) continue;
+                            results[i] = await response.json();
+                        } catch (e) {
+                            results[i] = null;
+                        }
+                    }
+                };
+                const workers = [];
+                for (let w = 0; w < Math.min(concurrency, urls.length); w++) workers.push(worker());
+                await Promise.all(workers);
+                return results;
             }
-        """, full_url)
-        
-        if data and "data" in data and "productPower" in data["data"]:
-            points = data["data"]["productPower"]
-            log.info("  Successfully fetched %d data points (5-min intervals)", len(points))
-            return points
-        else:
-            log.warning("  API response invalid or missing 'productPower': %s", str(data)[:100])
-            return None
-
+        """, [urls, max(1, int(concurrency))])
     except Exception as e:
-        log.warning("  Failed to fetch daily energy balance: %s", e)
-        return None
+        log.warning("  Batch energy-balance fetch failed: %s", e)
+        bodies = [None] * len(dates)
 
+    for d, body in zip(dates, bodies):
+        results[d] = _product_power(body)
+        if results[d]:
+            payload_cache.store(cfg.get("station_code"), ENERGY_BALANCE_ENDPOINT, d.isoformat(), body)
+    missing = [d for d in dates if not results[d]]
+    if missing:
+        log.warning("  No productPower for %d/%d dates: %s", len(missing), len(dates),
+                    ", ".join(d.isoformat() for d in missing[:5]) + ("..." if len(missing) > 5 else ""))
+    return results
 
-def calculate_hourly_yield_from_power(power_array):
+
+def calculate_hourly_yield_from_power(power_array, target_date=None):
     """
-    Convert 288 5-minute power samples (kW) into 24 hourly yield values (kWh).
-    Logic: Average Power (kW) * 1 Hour = Energy (kWh).
-    Since we have 12 samples per hour, the Average Power = Sum(samples) / 12.
+    Convert 5-minute power samples (kW) into hourly yield values (kWh).
+    Logic: Average Power (kW) * 1 Hour = Energy (kWh); missing samples count
+    as zero. Clock-change days (276/300 samples) and partial days are
+    handled by energy_aggregation.aggregate_day().
     """
-    if not power_array or len(power_array) != 288:
-        log.warning("Expected 288 power points, got %d. Cannot calculate hourly yield.", 
-                    len(power_array) if power_array else 0)
+    if not power_array:
+        log.warning("No power points. Cannot calculate hourly yield.")
+        return {}
+    try:
+        energy = aggregate_day(power_array, day=target_date)
+    except ValueError as e:
+        log.warning("Cannot calculate hourly yield: %s", e)
         return {}
+    if energy.missing_samples:
+        log.info("  %d/%d power samples missing (counted as zero)",
+                 energy.missing_samples, energy.five_min_kwh.size)
+    return energy.hourly_dict()
 
-    hourly_yield = {}
-    for hour in range(24):
-        start_idx = hour * 12
-        end_idx = start_idx + 12
-        samples = power_array[start_idx:end_idx]
-        
-        valid_samples = []
-        for s in samples:
-            try:
-                # API returns strings like "1.2", or null/empty
-                if s is not None and s != "" and s != "null":
-                    valid_samples.append(float(s))
-                else:
-                    valid_samples.append(0.0)
-            except ValueError:
-                valid_samples.append(0.0)
-        
-        if not valid_samples:
-            avg_kw = 0.0
-        else:
-            avg_kw = sum(valid_samples) / 12.0
-        
-        # Energy (kWh) = Avg Power (kW) * 1h
-        energy_kwh = avg_kw * 1.0
-        
-        # Store as "HH:00": value
-        hour_key = f"{hour:02d}:00"
-        hourly_yield[hour_key] = round(energy_kwh, 3)
 
-    return hourly_yield
+def calculate_sp_yield_from_power(power_array, target_date=None):
+    """5-minute power samples (kW) -> {settlement_period: kWh}, SP-aligned with Stark."""
+    if not power_array:
+        return {}
+    try:
+        return aggregate_day(power_array, day=target_date).sp_dict()
+    except ValueError as e:
+        log.warning("Cannot calculate settlement-period yield: %s", e)
+        return {}
 
 
 if __name__ == "__main__":
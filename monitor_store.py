@@ -0,0 +1,312 @@
+"""
+Monitor Store
+=============
+Indexed SQLite copy of the monitor logs (logs/monitor.db) so availability
+can be queried for any date range without re-reading the CSV history.
+
+    inverter_checks   one row per device per check, indexed on (date, device)
+    daily_generation  one row per station per --report run, indexed on date
+
+Rows carry the station code so a multi-station config shares one store.
+
+fusionsolar_monitor.py writes here alongside logs/*.csv; existing CSV
+history can be loaded once with --import-csv.
+
+Usage:
+    python monitor_store.py --import-csv
+    python monitor_store.py --availability 2026-03-01 2026-03-31 [--by-device]
+    python monitor_store.py --month 2026-03
+"""
+
+import argparse
+import calendar
+import csv
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+
+from calculations import time_based_availability
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+LOGS_DIR = SCRIPT_DIR / "logs"
+DEFAULT_DB = LOGS_DIR / "monitor.db"
+
+_OFFLINE_MARKERS = ("offline", "disconnect", "fault")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inverter_checks (
+    ts TEXT NOT NULL,
+    date TEXT NOT NULL,
+    station TEXT NOT NULL DEFAULT '',
+    device TEXT NOT NULL,
+    device_type TEXT,
+    status TEXT,
+    status_class TEXT,
+    online INTEGER NOT NULL,
+    UNIQUE (ts, station, device)
+);
+CREATE INDEX IF NOT EXISTS idx_inverter_checks_date_device ON inverter_checks (date, device);
+CREATE TABLE IF NOT EXISTS daily_generation (
+    ts TEXT NOT NULL,
+    date TEXT NOT NULL,
+    station TEXT NOT NULL DEFAULT '',
+    yield_today TEXT,
+    yield_unit TEXT,
+    total_yield TEXT,
+    total_unit TEXT,
+    irradiance TEXT,
+    irradiance_unit TEXT,
+    alarms_critical TEXT,
+    alarms_major TEXT,
+    alarms_minor TEXT,
+    alarms_warning TEXT,
+    UNIQUE (ts, station)
+);
+CREATE INDEX IF NOT EXISTS idx_daily_generation_date ON daily_generation (date);
+"""
+
+_GENERATION_COLUMNS = (
+    "ts", "date", "station", "yield_today", "yield_unit", "total_yield", "total_unit",
+    "irradiance", "irradiance_unit",
+    "alarms_critical", "alarms_major", "alarms_minor", "alarms_warning",
+)
+
+
+def db_path():
+    return Path(os.environ.get("MONITOR_DB") or DEFAULT_DB)
+
+
+def connect(path=None):
+    """Open (and create if needed) the store."""
+    path = Path(path or db_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def is_offline(status, status_class=""):
+    """Same rule as the inverter check summary: offline, disconnected or faulted."""
+    text = f"{status or ''}{status_class or ''}".lower()
+    return any(marker in text for marker in _OFFLINE_MARKERS)
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def record_inverter_check(devices, ts, station="", path=None):
+    """Insert one check (a list of device dicts as scraped) taken at ts."""
+    day = ts[:10]
+    rows = [
+        (
+            ts, day, station,
+            dev.get("name", ""),
+            dev.get("type", ""),
+            dev.get("status", ""),
+            dev.get("statusClass", ""),
+            0 if is_offline(dev.get("status", ""), dev.get("statusClass", "")) else 1,
+        )
+        for dev in devices
+    ]
+    with closing(connect(path)) as conn, conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO inverter_checks "
+            "(ts, date, station, device, device_type, status, status_class, online) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def record_generation(row, path=None):
+    """Insert one generation record keyed by the daily_generation.csv column names."""
+    values = tuple(row.get(col, "") for col in _GENERATION_COLUMNS)
+    with closing(connect(path)) as conn, conn:
+        conn.execute(
+            f"INSERT OR IGNORE INTO daily_generation ({', '.join(_GENERATION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _GENERATION_COLUMNS)})",
+            values,
+        )
+
+
+def import_csv(inverter_csv=None, generation_csv=None, station=None, path=None):
+    """
+    Load existing CSV logs for one station; rows already in the store are skipped.
+
+    station defaults to the configured station_code, the key live writes use.
+    Rows an earlier import stored under station "" are moved to that code
+    (or dropped where the code already has the same row).
+    """
+    if station is None:
+        station = _configured_station()
+    inverter_csv = Path(inverter_csv or LOGS_DIR / "inverter_checks.csv")
+    generation_csv = Path(generation_csv or LOGS_DIR / "daily_generation.csv")
+    counts = {"inverter_checks": 0, "daily_generation": 0}
+    with closing(connect(path)) as conn, conn:
+        if inverter_csv.exists():
+            with open(inverter_csv, newline="", encoding="utf-8") as f:
+                rows = [
+                    (r["timestamp"], r["timestamp"][:10], station, r["device_name"], r.get("device_type", ""),
+                     r.get("status", ""), r.get("status_class", ""),
+                     0 if is_offline(r.get("status", ""), r.get("status_class", "")) else 1)
+                    for r in csv.DictReader(f) if r.get("timestamp")
+                ]
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO inverter_checks "
+                "(ts, date, station, device, device_type, status, status_class, online) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            counts["inverter_checks"] = conn.total_changes - before
+        if generation_csv.exists():
+            with open(generation_csv, newline="", encoding="utf-8") as f:
+                rows = [
+                    tuple({**r, "ts": r["timestamp"], "station": station}.get(col, "") for col in _GENERATION_COLUMNS)
+                    for r in csv.DictReader(f) if r.get("timestamp")
+                ]
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO daily_generation ({', '.join(_GENERATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _GENERATION_COLUMNS)})",
+                rows,
+            )
+            counts["daily_generation"] = conn.total_changes - before
+        if station:
+            for table in ("inverter_checks", "daily_generation"):
+                conn.execute(f"UPDATE OR IGNORE {table} SET station = ? WHERE station = ''", (station,))
+                conn.execute(f"DELETE FROM {table} WHERE station = ''")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _filters(device_type=None, station=None):
+    clause, params = "", ()
+    if station is not None:
+        clause, params = " AND station = ?", (station,)
+    if device_type:
+        clause, params = clause + " AND lower(device_type) LIKE ?", params + (f"%{device_type.lower()}%",)
+    return clause, params
+
+
+def device_availability(start, end, device_type=None, station=None, path=None):
+    """
+    Time-based availability per device per day in [start, end]:
+    {(date_iso, station, device): percent}. Each check counts as an equal
+    share of the day.
+    """
+    clause, params = _filters(device_type, station)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT date, station, device, SUM(online), COUNT(*) FROM inverter_checks "
+            f"WHERE date BETWEEN ? AND ?{clause} GROUP BY date, station, device",
+            (start.isoformat(), end.isoformat(), *params),
+        ).fetchall()
+    out = {}
+    for day, station_code, device, online, checks in rows:
+        results = [{"online_count": 1}] * online + [{"online_count": 0}] * (checks - online)
+        out[(day, station_code, device)] = time_based_availability(
+            results, total_inverters=1, daylight_hours=0.0, checks_per_day=checks)
+    return out
+
+
+def daily_availability(start, end, device_type=None, station=None, path=None):
+    """
+    Fleet time-based availability per day in [start, end]: {date_iso: percent}.
+    Each station's day is scored over its own checks and distinct devices;
+    stations are then combined weighted by device count.
+    """
+    clause, params = _filters(device_type, station)
+    with closing(connect(path)) as conn:
+        checks = conn.execute(
+            "SELECT date, station, ts, SUM(online) FROM inverter_checks "
+            f"WHERE date BETWEEN ? AND ?{clause} GROUP BY date, station, ts ORDER BY date, station, ts",
+            (start.isoformat(), end.isoformat(), *params),
+        ).fetchall()
+        fleet = conn.execute(
+            "SELECT date, station, COUNT(DISTINCT device) FROM inverter_checks "
+            f"WHERE date BETWEEN ? AND ?{clause} GROUP BY date, station",
+            (start.isoformat(), end.isoformat(), *params),
+        ).fetchall()
+    by_station_day = {}
+    for day, station_code, _, online in checks:
+        by_station_day.setdefault((day, station_code), []).append({"online_count": online})
+    weighted = {}
+    for day, station_code, devices in fleet:
+        results = by_station_day[(day, station_code)]
+        pct = time_based_availability(results, total_inverters=devices, daylight_hours=0.0,
+                                      checks_per_day=len(results))
+        if pct is None:
+            continue
+        total, count = weighted.get(day, (0.0, 0))
+        weighted[day] = (total + pct * devices, count + devices)
+    return {day: round(total / count, 2) for day, (total, count) in weighted.items()}
+
+
+def monthly_availability(year, month, device_type=None, station=None, path=None):
+    """Mean of the month's daily availabilities, or None without checks."""
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    daily = [v for v in daily_availability(start, end, device_type, station, path).values() if v is not None]
+    if not daily:
+        return None
+    return round(sum(daily) / len(daily), 2)
+
+
+def generation_rows(start, end, station=None, path=None):
+    """daily_generation rows in [start, end] as dicts, oldest first."""
+    clause, params = _filters(station=station)
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_GENERATION_COLUMNS)} FROM daily_generation "
+            f"WHERE date BETWEEN ? AND ?{clause} ORDER BY ts",
+            (start.isoformat(), end.isoformat(), *params),
+        ).fetchall()
+    return [dict(zip(_GENERATION_COLUMNS, r)) for r in rows]
+
+
+def _configured_station():
+    """Top-level station_code from config.json -- the station the legacy CSVs belong to."""
+    try:
+        with open(SCRIPT_DIR / "config.json", encoding="utf-8") as f:
+            return json.load(f).get("station_code", "")
+    except (OSError, ValueError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the indexed monitor log store")
+    parser.add_argument("--import-csv", action="store_true", help="Load logs/*.csv into the store")
+    parser.add_argument("--availability", nargs=2, metavar=("START", "END"), help="Daily availability for a date range")
+    parser.add_argument("--by-device", action="store_true", help="With --availability: per device per day")
+    parser.add_argument("--month", metavar="YYYY-MM", help="Monthly availability")
+    parser.add_argument("--device-type", help="Only devices whose type contains this text (e.g. inverter)")
+    parser.add_argument("--station", help="Only this station code (with --import-csv: the station the CSVs belong to)")
+    args = parser.parse_args()
+
+    if args.import_csv:
+        counts = import_csv(station=args.station)
+        print(f"Imported {counts['inverter_checks']} check row(s) and {counts['daily_generation']} generation row(s) into {db_path()}")
+    if args.availability:
+        start, end = (datetime.strptime(v, "%Y-%m-%d").date() for v in args.availability)
+        if args.by_device:
+            for (day, station, device), pct in sorted(
+                    device_availability(start, end, args.device_type, args.station).items()):
+                print(f"{day}  {station:<12} {device:<20} {pct:6.2f}%")
+        else:
+            for day, pct in sorted(daily_availability(start, end, args.device_type, args.station).items()):
+                print(f"{day}  {pct:6.2f}%")
+    if args.month:
+        year, month = (int(v) for v in args.month.split("-"))
+        pct = monthly_availability(year, month, args.device_type, args.station)
+        print(f"{args.month}: {'no checks' if pct is None else f'{pct:.2f}%'}")
+    if not (args.import_csv or args.availability or args.month):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ Usage:
     python nightly_sync.py                   # yesterday + today (default)
     python nightly_sync.py --days 3          # last 3 days + today
     python nightly_sync.py --no-fusion       # skip FusionSolar sync (Elexon + Stark only)
+    python nightly_sync.py --warm-browser    # share one logged-in browser across steps
 """
 
 import argparse
@@ -62,6 +63,50 @@ def run_step(label, cmd, cwd=None, timeout=300):
         return False, elapsed
 
 
+def start_browser_service():
+    """
+    Start browser_service.py for the duration of the run and export its CDP
+    endpoint so every step (and their own subprocesses) reuse one warm,
+    logged-in Chromium. Returns the Popen handle, or None if it did not come up.
+    """
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from browser_service import running_endpoint, wait_until_ready
+
+    endpoint = running_endpoint()
+    if endpoint:
+        # A resident service (e.g. under launchd) is already up; just use it.
+        os.environ["BROWSER_SERVICE_ENDPOINT"] = endpoint
+        print(f"\n  Using running browser service at {endpoint}")
+        return None
+
+    print("\n  Starting warm browser service...")
+    sys.stdout.flush()
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPT_DIR / "browser_service.py"), "--serve"],
+        cwd=str(SCRIPT_DIR),
+    )
+    endpoint = wait_until_ready(timeout_s=180)
+    if not endpoint or proc.poll() is not None:
+        print("  [WARN] Browser service did not start -- steps will launch their own browsers")
+        stop_browser_service(proc)
+        return None
+    os.environ["BROWSER_SERVICE_ENDPOINT"] = endpoint
+    print(f"  Browser service ready at {endpoint}")
+    sys.stdout.flush()
+    return proc
+
+
+def stop_browser_service(proc):
+    os.environ.pop("BROWSER_SERVICE_ENDPOINT", None)
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Nightly sync: FusionSolar + Elexon SSP + Stark HH generation -> Notion"
@@ -82,6 +127,11 @@ def main():
         "--end", default=None,
         help="Override end date YYYY-MM-DD (default: today)"
     )
+    parser.add_argument(
+        "--warm-browser", action="store_true",
+        default=os.environ.get("NIGHTLY_WARM_BROWSER", "").strip().lower() in {"1", "true", "yes", "on"},
+        help="Run a shared logged-in browser for all steps (env: NIGHTLY_WARM_BROWSER=1)"
+    )
     args = parser.parse_args()
 
     end_date = date.fromisoformat(args.end) if args.end else date.today()
@@ -98,6 +148,35 @@ def main():
     print(f"{'=' * 60}")
     sys.stdout.flush()
 
+    browser_proc = start_browser_service() if args.warm_browser else None
+    try:
+        results = run_steps(args, start_str, end_str)
+    finally:
+        stop_browser_service(browser_proc)
+
+    # ------------------------------------------------------------------
+    # Summary
+    # ------------------------------------------------------------------
+    print(f"\n{'=' * 60}")
+    print("  NIGHTLY SYNC SUMMARY")
+    print(f"{'=' * 60}")
+    all_ok = True
+    for name, ok, elapsed in results:
+        icon = "[OK]  " if ok else "[FAIL]"
+        print(f"  {icon}  {name:<30s}  {elapsed:>6.1f}s")
+        if not ok:
+            all_ok = False
+    print(f"{'=' * 60}")
+
+    if not all_ok:
+        print("\n  [!] Some steps failed -- check logs above")
+        sys.exit(1)
+    else:
+        print("\n  All steps completed successfully")
+
+
+def run_steps(args, start_str, end_str):
+    """Run the pipeline steps in order; returns [(name, ok, elapsed), ...]."""
     results = []
     total_steps = 2 if args.no_fusion else 3
     step = 0
@@ -157,25 +236,7 @@ def main():
     )
     results.append(("Stark HH sync", ok, elapsed))
 
-    # ------------------------------------------------------------------
-    # Summary
-    # ------------------------------------------------------------------
-    print(f"\n{'=' * 60}")
-    print("  NIGHTLY SYNC SUMMARY")
-    print(f"{'=' * 60}")
-    all_ok = True
-    for name, ok, elapsed in results:
-        icon = "[OK]  " if ok else "[FAIL]"
-        print(f"  {icon}  {name:<30s}  {elapsed:>6.1f}s")
-        if not ok:
-            all_ok = False
-    print(f"{'=' * 60}")
-
-    if not all_ok:
-        print("\n  [!] Some steps failed -- check logs above")
-        sys.exit(1)
-    else:
-        print("\n  All steps completed successfully")
+    return results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,393 @@
+"""
+FusionSolar Northbound Client
+=============================
+Browserless data source for fusionsolar_monitor and notion_sync: talks to the
+FusionSolar Northbound (OpenAPI) interface with requests instead of driving
+the portal in Chromium.
+
+Handles the API's own rules:
+  - token login (/thirdData/login returns an xsrf-token header), reused
+    in-process and across runs via .northbound_token.json until it ages out
+  - failCode 305 (session expired) -> log in again and retry once
+  - failCode 407 (interface called too often) -> back off and retry
+
+Enable in config.json:
+    "data_source": "northbound",
+    "northbound": {"base_url": "https://eu5.fusionsolar.huawei.com",
+                   "username": "...", "system_code": "..."}
+or per run with FUSIONSOLAR_DATA_SOURCE=northbound.
+
+Day boundaries (collectTime) are midnight in the station's timezone:
+northbound.timezone, else location.timezone, else Europe/London -- never
+the host's, so results do not change between a laptop and UTC CI.
+
+Usage:
+    python northbound_client.py --check               # device statuses
+    python northbound_client.py --curve 2026-03-05    # 5-min power curve
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import requests
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+TOKEN_FILE = SCRIPT_DIR / ".northbound_token.json"
+
+DEFAULT_BASE_URL = "https://eu5.fusionsolar.huawei.com"
+DEFAULT_TIMEZONE = "Europe/London"
+TOKEN_MAX_AGE_S = 25 * 60          # tokens expire after 30 min of inactivity
+FAIL_NOT_LOGGED_IN = 305
+FAIL_RATE_LIMITED = 407
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF_S = 60.0
+MAX_DEVICES_PER_CALL = 100
+MAX_STATIONS_PER_CALL = 100
+
+DEV_TYPE_INVERTER = 1
+DEV_TYPE_EMI = 10                  # environmental monitoring instrument
+FIVE_MINUTES_MS = 5 * 60 * 1000
+POINTS_PER_DAY = 288
+
+
+class NorthboundError(RuntimeError):
+    """Raised when the Northbound API rejects a call or cannot be reached."""
+
+
+def data_source(cfg):
+    """'northbound' or 'portal' (default) -- env FUSIONSOLAR_DATA_SOURCE wins over config."""
+    source = os.environ.get("FUSIONSOLAR_DATA_SOURCE") or cfg.get("data_source") or "portal"
+    return source.strip().lower()
+
+
+def use_northbound(cfg):
+    return data_source(cfg) == "northbound"
+
+
+def client_from_config(cfg):
+    nb = cfg.get("northbound", {})
+    return NorthboundClient(
+        base_url=os.environ.get("NORTHBOUND_BASE_URL") or nb.get("base_url") or DEFAULT_BASE_URL,
+        username=os.environ.get("NORTHBOUND_USERNAME") or nb.get("username", ""),
+        system_code=os.environ.get("NORTHBOUND_SYSTEM_CODE") or nb.get("system_code", ""),
+        min_interval_s=float(nb.get("min_interval_s", 1.0)),
+        timezone=nb.get("timezone") or (cfg.get("location") or {}).get("timezone") or DEFAULT_TIMEZONE,
+    )
+
+
+def _day_start_ms(target_date, tz):
+    return int(datetime.combine(target_date, datetime.min.time(), tzinfo=tz).timestamp() * 1000)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fmt_number(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class NorthboundClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, username="", system_code="", session=None,
+                 timeout=30, token_file=None, min_interval_s=1.0, sleep=time.sleep,
+                 timezone=DEFAULT_TIMEZONE):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.system_code = system_code
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        # None -> TOKEN_FILE looked up now (not at def time, so it can be patched); False disables
+        token_file = TOKEN_FILE if token_file is None else token_file
+        self.token_file = Path(token_file) if token_file else None
+        self.tz = ZoneInfo(timezone)
+        self.min_interval_s = min_interval_s
+        self._sleep = sleep
+        self._token = None
+        self._last_call = 0.0
+        self._load_token()
+
+    # -- token handling ---------------------------------------------------
+
+    def _load_token(self):
+        if not self.token_file or not self.token_file.exists():
+            return
+        try:
+            saved = json.loads(self.token_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if saved.get("base_url") != self.base_url or saved.get("username") != self.username:
+            return
+        if time.time() - saved.get("obtained_at", 0) < TOKEN_MAX_AGE_S:
+            self._token = saved.get("token")
+
+    def _save_token(self):
+        if not self.token_file:
+            return
+        try:
+            self.token_file.write_text(json.dumps({
+                "base_url": self.base_url,
+                "username": self.username,
+                "token": self._token,
+                "obtained_at": time.time(),
+            }), encoding="utf-8")
+        except OSError:
+            pass
+
+    def login(self):
+        """Obtain a fresh xsrf-token; raises NorthboundError on rejection."""
+        if not self.username or not self.system_code:
+            raise NorthboundError("Northbound username/system_code not configured")
+        resp = self.session.post(
+            f"{self.base_url}/thirdData/login",
+            json={"userName": self.username, "systemCode": self.system_code},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        token = resp.headers.get("xsrf-token") or self.session.cookies.get("XSRF-TOKEN")
+        if not body.get("success") or not token:
+            raise NorthboundError(f"Northbound login failed (failCode {body.get('failCode')})")
+        self._token = token
+        self._save_token()
+        return token
+
+    # -- transport --------------------------------------------------------
+
+    def _throttle(self):
+        wait = self.min_interval_s - (time.monotonic() - self._last_call)
+        if wait > 0:
+            self._sleep(wait)
+        self._last_call = time.monotonic()
+
+    def call(self, endpoint, payload):
+        """POST /thirdData/<endpoint>; returns the 'data' member of a successful reply."""
+        if not self._token:
+            self.login()
+        relogged = False
+        rate_limited = 0
+        while True:
+            self._throttle()
+            resp = self.session.post(
+                f"{self.base_url}/thirdData/{endpoint}",
+                json=payload,
+                headers={"xsrf-token": self._token},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            body = resp.json()
+            if body.get("success"):
+                return body.get("data")
+            fail_code = body.get("failCode")
+            if fail_code == FAIL_NOT_LOGGED_IN and not relogged:
+                relogged = True
+                self.login()
+                continue
+            if fail_code == FAIL_RATE_LIMITED and rate_limited < RATE_LIMIT_RETRIES:
+                rate_limited += 1
+                self._sleep(RATE_LIMIT_BACKOFF_S * rate_limited)
+                continue
+            raise NorthboundError(
+                f"{endpoint} failed (failCode {fail_code}): {body.get('message') or body.get('data')}"
+            )
+
+    # -- endpoints --------------------------------------------------------
+
+    def stations_real_kpi(self, station_codes):
+        """{station_code: dataItemMap}; stations are batched into one call per 100."""
+        station_codes = list(station_codes)
+        out = {}
+        for i in range(0, len(station_codes), MAX_STATIONS_PER_CALL):
+            chunk = station_codes[i:i + MAX_STATIONS_PER_CALL]
+            for row in self.call("getStationRealKpi", {"stationCodes": ",".join(chunk)}) or []:
+                out[row.get("stationCode")] = row.get("dataItemMap", {})
+        return out
+
+    def station_real_kpi(self, station_code):
+        return self.stations_real_kpi([station_code]).get(station_code, {})
+
+    def device_lists(self, station_codes):
+        """{station_code: [device]}; stations are batched into one call per 100."""
+        station_codes = list(station_codes)
+        out = {code: [] for code in station_codes}
+        for i in range(0, len(station_codes), MAX_STATIONS_PER_CALL):
+            chunk = station_codes[i:i + MAX_STATIONS_PER_CALL]
+            for dev in self.call("getDevList", {"stationCodes": ",".join(chunk)}) or []:
+                out.setdefault(dev.get("stationCode"), []).append(dev)
+        return out
+
+    def device_list(self, station_code):
+        return self.device_lists([station_code]).get(station_code, [])
+
+    def device_real_kpi(self, dev_ids, dev_type_id):
+        rows = []
+        for i in range(0, len(dev_ids), MAX_DEVICES_PER_CALL):
+            chunk = dev_ids[i:i + MAX_DEVICES_PER_CALL]
+            rows.extend(self.call("getDevRealKpi", {
+                "devIds": ",".join(str(d) for d in chunk),
+                "devTypeId": dev_type_id,
+            }) or [])
+        return rows
+
+    def device_five_minutes(self, dev_ids, dev_type_id, target_date):
+        rows = []
+        for i in range(0, len(dev_ids), MAX_DEVICES_PER_CALL):
+            chunk = dev_ids[i:i + MAX_DEVICES_PER_CALL]
+            rows.extend(self.call("getDevFiveMinutes", {
+                "devIds": ",".join(str(d) for d in chunk),
+                "devTypeId": dev_type_id,
+                "collectTime": _day_start_ms(target_date, self.tz),
+            }) or [])
+        return rows
+
+    def station_day_kpi(self, station_code, month_date):
+        return self.call("getKpiStationDay", {
+            "stationCodes": station_code,
+            "collectTime": _day_start_ms(month_date, self.tz),
+        }) or []
+
+    # -- monitor-shaped helpers -------------------------------------------
+
+    def device_statuses_many(self, stations):
+        """
+        {station_code: devices} in fusionsolar_monitor.extract_inverter_statuses()
+        format for {station_code: station_name}. One getDevList and one
+        getDevRealKpi per 100 stations/inverters, however many stations.
+        """
+        lists = self.device_lists(stations)
+        inverter_ids = [d["id"] for devs in lists.values() for d in devs if d.get("devTypeId") == DEV_TYPE_INVERTER]
+        run_state = {}
+        if inverter_ids:
+            for row in self.device_real_kpi(inverter_ids, DEV_TYPE_INVERTER):
+                run_state[row.get("devId")] = (row.get("dataItemMap") or {}).get("run_state")
+
+        out = {}
+        for station_code, station_name in stations.items():
+            statuses = []
+            for dev in lists.get(station_code, []):
+                state = run_state.get(dev["id"])
+                if state is None:
+                    status = "Unknown" if dev.get("devTypeId") == DEV_TYPE_INVERTER else "Online"
+                else:
+                    status = "Online" if int(state) == 1 else "Offline"
+                statuses.append({
+                    "name": dev.get("devName", ""),
+                    "plant": station_name,
+                    "type": "Inverter" if dev.get("devTypeId") == DEV_TYPE_INVERTER else str(dev.get("devTypeId", "")),
+                    "sn": dev.get("esnCode", ""),
+                    "status": status,
+                    "statusTitle": "" if state is None else str(state),
+                    "statusClass": "",
+                })
+            out[station_code] = statuses
+        return out
+
+    def device_statuses(self, station_code, station_name=""):
+        """Devices in fusionsolar_monitor.extract_inverter_statuses() format."""
+        return self.device_statuses_many({station_code: station_name})[station_code]
+
+    def overview_data_many(self, station_codes):
+        """{station_code: overview dict, or None when the KPI has no day_power}."""
+        kpis = self.stations_real_kpi(station_codes)
+        out = {}
+        for station_code in station_codes:
+            kpi = kpis.get(station_code) or {}
+            daily = _float(kpi.get("day_power"))
+            if daily is None:
+                out[station_code] = None
+                continue
+            data = {"yield_today_value": _fmt_number(daily), "yield_today_unit": "kWh"}
+            total = _float(kpi.get("total_power"))
+            if total is not None:
+                data["total_yield_value"] = _fmt_number(total)
+                data["total_yield_unit"] = "kWh"
+            income = _float(kpi.get("day_income"))
+            if income is not None:
+                data["revenue"] = _fmt_number(income)
+            out[station_code] = data
+        return out
+
+    def overview_data(self, station_code):
+        """Station KPIs in fusionsolar_monitor.extract_overview_data() keys."""
+        data = self.overview_data_many([station_code])[station_code]
+        if data is None:
+            raise NorthboundError("getStationRealKpi returned no day_power")
+        return data
+
+    def station_irradiance_many(self, station_codes):
+        """{station_code: today's irradiation (kWh/m²) from its EMI, or None without one}."""
+        lists = self.device_lists(station_codes)
+        emi_station = {d["id"]: code for code, devs in lists.items() for d in devs if d.get("devTypeId") == DEV_TYPE_EMI}
+        out = {code: None for code in station_codes}
+        if not emi_station:
+            return out
+        for row in self.device_real_kpi(list(emi_station), DEV_TYPE_EMI):
+            code = emi_station.get(row.get("devId"))
+            total = _float((row.get("dataItemMap") or {}).get("radiant_total"))
+            if code is not None and total is not None and out.get(code) is None:
+                # radiant_total is reported in MJ/m²
+                out[code] = round(total / 3.6, 3)
+        return out
+
+    def station_irradiance(self, station_code):
+        """Today's irradiation (kWh/m²) from the site EMI, or None without one."""
+        return self.station_irradiance_many([station_code])[station_code]
+
+    def daily_power_curve(self, station_code, target_date):
+        """
+        Site active power (kW) summed over all inverters as 288 five-minute
+        slots -- same shape as fetch_daily_energy_balance_api()'s productPower.
+        """
+        ids = [d["id"] for d in self.device_list(station_code) if d.get("devTypeId") == DEV_TYPE_INVERTER]
+        if not ids:
+            return None
+        start_ms = _day_start_ms(target_date, self.tz)
+        curve = [None] * POINTS_PER_DAY
+        for row in self.device_five_minutes(ids, DEV_TYPE_INVERTER, target_date):
+            slot = (int(row.get("collectTime", 0)) - start_ms) // FIVE_MINUTES_MS
+            power = _float((row.get("dataItemMap") or {}).get("active_power"))
+            if 0 <= slot < POINTS_PER_DAY and power is not None:
+                curve[slot] = (curve[slot] or 0.0) + power
+        return curve
+
+    def month_report(self, station_code, year, month):
+        """Daily rows in fusionsolar_monitor.scrape_monthly_report() format."""
+        rows = []
+        for item in self.station_day_kpi(station_code, date(year, month, 1)):
+            kpi = item.get("dataItemMap") or {}
+            day = datetime.fromtimestamp(int(item["collectTime"]) / 1000, self.tz).date()
+            rows.append({
+                "date": day.isoformat(),
+                "pv_kwh": _float(kpi.get("PVYield")) or 0,
+                "inv_kwh": _float(kpi.get("inverter_power")) or 0,
+                "irradiance_kwh_m2": _float(kpi.get("radiation_intensity")),
+            })
+        return sorted(rows, key=lambda r: r["date"])
+
+
+if __name__ == "__main__":
+    from fusionsolar_monitor import load_config
+
+    parser = argparse.ArgumentParser(description="Query the FusionSolar Northbound API")
+    parser.add_argument("--check", action="store_true", help="Print device statuses")
+    parser.add_argument("--kpi", action="store_true", help="Print station real-time KPIs")
+    parser.add_argument("--curve", type=str, help="Print the 5-min power curve for YYYY-MM-DD")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    client = client_from_config(cfg)
+    station = cfg["station_code"]
+    if args.check:
+        for dev in client.device_statuses(station, cfg.get("station_name", "")):
+            print(f"{dev['name']:30} {dev['type']:10} {dev['status']}")
+    if args.kpi:
+        print(json.dumps(client.overview_data(station), indent=2))
+    if args.curve:
+        print(json.dumps(client.daily_power_curve(station, date.fromisoformat(args.curve))))
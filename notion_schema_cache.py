@@ -0,0 +1,155 @@
+"""
+Notion Schema Cache
+===================
+Property types of the Notion databases the sync scripts write to, shared by
+notion_sync.py and stark_daily_sync.py and stored as JSON:
+
+    .notion_schema_cache.json   {db_id: {"fetched_at", "types"}}
+
+Within a process each database is fetched at most once. On disk an entry is
+trusted for NOTION_SCHEMA_TTL_S; after that one full GET replaces it. The
+cache is TTL-only: Notion offers no conditional GET, so a column deleted or
+renamed in Notion is only noticed when the entry expires or when a write
+is rejected -- callers invalidate() on a 400 and fetch again. Any response
+that already carries the database (the GET that verifies a cached DB id,
+the PATCH that adds missing columns) is handed to remember() so it is not
+fetched again.
+
+A DatabaseSchema is a read-only {name: type} mapping that also carries the
+set of writable columns, so per-row property builders look names up in a
+precomputed set instead of re-checking types for every column.
+
+Environment:
+  NOTION_SCHEMA_CACHE=0        bypass the disk cache (memory cache still applies)
+  NOTION_SCHEMA_CACHE_FILE     cache file (default .notion_schema_cache.json)
+  NOTION_SCHEMA_TTL_S          seconds a disk entry is used unchecked (default 3600)
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+from services.notion_properties import READ_ONLY_TYPES, writable_columns  # noqa: F401 (re-exported)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_FILE = SCRIPT_DIR / ".notion_schema_cache.json"
+DEFAULT_TTL_S = 60 * 60
+
+_MEMORY = {}  # db_id -> DatabaseSchema
+
+
+@dataclass(frozen=True)
+class DatabaseSchema(Mapping):
+    db_id: str
+    types: dict
+    writable: frozenset = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "writable", frozenset(
+            name for name, typ in self.types.items() if typ not in READ_ONLY_TYPES))
+
+    def __getitem__(self, name):
+        return self.types[name]
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __len__(self):
+        return len(self.types)
+
+    def can_write(self, name):
+        return name in self.writable
+
+    @classmethod
+    def from_database(cls, db):
+        """From a Notion database object (GET/PATCH /v1/databases/{id} response)."""
+        return cls(
+            db_id=db["id"],
+            types={name: prop.get("type", "unknown") for name, prop in db.get("properties", {}).items()},
+        )
+
+
+def _key(db_id):
+    return (db_id or "").replace("-", "")
+
+
+def disk_enabled():
+    return os.environ.get("NOTION_SCHEMA_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def cache_file():
+    return Path(os.environ.get("NOTION_SCHEMA_CACHE_FILE") or DEFAULT_CACHE_FILE)
+
+
+def _read_disk():
+    if not disk_enabled():
+        return {}
+    try:
+        with open(cache_file(), encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_disk(data):
+    if not disk_enabled():
+        return
+    path = cache_file()
+    tmp = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def remember(db, now=None):
+    """Cache a database object already fetched (or returned by a PATCH) and return its schema."""
+    schema = DatabaseSchema.from_database(db)
+    key = _key(schema.db_id)
+    cached = _MEMORY.get(key)
+    if cached is not None and cached.types == schema.types:
+        schema = cached
+    data = _read_disk()
+    data[key] = {"types": schema.types, "fetched_at": now or time.time()}
+    _write_disk(data)
+    _MEMORY[key] = schema
+    return schema
+
+
+def get(db_id, headers, refresh=False, now=None):
+    """
+    DatabaseSchema for db_id: from memory, from disk while younger than the
+    TTL, otherwise from one GET. Raises requests.HTTPError if the GET fails.
+    """
+    key = _key(db_id)
+    if not refresh and key in _MEMORY:
+        return _MEMORY[key]
+
+    entry = {} if refresh else _read_disk().get(key) or {}
+    ttl = float(os.environ.get("NOTION_SCHEMA_TTL_S", DEFAULT_TTL_S))
+    if entry and (now or time.time()) - float(entry.get("fetched_at", 0)) < ttl:
+        schema = DatabaseSchema(db_id=db_id, types=entry.get("types") or {})
+        _MEMORY[key] = schema
+        return schema
+
+    r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=headers)
+    r.raise_for_status()
+    return remember(r.json(), now=now)
+
+
+def invalidate(db_id):
+    """Drop db_id so the next get() refetches it, e.g. after Notion rejected a write."""
+    key = _key(db_id)
+    _MEMORY.pop(key, None)
+    data = _read_disk()
+    if data.pop(key, None) is not None:
+        _write_disk(data)
@@ -14,19 +14,28 @@ Usage:
 """
 
 import argparse
+import calendar
 import csv
-import importlib.util
 import json
 import logging
 import os
+import queue
 import re
 import subprocess
 import sys
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
+import energy_aggregation
+import northbound_client
+import notion_schema_cache
+import payload_cache
+import script_modules
+from browser_session import browser_options, launch_portal_browser
 from calculations import performance_ratio, specific_yield
 from fusionsolar_monitor import (
     load_config,
@@ -36,6 +45,7 @@ from fusionsolar_monitor import (
     extract_station_irradiance,
     extract_overview_data,
     fetch_daily_energy_balance_api,
+    fetch_energy_balance_batch,
     calculate_hourly_yield_from_power,
 )
 
@@ -82,10 +92,6 @@ NOTION_DB_ID_FILE = SCRIPT_DIR / ".notion_db_id"
 NOTION_HH_DB_ID_FILE = SCRIPT_DIR / ".notion_hh_db_id"
 DB_NAME = "FusionSolar Daily Generation"
 HH_DB_NAME = "FusionSolar HH Site Data"
-# Cache: db_id -> {prop_name: prop_type} (populated on first upsert per DB)
-_DB_PROP_CACHE: dict = {}
-# Cache: db_id -> {prop_name: prop_type} (populated on first upsert per DB)
-_DB_PROP_CACHE: dict = {}
 
 def load_config():
     with open(CONFIG_PATH, "r") as f:
@@ -140,6 +146,7 @@ def find_or_create_notion_db(target_parent_id=None, known_db_id=None):
             r = requests.get(f"https://api.notion.com/v1/databases/{known_db_id}", headers=headers)
             if r.status_code == 200:
                 data = r.json()
+                notion_schema_cache.remember(data)
                 if target_parent_id:
                     parent = data.get("parent", {})
                     if parent.get("type") == "page_id" and parent.get("page_id") == target_parent_id:
@@ -164,6 +171,7 @@ def find_or_create_notion_db(target_parent_id=None, known_db_id=None):
             r = requests.get(f"https://api.notion.com/v1/databases/{cached_id}", headers=headers)
             if r.status_code == 200:
                 data = r.json()
+                notion_schema_cache.remember(data)
                 # If target parent specified, verify parent matches
                 if target_parent_id:
                     parent = data.get("parent", {})
@@ -289,6 +297,7 @@ def find_or_create_hh_notion_db(target_parent_id, daily_db_id):
         try:
             r = requests.get(f"https://api.notion.com/v1/databases/{cached_id}", headers=headers)
             if r.status_code == 200:
+                notion_schema_cache.remember(r.json())
                 log.info("Using cached HH Notion DB: %s", cached_id)
                 return cached_id
         except Exception as e:
@@ -337,6 +346,11 @@ def find_or_create_hh_notion_db(target_parent_id, daily_db_id):
     return db_id
 
 
+def _query_failed(r, what):
+    """A non-200 query must not read as "no row" -- that would POST a duplicate page."""
+    raise requests.HTTPError(f"Notion query for {what} failed: {r.status_code} {r.text[:200]}", response=r)
+
+
 def query_hh_row(hh_db_id, hh_key):
     headers = get_notion_headers()
     r = requests.post(
@@ -349,13 +363,16 @@ def query_hh_row(hh_db_id, hh_key):
             }
         },
     )
+    if r.status_code != 200:
+        _query_failed(r, hh_key)
     results = r.json().get("results", [])
     return results[0]["id"] if results else None
 
 
-def query_notion_row(db_id, date_str):
-    """Check if a row already exists for a given date."""
+def query_notion_row(db_id, date_str, limiter=None):
+    """Page id of the row for date_str, or None; raises requests.HTTPError if the query fails."""
     headers = get_notion_headers()
+    _wait(limiter)
     r = requests.post(
         f"https://api.notion.com/v1/databases/{db_id}/query",
         headers=headers,
@@ -366,6 +383,8 @@ def query_notion_row(db_id, date_str):
             }
         },
     )
+    if r.status_code != 200:
+        _query_failed(r, date_str)
     results = r.json().get("results", [])
     return results[0]["id"] if results else None
 
@@ -374,12 +393,7 @@ def verify_and_update_db_schema(db_id):
     """Ensure the Notion database has all required properties."""
     headers = get_notion_headers()
     try:
-        r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=headers)
-        if r.status_code != 200:
-            log.error("Failed to fetch DB schema: %s", r.text)
-            return
-
-        current_props = r.json().get("properties", {})
+        current_props = notion_schema_cache.get(db_id, headers)
         required_props = {
             "Irradiance (kWh/m\u00b2)": {"number": {"format": "number"}},
             "PR (%)": {"number": {"format": "number"}},
@@ -403,24 +417,20 @@ def verify_and_update_db_schema(db_id):
                 json=payload
             )
             if r.status_code == 200:
+                notion_schema_cache.remember(r.json())
                 log.info("Successfully updated DB schema.")
             else:
                 log.error("Failed to update DB schema: %s %s", r.status_code, r.text)
+    except requests.HTTPError as e:
+        log.error("Failed to fetch DB schema: %s", e)
     except Exception as e:
         log.error("Error verifying DB schema: %s", e)
 
 
-    return None
-
-
 def verify_and_update_hh_db_schema(hh_db_id, daily_db_id):
     headers = get_notion_headers()
     try:
-        r = requests.get(f"https://api.notion.com/v1/databases/{hh_db_id}", headers=headers)
-        if r.status_code != 200:
-            log.error("Failed to fetch HH DB schema: %s", r.text)
-            return
-        current_props = r.json().get("properties", {})
+        current_props = notion_schema_cache.get(hh_db_id, headers)
         required_props = {
             "Date": {"rich_text": {}},
             "Settlement Period": {"number": {"format": "number"}},
@@ -439,16 +449,18 @@ def verify_and_update_hh_db_schema(hh_db_id, daily_db_id):
                 json={"properties": missing},
             )
             if r.status_code == 200:
+                notion_schema_cache.remember(r.json())
                 log.info("Successfully updated HH DB schema.")
             else:
                 log.error("Failed updating HH DB schema: %s %s", r.status_code, r.text)
+    except requests.HTTPError as e:
+        log.error("Failed to fetch HH DB schema: %s", e)
     except Exception as e:
         log.error("Error verifying HH DB schema: %s", e)
 
 
-def upsert_hh_notion_row(hh_db_id, hh_key, date_str, settlement_period, interval_end, consumption_kwh,
-                         site_name, daily_page_id=None, ssp_gbp_mwh=None):
-    headers = get_notion_headers()
+def _hh_props(hh_key, date_str, settlement_period, interval_end, consumption_kwh,
+              site_name, daily_page_id=None, ssp_gbp_mwh=None):
     props = {
         "HH Key": {"title": [{"text": {"content": hh_key}}]},
         "Date": {"rich_text": [{"text": {"content": date_str}}]},
@@ -461,6 +473,14 @@ def upsert_hh_notion_row(hh_db_id, hh_key, date_str, settlement_period, interval
         props["SSP (£/MWh)"] = {"number": round(ssp_gbp_mwh, 4)}
     if daily_page_id:
         props["Daily Record"] = {"relation": [{"id": daily_page_id}]}
+    return props
+
+
+def upsert_hh_notion_row(hh_db_id, hh_key, date_str, settlement_period, interval_end, consumption_kwh,
+                         site_name, daily_page_id=None, ssp_gbp_mwh=None):
+    headers = get_notion_headers()
+    props = _hh_props(hh_key, date_str, settlement_period, interval_end, consumption_kwh,
+                      site_name, daily_page_id, ssp_gbp_mwh)
 
     try:
         page_id = query_hh_row(hh_db_id, hh_key)
@@ -482,15 +502,179 @@ def upsert_hh_notion_row(hh_db_id, hh_key, date_str, settlement_period, interval
         return False
 
 
-def append_hourly_table(page_id, hourly_yield, hourly_ssp=None):
+# ---------------------------------------------------------------------------
+# Bulk HH sync: one indexed scan, skip unchanged rows, rate-limited writers
+# ---------------------------------------------------------------------------
+
+HH_WRITE_WORKERS = 3
+HH_WRITES_PER_SECOND = 3.0  # Notion's documented average request rate
+HH_WRITE_ATTEMPTS = 4
+HH_INDEX_DATES_PER_QUERY = 50  # dates per "or" filter; Notion caps compound filters at 100
+
+
+def _hh_prop_value(prop):
+    """Comparable value of one HH property, from either a read page or a write payload."""
+    if not prop:
+        return None
+    for kind in ("title", "rich_text"):
+        if kind in prop:
+            return "".join(t.get("plain_text") or t.get("text", {}).get("content", "") for t in prop[kind] or [])
+    if "number" in prop:
+        return prop["number"]
+    if "relation" in prop:
+        return sorted(r.get("id", "").replace("-", "") for r in prop["relation"] or [])
+    return None
+
+
+def hh_row_unchanged(current_props, props):
+    """True if every property we would write already holds the same value."""
+    return all(_hh_prop_value(current_props.get(name)) == _hh_prop_value(spec) for name, spec in props.items())
+
+
+def load_hh_index(hh_db_id, start_date, end_date, limiter=None):
     """
-    Append a table block to the Notion page with the hourly yield data.
+    {HH Key: page} for every HH row dated start_date..end_date, where page is
+    {"id": ..., "properties": ...}. One paginated query per
+    HH_INDEX_DATES_PER_QUERY days instead of one lookup per settlement period.
     """
-    if not hourly_yield:
-        return
+    headers = get_notion_headers()
+    days = []
+    day = start_date
+    while day <= end_date:
+        days.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+
+    index = {}
+    pages = 0
+    for i in range(0, len(days), HH_INDEX_DATES_PER_QUERY):
+        chunk = days[i:i + HH_INDEX_DATES_PER_QUERY]
+        date_filter = {"or": [{"property": "Date", "rich_text": {"equals": d}} for d in chunk]}
+        cursor = None
+        while True:
+            payload = {"filter": date_filter, "page_size": 100}
+            if cursor:
+                payload["start_cursor"] = cursor
+            _wait(limiter)
+            r = requests.post(f"https://api.notion.com/v1/databases/{hh_db_id}/query",
+                              headers=headers, json=payload)
+            if r.status_code == 429:
+                time.sleep(max(1.0, float(r.headers.get("Retry-After", "1"))))
+                continue
+            r.raise_for_status()
+            data = r.json()
+            pages += 1
+            for row in data.get("results", []):
+                props = row.get("properties", {})
+                hh_key = _hh_prop_value(props.get("HH Key"))
+                if hh_key:
+                    index[hh_key] = {"id": row["id"], "properties": props}
+            if not data.get("has_more"):
+                break
+            cursor = data.get("next_cursor")
+    log.info("  Loaded %d existing HH row(s) for %s..%s across %d page(s)", len(index), start_date, end_date, pages)
+    return index
+
+
+class _RateLimiter:
+    """Spaces calls from any number of threads at least 1/rate seconds apart."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            self._sleep(slot - now)
+
 
+def _wait(limiter):
+    """Take a slot from the caller's _RateLimiter, if it passed one."""
+    if limiter:
+        limiter.wait()
+
+
+def _write_hh_page(hh_db_id, hh_key, props, page_id, limiter):
+    """POST or PATCH one HH row, retrying on 429. Returns the page id or None."""
     headers = get_notion_headers()
-    
+    for attempt in range(HH_WRITE_ATTEMPTS):
+        limiter.wait()
+        try:
+            if page_id:
+                r = requests.patch(f"https://api.notion.com/v1/pages/{page_id}",
+                                   headers=headers, json={"properties": props})
+            else:
+                r = requests.post("https://api.notion.com/v1/pages", headers=headers,
+                                  json={"parent": {"database_id": hh_db_id}, "properties": props})
+        except requests.RequestException as e:
+            log.warning("  Failed upserting HH row %s: %s", hh_key, e)
+            time.sleep(1)
+            continue
+        if r.status_code in (200, 201):
+            return r.json().get("id", page_id)
+        if r.status_code == 429:
+            time.sleep(max(1.0, float(r.headers.get("Retry-After", "1"))))
+            continue
+        log.warning("  Notion error %d upserting HH row %s: %s", r.status_code, hh_key, r.text[:200])
+        return None
+    return None
+
+
+def write_hh_rows(hh_db_id, rows, index, limiter=None):
+    """
+    Bring the HH database in line with rows ({HH Key: props}) given index
+    from load_hh_index(). Unchanged rows are skipped; the rest are written by
+    HH_WRITE_WORKERS threads sharing one HH_WRITES_PER_SECOND limit (or the
+    caller's limiter, so concurrent days stay under one budget). index is
+    updated in place so a later day in the same run sees the new pages.
+    Returns (written, unchanged, failed).
+    """
+    pending = {}
+    unchanged = 0
+    for hh_key, props in rows.items():
+        existing = index.get(hh_key)
+        if existing and hh_row_unchanged(existing["properties"], props):
+            unchanged += 1
+        else:
+            pending[hh_key] = (props, existing["id"] if existing else None)
+
+    written = failed = 0
+    if pending:
+        limiter = limiter or _RateLimiter(HH_WRITES_PER_SECOND)
+        with ThreadPoolExecutor(max_workers=HH_WRITE_WORKERS) as pool:
+            futures = {
+                pool.submit(_write_hh_page, hh_db_id, hh_key, props, page_id, limiter): hh_key
+                for hh_key, (props, page_id) in pending.items()
+            }
+            for future in as_completed(futures):
+                hh_key = futures[future]
+                page_id = future.result()
+                if page_id:
+                    written += 1
+                    index[hh_key] = {"id": page_id, "properties": pending[hh_key][0]}
+                else:
+                    failed += 1
+    return written, unchanged, failed
+
+
+HOURLY_TABLE_TITLE = "Hourly Yield Breakdown"
+
+
+def hourly_table_block(hourly_yield, hourly_ssp=None):
+    """
+    The "Hourly Yield Breakdown" toggle holding the hourly yield/SSP table,
+    or None without hourly data. Sent as page children on create and by
+    replace_hourly_table() on update.
+    """
+    if not hourly_yield:
+        return None
+
     # Create table rows: Header + Data
     table_rows = []
     
@@ -523,84 +707,122 @@ def append_hourly_table(page_id, hourly_yield, hourly_ssp=None):
             }
         })
 
-    # Construct the table block wrapped in a toggle
-    block_data = {
-        "children": [
-            {
-                "object": "block",
-                "type": "toggle", # Update: Append toggle block
-                "toggle": {
-                    "rich_text": [{"type": "text", "text": {"content": "Hourly Yield Breakdown"}}],
-                    "children": [
-                        {
-                            "object": "block",
-                            "type": "table",
-                            "table": {
-                                "table_width": 3,
-                                "has_column_header": True,
-                                "has_row_header": False,
-                                "children": table_rows
-                            }
-                        }
-                    ]
+    # The table block wrapped in a toggle
+    return {
+        "object": "block",
+        "type": "toggle",
+        "toggle": {
+            "rich_text": [{"type": "text", "text": {"content": HOURLY_TABLE_TITLE}}],
+            "children": [
+                {
+                    "object": "block",
+                    "type": "table",
+                    "table": {
+                        "table_width": 3,
+                        "has_column_header": True,
+                        "has_row_header": False,
+                        "children": table_rows
+                    }
                 }
-            }
-        ]
+            ]
+        }
     }
 
+
+def _block_request(method, url, limiter=None, **kwargs):
+    """One blocks-API request, retried on 429 like _write_hh_page(); returns the last response."""
+    headers = get_notion_headers()
+    for attempt in range(HH_WRITE_ATTEMPTS):
+        _wait(limiter)
+        r = requests.request(method, url, headers=headers, **kwargs)
+        if r.status_code != 429 or attempt == HH_WRITE_ATTEMPTS - 1:
+            return r
+        time.sleep(max(1.0, float(r.headers.get("Retry-After", "1"))))
+
+
+def _hourly_table_block_ids(page_id, limiter=None):
+    """IDs of every "Hourly Yield Breakdown" toggle on the page (older runs appended one each)."""
+    ids = []
+    cursor = None
+    while True:
+        params = {"page_size": 100}
+        if cursor:
+            params["start_cursor"] = cursor
+        r = _block_request("GET", f"https://api.notion.com/v1/blocks/{page_id}/children", limiter, params=params)
+        r.raise_for_status()
+        data = r.json()
+        for block in data.get("results", []):
+            if block.get("type") != "toggle":
+                continue
+            title = "".join(t.get("plain_text", "") for t in block["toggle"].get("rich_text", []))
+            if title == HOURLY_TABLE_TITLE:
+                ids.append(block["id"])
+        if not data.get("has_more"):
+            break
+        cursor = data.get("next_cursor")
+    return ids
+
+
+def replace_hourly_table(page_id, block, limiter=None):
+    """
+    Swap the page's hourly table for block: the new toggle is appended first
+    and only then are the old ones (including duplicates left by earlier
+    append-only runs) deleted, so a failure never leaves the page without one.
+    Rate-limited requests are retried; deletes that still fail are logged.
+    """
+    if not block:
+        return
     try:
-        url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-        r = requests.patch(url, headers=headers, json=block_data)
-        if r.status_code == 200:
-            log.info("  Appended hourly table to page %s", page_id)
-        else:
-            log.warning("  Failed to append table: %s", r.text)
+        old_ids = _hourly_table_block_ids(page_id, limiter)
+        r = _block_request("PATCH", f"https://api.notion.com/v1/blocks/{page_id}/children", limiter,
+                           json={"children": [block]})
+        if r.status_code != 200:
+            log.warning("  Failed to write hourly table: %s %s", r.status_code, r.text[:200])
+            return
+        failed = []
+        for block_id in old_ids:
+            r = _block_request("DELETE", f"https://api.notion.com/v1/blocks/{block_id}", limiter)
+            if r.status_code != 200:
+                failed.append(block_id)
+                log.warning("  Failed to delete old hourly table %s: %s %s", block_id, r.status_code, r.text[:200])
+        log.info("  Replaced hourly table on page %s (%d old block(s) removed, %d left)",
+                 page_id, len(old_ids) - len(failed), len(failed))
     except Exception as e:
-        log.warning("  Exception appending table: %s", e)
+        log.warning("  Exception replacing hourly table: %s", e)
 
 
 def _get_db_prop_types(db_id):
-    """Return {prop_name: prop_type} for the given DB, using a module-level cache."""
-    if db_id not in _DB_PROP_CACHE:
-        headers = get_notion_headers()
-        try:
-            r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=headers)
-            if r.status_code == 200:
-                _DB_PROP_CACHE[db_id] = {
-                    name: prop.get("type", "unknown")
-                    for name, prop in r.json().get("properties", {}).items()
-                }
-                log.info("  Cached DB schema for %s: %d properties", db_id, len(_DB_PROP_CACHE[db_id]))
-            else:
-                log.warning("  Could not fetch DB schema for %s: %s", db_id, r.status_code)
-                _DB_PROP_CACHE[db_id] = None  # unknown — allow all writes
-        except Exception as e:
-            log.warning("  Error fetching DB schema for %s: %s", db_id, e)
-            _DB_PROP_CACHE[db_id] = None
-    return _DB_PROP_CACHE.get(db_id)
+    """DatabaseSchema for the given DB from notion_schema_cache, or None if it can't be fetched."""
+    try:
+        return notion_schema_cache.get(db_id, get_notion_headers())
+    except Exception as e:
+        log.warning("  Could not fetch DB schema for %s: %s", db_id, e)
+        return None  # unknown — allow all writes
 
 
 def upsert_notion_row(db_id, date_str, pv_kwh, inv_kwh, station_name,
                       alarms=None, irradiance_kwh_m2=None, capacity_kwp=None,
-                      hourly_yield_json=None, hourly_ssp_json=None, daily_revenue_gbp=None):
+                      hourly_yield_json=None, hourly_ssp_json=None, daily_revenue_gbp=None,
+                      hourly_table=None, limiter=None):
     """Insert or update a row in the Notion database.
 
     Dynamically adapts to the target DB schema: only writes properties that
     exist in the DB and are not formula columns.  Hourly yield / SSP values
     are expanded into individual column entries (e.g. '07:00', 'SSP 07:00 (£/MWh)')
     when those columns are present in the DB.
+
+    hourly_table (from hourly_table_block()) is created with a new page in
+    the same request; an existing page has its table replaced in place.
+    Every Notion request takes a slot from limiter when one is given.
     """
     headers = get_notion_headers()
 
     # --- Schema introspection ---
-    db_prop_types = _get_db_prop_types(db_id)  # {name: type} or None
+    writable = notion_schema_cache.writable_columns(_get_db_prop_types(db_id))  # None if unknown
 
     def can_write(name):
-        """True if the property exists in this DB and is not a formula."""
-        if db_prop_types is None:
-            return True  # unknown schema — optimistically try all
-        typ = db_prop_types.get(name)
-        return typ is not None and typ != "formula"
+        """True if the property exists in this DB and is not computed (formula, rollup, ...)."""
+        return writable is None or name in writable
 
     pv_mwh = round(pv_kwh / 1000.0, 3) if pv_kwh else 0
     inv_mwh = round(inv_kwh / 1000.0, 3) if inv_kwh else 0
@@ -667,7 +889,8 @@ def upsert_notion_row(db_id, date_str, pv_kwh, inv_kwh, station_name,
     # --- Upsert with retry ---
     for attempt in range(3):
         try:
-            page_id = query_notion_row(db_id, date_str)
+            page_id = query_notion_row(db_id, date_str, limiter)
+            _wait(limiter)
             if page_id:
                 r = requests.patch(
                     f"https://api.notion.com/v1/pages/{page_id}",
@@ -675,13 +898,18 @@ def upsert_notion_row(db_id, date_str, pv_kwh, inv_kwh, station_name,
                     json={"properties": props},
                 )
             else:
+                payload = {"parent": {"database_id": db_id}, "properties": props}
+                if hourly_table:
+                    payload["children"] = [hourly_table]
                 r = requests.post(
                     "https://api.notion.com/v1/pages",
                     headers=headers,
-                    json={"parent": {"database_id": db_id}, "properties": props},
+                    json=payload,
                 )
 
             if r.status_code in (200, 201):
+                if page_id and hourly_table:
+                    replace_hourly_table(page_id, hourly_table, limiter)
                 res_json = r.json()
                 page_id = res_json["id"]
                 page_url = f"https://notion.so/{page_id.replace('-', '')}"
@@ -700,20 +928,21 @@ def upsert_notion_row(db_id, date_str, pv_kwh, inv_kwh, station_name,
                 time.sleep(wait)
             else:
                 log.error("  Notion error %d: %s", r.status_code, r.text[:200])
+                if r.status_code == 400:
+                    notion_schema_cache.invalidate(db_id)  # columns may have changed since cached
                 return False
         except Exception as e:
             log.error("  Exception syncing %s: %s", date_str, e)
-            time.sleep(1)
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code == 429:
+                time.sleep(max(1.0, float(response.headers.get("Retry-After", "1"))))
+            else:
+                time.sleep(1)
     return False
 
 
 def _load_elexon_fetch_module():
-    if not ELEXON_FETCH_SCRIPT.exists():
-        return None
-    spec = importlib.util.spec_from_file_location("elexon_fetch", str(ELEXON_FETCH_SCRIPT))
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+    return script_modules.load("fetch_elexon_data", ELEXON_FETCH_SCRIPT)
 
 
 def ensure_daily_ssp_csv(target_date):
@@ -806,12 +1035,25 @@ def load_settlement_period_ssp(target_date):
 
 
 def _load_stark_module():
-    if not STARK_SCRAPER_SCRIPT.exists():
-        return None
-    spec = importlib.util.spec_from_file_location("stark_scraper_module", str(STARK_SCRAPER_SCRIPT))
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+    return script_modules.load("stark_scraper", STARK_SCRAPER_SCRIPT)
+
+
+def _stark_settings(cfg):
+    """(username, password, site_name, search_text) from config.json "stark" or STARK_* env vars."""
+    stark_cfg = cfg.get("stark", {}) if isinstance(cfg.get("stark"), dict) else {}
+    username = stark_cfg.get("username") or os.environ.get("STARK_USERNAME")
+    password = stark_cfg.get("password") or os.environ.get("STARK_PASSWORD")
+    site_name = stark_cfg.get("site_name") or os.environ.get("STARK_SITE_NAME") or "Point Lane"
+    search_text = (
+        stark_cfg.get("search_text")
+        or os.environ.get("STARK_SEARCH_TEXT")
+        or os.environ.get("STARK_EXPORT_MPAN")
+        or "2100042103940"
+    )
+    return username, password, site_name, search_text
+
+
+_STARK_SCRAPE_LOCK = threading.Lock()
 
 
 def ensure_stark_hh_csv(cfg, target_date, allow_scrape=True):
@@ -832,17 +1074,15 @@ def ensure_stark_hh_csv(cfg, target_date, allow_scrape=True):
     if not STARK_SCRAPER_SCRIPT.exists():
         log.warning("Stark scraper script unavailable; HH data for %s skipped", date_str)
         return None
+    with _STARK_SCRAPE_LOCK:  # backfill writers share one Stark login
+        return _scrape_stark_hh_csv(cfg, date_str, csv_path)
 
-    stark_cfg = cfg.get("stark", {}) if isinstance(cfg.get("stark"), dict) else {}
-    username = stark_cfg.get("username") or os.environ.get("STARK_USERNAME")
-    password = stark_cfg.get("password") or os.environ.get("STARK_PASSWORD")
-    site_name = stark_cfg.get("site_name") or os.environ.get("STARK_SITE_NAME") or "Point Lane"
-    search_text = (
-        stark_cfg.get("search_text")
-        or os.environ.get("STARK_SEARCH_TEXT")
-        or os.environ.get("STARK_EXPORT_MPAN")
-        or "2100042103940"
-    )
+
+def _scrape_stark_hh_csv(cfg, date_str, csv_path):
+    if csv_path.exists():  # another writer fetched it while we waited
+        return csv_path
+
+    username, password, site_name, search_text = _stark_settings(cfg)
 
     cmd = [sys.executable, str(STARK_SCRAPER_SCRIPT), "--date", date_str, "--output-dir", str(STARK_DATA_DIR)]
     if username:
@@ -867,6 +1107,42 @@ def ensure_stark_hh_csv(cfg, target_date, allow_scrape=True):
     return None
 
 
+def prefetch_stark_hh_csvs(cfg, dates):
+    """
+    Download every date in dates that has no Stark HH CSV yet with one
+    in-process stark_scraper.run_batch() session (one browser launch, one
+    login and meter selection) instead of a scraper subprocess per date.
+    Returns the dates still missing afterwards.
+    """
+    missing = [d for d in dates if ensure_stark_hh_csv(cfg, d, allow_scrape=False) is None]
+    if not missing:
+        return []
+    scraper = _load_stark_module()
+    if not scraper or not hasattr(scraper, "run_batch"):
+        log.warning("Stark scraper unavailable; HH data for %d date(s) skipped", len(missing))
+        return missing
+
+    username, password, site_name, search_text = _stark_settings(cfg)
+    log.info("Scraping Stark HH data for %d date(s) in one session...", len(missing))
+    with _STARK_SCRAPE_LOCK:
+        try:
+            scraper.run_batch(
+                dates=[d.strftime("%Y-%m-%d") for d in missing],
+                username=username,
+                password=password,
+                site_name=site_name,
+                search_text=search_text,
+                output_dir=str(STARK_DATA_DIR),
+                headless=None,
+                browser_opts=browser_options(cfg),
+            )
+        except Exception as e:
+            log.warning("Stark batch scrape failed: %s", e)
+    still_missing = [d for d in missing if ensure_stark_hh_csv(cfg, d, allow_scrape=False) is None]
+    log.info("  Stark HH: %d fetched, %d still missing", len(missing) - len(still_missing), len(still_missing))
+    return still_missing
+
+
 def parse_stark_hh_csv(csv_path):
     """
     Parse Stark CSV rows into 48 settlement periods.
@@ -912,9 +1188,13 @@ def parse_stark_hh_csv(csv_path):
     return rows
 
 
-def sync_stark_hh_day(cfg, hh_db_id, daily_page_id, target_date, allow_scrape=True):
+def sync_stark_hh_day(cfg, hh_db_id, daily_page_id, target_date, allow_scrape=True, hh_index=None,
+                      limiter=None):
     """
     Sync Stark half-hour data for one day into the linked HH database.
+    hh_index is a preloaded load_hh_index() covering target_date (a backfill
+    loads one for its whole range); without it the day's rows are loaded in
+    a single query.
     """
     if not hh_db_id:
         return 0
@@ -931,11 +1211,10 @@ def sync_stark_hh_day(cfg, hh_db_id, daily_page_id, target_date, allow_scrape=Tr
     date_str = target_date.strftime("%Y-%m-%d")
     site_name = (cfg.get("stark", {}) or {}).get("site_name") or cfg.get("station_name", "Point Lane")
     ssp_by_sp = load_settlement_period_ssp(target_date)
-    upserts = 0
+    rows = {}
     for row in entries:
         hh_key = f"{date_str}-SP{row['settlement_period']:02d}"
-        ok = upsert_hh_notion_row(
-            hh_db_id=hh_db_id,
+        rows[hh_key] = _hh_props(
             hh_key=hh_key,
             date_str=date_str,
             settlement_period=row["settlement_period"],
@@ -945,10 +1224,16 @@ def sync_stark_hh_day(cfg, hh_db_id, daily_page_id, target_date, allow_scrape=Tr
             daily_page_id=daily_page_id,
             ssp_gbp_mwh=ssp_by_sp.get(row["settlement_period"]),
         )
-        if ok:
-            upserts += 1
-    log.info("  Synced Stark HH rows for %s: %d", date_str, upserts)
-    return upserts
+    if hh_index is None:
+        try:
+            hh_index = load_hh_index(hh_db_id, target_date, target_date, limiter=limiter)
+        except requests.RequestException as e:
+            log.warning("  Could not load HH index for %s: %s", date_str, e)
+            return 0
+    written, unchanged, failed = write_hh_rows(hh_db_id, rows, hh_index, limiter)
+    log.info("  Synced Stark HH rows for %s: %d written, %d unchanged, %d failed",
+             date_str, written, unchanged, failed)
+    return written + unchanged
 
 
 def calculate_daily_revenue_gbp(hourly_yield, hourly_ssp):
@@ -1163,11 +1448,7 @@ def scrape_historical_data(cfg, start_date, end_date):
     all_data = []
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(cfg))
         page = context.new_page()
 
         try:
@@ -1209,134 +1490,89 @@ def scrape_historical_data(cfg, start_date, end_date):
         except Exception as e:
             log.exception("Error scraping historical data: %s", e)
         finally:
+            if blocker:
+                log.info(blocker.summary())
             browser.close()
 
     log.info("Total scraped: %d daily records", len(all_data))
     return all_data
 
 
-def sync_today_from_report(cfg, db_id, hh_db_id=None):
+MONTHLY_REPORT_ENDPOINT = "monthly-report"
+
+
+def monthly_report_rows(page, cfg, year, month, is_first_month=True):
     """
-    Sync today's data using the Report page for the richest data:
-    separate PV yield, inverter yield, and irradiance.
-    Falls back to overview-based sync if the report page fails.
+    Daily rows of the monthly report, served from the payload cache when
+    possible; the Report page is only opened on a miss.
     """
-    from playwright.sync_api import sync_playwright
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+
+    def scrape():
+        navigate_to_page(page, cfg, "report")
+        time.sleep(2)
+        return scrape_monthly_report(page, year, month, is_first_month=is_first_month)
+
+    return payload_cache.cached(
+        cfg.get("station_code"), MONTHLY_REPORT_ENDPOINT, f"{year}-{month:02d}", last_day, scrape)
 
+
+def sync_today_on_page(page, cfg, db_id, hh_db_id=None, overview_data=None):
+    """
+    Sync today's row using an already logged-in portal page.
+    overview_data is the dict from extract_overview_data() when the caller
+    has already scraped the overview, so it is not visited a second time.
+    """
     today = date.today()
     today_str = today.isoformat()
     station_name = cfg.get("station_name", "Point Lane Solar Farm")
     capacity_kwp = cfg.get("installed_capacity_kwp")
 
-    log.info("Syncing today's generation to Notion (via Report page)...")
+    # --- Fetch Hourly Data (API) ---
+    log.info("  Fetching hourly data via API...")
+    power_data = fetch_daily_energy_balance_api(page, cfg, today)
+    hourly_yield = calculate_hourly_yield_from_power(power_data, target_date=today)
+    hourly_yield_json = json.dumps(hourly_yield, sort_keys=True) if hourly_yield else None
+    hourly_ssp = load_hourly_ssp(today)
+    hourly_ssp_json = json.dumps(hourly_ssp, sort_keys=True) if hourly_ssp else None
+    daily_revenue_gbp = calculate_daily_revenue_gbp(hourly_yield, hourly_ssp)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
-        page = context.new_page()
+    # --- Primary: Report page (richer data) ---
+    try:
+        month_data = monthly_report_rows(page, cfg, today.year, today.month)
+        today_row = None
+        for row in month_data:
+            if row.get("date") == today_str:
+                today_row = row
+                break
 
-        try:
-            # Note: Global imports are used now
+        if today_row:
+            pv_kwh = today_row.get("pv_kwh", 0)
+            inv_kwh = today_row.get("inv_kwh", 0)
+            irradiance_kwh_m2 = today_row.get("irradiance_kwh_m2")
+            if irradiance_kwh_m2 == 0:
+                irradiance_kwh_m2 = None
 
-            if not login(page, cfg):
-                log.error("Login failed -- cannot sync today")
-                return False
+            log.info("  Report page data -- PV: %.1f kWh, Inv: %.1f kWh, Irr: %s",
+                     pv_kwh, inv_kwh,
+                     f"{irradiance_kwh_m2:.3f} kWh/m²" if irradiance_kwh_m2 else "N/A")
 
-            # --- Fetch Hourly Data (API) ---
-            log.info("  Fetching hourly data via API...")
-            power_data = fetch_daily_energy_balance_api(page, cfg, today)
-            hourly_yield = calculate_hourly_yield_from_power(power_data)
-            hourly_yield_json = json.dumps(hourly_yield, sort_keys=True) if hourly_yield else None
-            hourly_ssp = load_hourly_ssp(today)
-            hourly_ssp_json = json.dumps(hourly_ssp, sort_keys=True) if hourly_ssp else None
-            daily_revenue_gbp = calculate_daily_revenue_gbp(hourly_yield, hourly_ssp)
-            
-            # --- Primary: Report page (richer data) ---
+            # Alarms come from the overview page (already scraped when
+            # called from fusionsolar_monitor --report --sync)
+            alarms = {}
             try:
-                navigate_to_page(page, cfg, "report")
-                time.sleep(3)
-
-                month_data = scrape_monthly_report(page, today.year, today.month, is_first_month=True)
-                today_row = None
-                for row in month_data:
-                    if row.get("date") == today_str:
-                        today_row = row
-                        break
-
-                if today_row:
-                    pv_kwh = today_row.get("pv_kwh", 0)
-                    inv_kwh = today_row.get("inv_kwh", 0)
-                    irradiance_kwh_m2 = today_row.get("irradiance_kwh_m2")
-                    if irradiance_kwh_m2 == 0:
-                        irradiance_kwh_m2 = None
-
-                    log.info("  Report page data -- PV: %.1f kWh, Inv: %.1f kWh, Irr: %s",
-                             pv_kwh, inv_kwh,
-                             f"{irradiance_kwh_m2:.3f} kWh/m²" if irradiance_kwh_m2 else "N/A")
-
-                    # Also get alarms from overview page
-                    alarms = {}
-                    try:
-                        navigate_to_page(page, cfg, "overview")
-                        overview_data = extract_overview_data(page)
-                        alarms = overview_data.get("alarms", {})
-                    except Exception as e:
-                        log.warning("  Could not fetch alarms from overview: %s", e)
-
-                    page_id = upsert_notion_row(
-                        db_id,
-                        today_str,
-                        pv_kwh=pv_kwh,
-                        inv_kwh=inv_kwh,
-                        station_name=station_name,
-                        alarms=alarms,
-                        irradiance_kwh_m2=irradiance_kwh_m2,
-                        capacity_kwp=capacity_kwp if capacity_kwp else None,
-                        hourly_yield_json=hourly_yield_json,
-                        hourly_ssp_json=hourly_ssp_json,
-                        daily_revenue_gbp=daily_revenue_gbp,
-                    )
-                    
-                    if page_id and hourly_yield:
-                        append_hourly_table(page_id, hourly_yield, hourly_ssp)
-                    if page_id:
-                        sync_stark_hh_day(cfg, hh_db_id, page_id, today, allow_scrape=True)
-                        
-                    return True
-                else:
-                    log.warning("  Today's date (%s) not found in report data -- falling back to overview",
-                                today_str)
+                if overview_data is None:
+                    navigate_to_page(page, cfg, "overview")
+                    overview_data = extract_overview_data(page)
+                alarms = overview_data.get("alarms", {})
             except Exception as e:
-                log.warning("  Report page scrape failed: %s -- falling back to overview", e)
-
-            # --- Fallback: Overview page + Plants list irradiance ---
-            log.info("  Using overview page fallback...")
-            navigate_to_page(page, cfg, "overview")
-            data = extract_overview_data(page)
-
-            yield_val = data.get("yield_today_value", "0")
-            yield_unit = data.get("yield_today_unit", "kWh")
-            alarms = data.get("alarms", {})
-
-            try:
-                kwh = float(yield_val.replace(",", ""))
-                if yield_unit.lower() == "mwh":
-                    kwh *= 1000
-                elif yield_unit.lower() == "gwh":
-                    kwh *= 1000000
-            except (ValueError, AttributeError):
-                kwh = 0
-
-            irradiance_kwh_m2 = extract_station_irradiance(page, cfg)
+                log.warning("  Could not fetch alarms from overview: %s", e)
 
             page_id = upsert_notion_row(
                 db_id,
                 today_str,
-                pv_kwh=kwh,
-                inv_kwh=kwh,
+                pv_kwh=pv_kwh,
+                inv_kwh=inv_kwh,
                 station_name=station_name,
                 alarms=alarms,
                 irradiance_kwh_m2=irradiance_kwh_m2,
@@ -1344,149 +1580,431 @@ def sync_today_from_report(cfg, db_id, hh_db_id=None):
                 hourly_yield_json=hourly_yield_json,
                 hourly_ssp_json=hourly_ssp_json,
                 daily_revenue_gbp=daily_revenue_gbp,
+                hourly_table=hourly_table_block(hourly_yield, hourly_ssp),
             )
-            
-            if page_id and hourly_yield:
-                append_hourly_table(page_id, hourly_yield, hourly_ssp)
+
             if page_id:
                 sync_stark_hh_day(cfg, hh_db_id, page_id, today, allow_scrape=True)
-            
+
             return True
+        else:
+            log.warning("  Today's date (%s) not found in report data -- falling back to overview",
+                        today_str)
+    except Exception as e:
+        log.warning("  Report page scrape failed: %s -- falling back to overview", e)
 
-        except Exception as e:
-            log.exception("Error syncing today: %s", e)
-            return False
-        finally:
-            browser.close()
+    # --- Fallback: Overview page + Plants list irradiance ---
+    log.info("  Using overview page fallback...")
+    data = overview_data
+    if data is None:
+        navigate_to_page(page, cfg, "overview")
+        data = extract_overview_data(page)
 
+    alarms = data.get("alarms", {})
+    kwh = _overview_yield_kwh(data)
 
-def backfill_range(cfg, db_id, hh_db_id, start_date, end_date):
+    try:
+        irradiance_kwh_m2 = float(data["irradiance_value"])
+    except (KeyError, TypeError, ValueError):
+        irradiance_kwh_m2 = extract_station_irradiance(page, cfg)
+
+    page_id = upsert_notion_row(
+        db_id,
+        today_str,
+        pv_kwh=kwh,
+        inv_kwh=kwh,
+        station_name=station_name,
+        alarms=alarms,
+        irradiance_kwh_m2=irradiance_kwh_m2,
+        capacity_kwp=capacity_kwp if capacity_kwp else None,
+        hourly_yield_json=hourly_yield_json,
+        hourly_ssp_json=hourly_ssp_json,
+        daily_revenue_gbp=daily_revenue_gbp,
+        hourly_table=hourly_table_block(hourly_yield, hourly_ssp),
+    )
+
+    if page_id:
+        sync_stark_hh_day(cfg, hh_db_id, page_id, today, allow_scrape=True)
+
+    return True
+
+
+def _overview_yield_kwh(data):
+    """Yield today from overview data (value + unit) in kWh; 0 if unreadable."""
+    yield_val = data.get("yield_today_value", "0")
+    yield_unit = data.get("yield_today_unit", "kWh")
+    try:
+        kwh = float(yield_val.replace(",", ""))
+        if yield_unit.lower() == "mwh":
+            kwh *= 1000
+        elif yield_unit.lower() == "gwh":
+            kwh *= 1000000
+    except (ValueError, AttributeError):
+        kwh = 0
+    return kwh
+
+
+def sync_today_from_northbound(cfg, db_id, hh_db_id=None, overview_data=None):
     """
-    Backfill data for a range of dates, including hourly yield.
-    Optimized to scrape monthly report once per month.
+    Sync today's row from the Northbound API, without a browser: the daily
+    figures come from month_report(), the hourly yield from
+    daily_power_curve(). Until today's report row exists the overview KPIs
+    (overview_data, as fetched for --report) are used instead. Northbound
+    errors propagate so the caller can fall back to the portal.
+    """
+    client = northbound_client.client_from_config(cfg)
+    station_code = cfg["station_code"]
+    today = date.today()
+    today_str = today.isoformat()
+    capacity_kwp = cfg.get("installed_capacity_kwp")
+
+    log.info("Syncing today's generation to Notion (Northbound API)...")
+    power_data = client.daily_power_curve(station_code, today)
+    hourly_yield = calculate_hourly_yield_from_power(power_data, target_date=today)
+    hourly_ssp = load_hourly_ssp(today)
+
+    overview_data = overview_data or {}
+    today_row = next((r for r in client.month_report(station_code, today.year, today.month)
+                      if r.get("date") == today_str), None)
+    if today_row:
+        pv_kwh = today_row.get("pv_kwh", 0)
+        inv_kwh = today_row.get("inv_kwh", 0)
+        irradiance_kwh_m2 = today_row.get("irradiance_kwh_m2") or None
+    else:
+        log.warning("  Today's date (%s) not in the Northbound month report -- using station KPIs", today_str)
+        pv_kwh = inv_kwh = _overview_yield_kwh(overview_data) if overview_data else 0
+        try:
+            irradiance_kwh_m2 = float(overview_data["irradiance_value"])
+        except (KeyError, TypeError, ValueError):
+            irradiance_kwh_m2 = None
+
+    page_id = upsert_notion_row(
+        db_id,
+        today_str,
+        pv_kwh=pv_kwh,
+        inv_kwh=inv_kwh,
+        station_name=cfg.get("station_name", "Point Lane Solar Farm"),
+        alarms=overview_data.get("alarms", {}),
+        irradiance_kwh_m2=irradiance_kwh_m2,
+        capacity_kwp=capacity_kwp if capacity_kwp else None,
+        hourly_yield_json=json.dumps(hourly_yield, sort_keys=True) if hourly_yield else None,
+        hourly_ssp_json=json.dumps(hourly_ssp, sort_keys=True) if hourly_ssp else None,
+        daily_revenue_gbp=calculate_daily_revenue_gbp(hourly_yield, hourly_ssp),
+        hourly_table=hourly_table_block(hourly_yield, hourly_ssp),
+    )
+
+    if page_id:
+        sync_stark_hh_day(cfg, hh_db_id, page_id, today, allow_scrape=True)
+
+    return True
+
+
+def sync_today_from_report(cfg, db_id, hh_db_id=None):
+    """
+    Sync today's data using the Report page for the richest data:
+    separate PV yield, inverter yield, and irradiance.
+    Falls back to overview-based sync if the report page fails.
     """
     from playwright.sync_api import sync_playwright
 
-    log.info("Starting backfill from %s to %s", start_date, end_date)
-    
+    log.info("Syncing today's generation to Notion (via Report page)...")
+
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+        browser, context, blocker = launch_portal_browser(p, "fusionsolar", **browser_options(cfg))
         page = context.new_page()
 
         try:
             if not login(page, cfg):
-                log.error("Login failed -- aborting backfill")
-                return
-
-            current_date = start_date
-            month_cache = {} # (year, month) -> list of rows
-            
-            station_name = cfg.get("station_name", "Point Lane Solar Farm")
-            capacity_kwp = cfg.get("installed_capacity_kwp", 0)
-
-            while current_date <= end_date:
-                log.info("Processing %s...", current_date)
-                
-                # 1. Get Daily Totals (PV, Inv, Irr) from Report
-                # We cache the monthly report to avoid navigating back and forth
-                ym = (current_date.year, current_date.month)
-                if ym not in month_cache:
-                    log.info("  Scraping monthly report for %s-%s...", ym[0], ym[1])
-                    navigate_to_page(page, cfg, "report")
-                    time.sleep(2)
-                    data = scrape_monthly_report(page, ym[0], ym[1])
-                    month_cache[ym] = data
-                
-                day_str = current_date.strftime("%Y-%m-%d")
-                daily_record = next((r for r in month_cache.get(ym, []) if r["date"] == day_str), None)
-                
-                if daily_record:
-                    pv_kwh = daily_record.get("pv_kwh", 0)
-                    inv_kwh = daily_record.get("inv_kwh", 0)
-                    irradiance_kwh_m2 = daily_record.get("irradiance_kwh_m2")
-                else:
-                    log.warning("  No report data for %s (might be future or missing)", day_str)
-                    pv_kwh = 0
-                    inv_kwh = 0
-                    irradiance_kwh_m2 = None
-
-                # 2. Get Hourly Data via API
-                power_data = fetch_daily_energy_balance_api(page, cfg, current_date)
-                hourly_yield = calculate_hourly_yield_from_power(power_data)
-                hourly_json = json.dumps(hourly_yield, sort_keys=True) if hourly_yield else None
-                hourly_ssp = load_hourly_ssp(current_date)
-                hourly_ssp_json = json.dumps(hourly_ssp, sort_keys=True) if hourly_ssp else None
-                daily_revenue_gbp = calculate_daily_revenue_gbp(hourly_yield, hourly_ssp)
-                
-                # 3. Upsert to Notion
-                page_id = upsert_notion_row(
-                    db_id,
-                    day_str,
-                    pv_kwh=pv_kwh,
-                    inv_kwh=inv_kwh,
-                    station_name=station_name,
-                    alarms={}, # No historical alarms scraping implemented
-                    irradiance_kwh_m2=irradiance_kwh_m2,
-                    capacity_kwp=capacity_kwp if capacity_kwp else None,
-                    hourly_yield_json=hourly_json,
-                    hourly_ssp_json=hourly_ssp_json,
-                    daily_revenue_gbp=daily_revenue_gbp,
-                )
-
-                # 4. Append Hourly Table
-                if page_id and hourly_yield:
-                    append_hourly_table(page_id, hourly_yield, hourly_ssp)
-                if page_id:
-                    sync_stark_hh_day(cfg, hh_db_id, page_id, current_date, allow_scrape=True)
+                log.error("Login failed -- cannot sync today")
+                return False
 
-                current_date += timedelta(days=1)
-                time.sleep(1) # Gentle pace
+            return sync_today_on_page(page, cfg, db_id, hh_db_id=hh_db_id)
 
         except Exception as e:
-            log.exception("Backfill failed: %s", e)
+            log.exception("Error syncing today: %s", e)
+            return False
         finally:
+            if blocker:
+                log.info(blocker.summary())
             browser.close()
 
 
-# ---------------------------------------------------------------------------
-# Main
-# ---------------------------------------------------------------------------
+class _LazyPortalPage:
+    """
+    Stands in for a logged-in portal page. The browser is launched and
+    logged in the first time the page is actually used, so a backfill served
+    entirely from the payload cache never touches the portal.
+    """
 
-def main():
-    global NOTION_TOKEN
+    def __init__(self, cfg):
+        self._cfg = cfg
+        self._playwright = None
+        self._browser = None
+        self._blocker = None
+        self._page = None
 
-    parser = argparse.ArgumentParser(
-        description="FusionSolar -> Notion Daily Generation Sync",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
+    def __getattr__(self, name):
+        return getattr(self._open(), name)
+
+    def _open(self):
+        if self._page is None:
+            from playwright.sync_api import sync_playwright
+
+            log.info("Cache miss -- opening FusionSolar portal session")
+            self._playwright = sync_playwright().start()
+            self._browser, context, self._blocker = launch_portal_browser(
+                self._playwright, "fusionsolar", **browser_options(self._cfg))
+            page = context.new_page()
+            if not login(page, self._cfg):
+                raise RuntimeError("FusionSolar login failed")
+            self._page = page
+        return self._page
+
+    def close(self):
+        if self._blocker:
+            log.info(self._blocker.summary())
+        if self._browser:
+            self._browser.close()
+        if self._playwright:
+            self._playwright.stop()
+
+
+BACKFILL_WRITERS = 3
+BACKFILL_QUEUE_DAYS = 31  # extraction runs at most about a month ahead of the writers
+
+
+def _month_hourly_yield(month_days, curves):
+    """
+    {date: {"HH:00": kWh}} for a month of power curves, aggregated in one
+    pass with energy_aggregation.aggregate_days(). Days without a curve get
+    {}; if the batch cannot be parsed, each day falls back to
+    calculate_hourly_yield_from_power() so one bad curve only loses itself.
+    """
+    series = {d: curves.get(d) for d in month_days if curves.get(d)}
+    try:
+        energy = energy_aggregation.aggregate_days(series)
+    except ValueError as e:
+        log.warning("  Batch hourly aggregation failed (%s); falling back to per-day", e)
+        return {d: calculate_hourly_yield_from_power(curves.get(d), target_date=d) for d in month_days}
+    out = {}
+    for d in month_days:
+        if d not in energy:
+            log.warning("No power points for %s. Cannot calculate hourly yield.", d)
+            out[d] = {}
+            continue
+        if energy[d].missing_samples:
+            log.info("  %s: %d/%d power samples missing (counted as zero)",
+                     d, energy[d].missing_samples, energy[d].five_min_kwh.size)
+        out[d] = energy[d].hourly_dict()
+    return out
+
+
+def _extract_backfill_days(start_date, end_date, month_rows, power_curves, out):
+    """
+    Extraction stage: one shard per month (report rows plus every day's
+    power curve in one batch), turned into per-day records and put on out.
+    Runs in the calling thread -- the portal page belongs to it.
+    """
+    months = []
+    day = start_date
+    while day <= end_date:
+        if not months or months[-1][-1].month != day.month:
+            months.append([])
+        months[-1].append(day)
+        day += timedelta(days=1)
+
+    for n, month_days in enumerate(months, 1):
+        ym = (month_days[0].year, month_days[0].month)
+        log.info("[extract] %d-%02d (%d/%d): report + %d power curve(s)", ym[0], ym[1], n, len(months),
+                 len(month_days))
+        rows = {r["date"]: r for r in month_rows(ym[0], ym[1]) or []}
+        curves = power_curves(month_days)
+        hourly = _month_hourly_yield(month_days, curves)
+        for current_date in month_days:
+            day_str = current_date.strftime("%Y-%m-%d")
+            daily_record = rows.get(day_str)
+            if not daily_record:
+                log.warning("  No report data for %s (might be future or missing)", day_str)
+                daily_record = {"pv_kwh": 0, "inv_kwh": 0, "irradiance_kwh_m2": None}
+            hourly_yield = hourly[current_date]
+            hourly_ssp = load_hourly_ssp(current_date)
+            out.put({
+                "date": current_date,
+                "pv_kwh": daily_record.get("pv_kwh", 0),
+                "inv_kwh": daily_record.get("inv_kwh", 0),
+                "irradiance_kwh_m2": daily_record.get("irradiance_kwh_m2"),
+                "hourly_yield": hourly_yield,
+                "hourly_ssp": hourly_ssp,
+            })
+
+
+def _write_backfill_day(cfg, db_id, hh_db_id, record, hh_index, limiter, allow_scrape=True):
+    """
+    Write stage for one day: the daily row (with its hourly table), then its
+    HH rows. hh_index() returns the shared HH index, loading it on first use.
+    """
+    current_date = record["date"]
+    hourly_yield, hourly_ssp = record["hourly_yield"], record["hourly_ssp"]
+    capacity_kwp = cfg.get("installed_capacity_kwp", 0)
+    page_id = upsert_notion_row(
+        db_id,
+        current_date.strftime("%Y-%m-%d"),
+        pv_kwh=record["pv_kwh"],
+        inv_kwh=record["inv_kwh"],
+        station_name=cfg.get("station_name", "Point Lane Solar Farm"),
+        alarms={}, # No historical alarms scraping implemented
+        irradiance_kwh_m2=record["irradiance_kwh_m2"],
+        capacity_kwp=capacity_kwp if capacity_kwp else None,
+        hourly_yield_json=json.dumps(hourly_yield, sort_keys=True) if hourly_yield else None,
+        hourly_ssp_json=json.dumps(hourly_ssp, sort_keys=True) if hourly_ssp else None,
+        daily_revenue_gbp=calculate_daily_revenue_gbp(hourly_yield, hourly_ssp),
+        hourly_table=hourly_table_block(hourly_yield, hourly_ssp),
+        limiter=limiter,
     )
-    parser.add_argument("--backfill", action="store_true", help="Backfill historical data")
-    parser.add_argument("--sync-today", action="store_true", help="Sync today's generation")
-    parser.add_argument("--start-date", default="2025-12-01", help="Backfill start date (YYYY-MM-DD)")
-    parser.add_argument("--end-date", default=None, help="Backfill end date (default: today)")
-    parser.add_argument("--notion-token", default=None, help="Notion API token")
+    if page_id and hh_db_id:
+        sync_stark_hh_day(cfg, hh_db_id, page_id, current_date, allow_scrape=allow_scrape,
+                          hh_index=hh_index(), limiter=limiter)
+    return bool(page_id)
 
-    args = parser.parse_args()
 
-    if not any([args.backfill, args.sync_today]):
-        parser.print_help()
-        sys.exit(1)
+def _backfill_days(cfg, db_id, hh_db_id, start_date, end_date, month_rows, power_curves,
+                   writers=BACKFILL_WRITERS, allow_scrape=True):
+    """
+    Upsert each day in the range. month_rows(year, month) returns the daily
+    report rows and power_curves(days) a {day: 288-point 5-min power curve}
+    dict, so the same stages serve the portal and the Northbound API. Both
+    are fetched once per month.
+
+    Extraction feeds a bounded queue that `writers` threads drain into
+    Notion while the next month is being fetched; every Notion request the
+    writers make (queries, page writes, hourly-table blocks, HH rows) shares
+    one HH_WRITES_PER_SECOND limiter. allow_scrape=False leaves days without
+    a Stark CSV out of the HH sync. Returns (days written, days failed).
+    """
+    total_days = (end_date - start_date).days + 1
+    hh = {"index": None}  # HH Key -> page, loaded once for the whole range
+    hh_lock = threading.Lock()
 
-    # Load config
-    cfg = load_config()
+    def hh_index():
+        with hh_lock:
+            if hh["index"] is None:
+                try:
+                    hh["index"] = load_hh_index(hh_db_id, start_date, end_date, limiter=limiter)
+                except requests.RequestException as e:
+                    log.warning("  Could not preload HH index: %s", e)
+                    hh["index"] = {}
+            return hh["index"]
+
+    records = queue.Queue(maxsize=BACKFILL_QUEUE_DAYS)
+    limiter = _RateLimiter(HH_WRITES_PER_SECOND)
+    progress = {"written": 0, "failed": 0}
+    progress_lock = threading.Lock()
+
+    def writer():
+        while True:
+            record = records.get()
+            if record is None:
+                return
+            try:
+                ok = _write_backfill_day(cfg, db_id, hh_db_id, record, hh_index, limiter, allow_scrape)
+            except Exception as e:
+                log.error("  Exception writing %s: %s", record["date"], e)
+                ok = False
+            with progress_lock:
+                progress["written" if ok else "failed"] += 1
+                done = progress["written"] + progress["failed"]
+            log.info("[write] %s %s (%d/%d)", record["date"], "ok" if ok else "FAILED", done, total_days)
+
+    threads = [threading.Thread(target=writer, name=f"backfill-writer-{i}", daemon=True) for i in range(writers)]
+    for t in threads:
+        t.start()
+    try:
+        _extract_backfill_days(start_date, end_date, month_rows, power_curves, records)
+    finally:
+        for _ in threads:
+            records.put(None)
+        for t in threads:
+            t.join()
+    log.info("[write] done: %d written, %d failed", progress["written"], progress["failed"])
+    return progress["written"], progress["failed"]
+
+
+def backfill_range(cfg, db_id, hh_db_id, start_date, end_date):
+    """
+    Backfill data for a range of dates, including hourly yield.
+    Optimized to scrape the monthly report and fetch each month's power
+    curves (concurrently, in one page.evaluate) once per month; both go
+    through the payload cache, so re-runs over past days skip the portal.
+    Notion writes run on background threads while later months are fetched
+    (see _backfill_days). Missing Stark HH CSVs are downloaded up front in
+    one scraper session; the per-day HH sync only reads the files.
+    """
+    log.info("Starting backfill from %s to %s", start_date, end_date)
+    if hh_db_id:
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        prefetch_stark_hh_csvs(cfg, days)
+
+    if northbound_client.use_northbound(cfg):
+        client = northbound_client.client_from_config(cfg)
+        station_code = cfg["station_code"]
+        extracted = []  # days whose month shard reached the writers
+
+        def northbound_curves(days):
+            curves = {d: client.daily_power_curve(station_code, d) for d in days}
+            extracted.extend(days)
+            return curves
+
+        try:
+            _backfill_days(
+                cfg, db_id, hh_db_id, start_date, end_date,
+                month_rows=lambda year, month: client.month_report(station_code, year, month),
+                power_curves=northbound_curves,
+                allow_scrape=False,
+            )
+            return
+        except (northbound_client.NorthboundError, requests.RequestException) as e:
+            if extracted:
+                start_date = max(extracted) + timedelta(days=1)
+            log.warning("Northbound backfill failed (%s) -- resuming from %s on the portal", e, start_date)
+            if start_date > end_date:
+                return
+
+    # The portal is only opened if something is missing from the payload cache
+    page = _LazyPortalPage(cfg)
+    try:
+        _backfill_days(
+            cfg, db_id, hh_db_id, start_date, end_date,
+            month_rows=lambda year, month: monthly_report_rows(page, cfg, year, month),
+            power_curves=lambda days: fetch_energy_balance_batch(page, cfg, days),
+            allow_scrape=False,
+        )
+    except Exception as e:
+        log.exception("Backfill failed: %s", e)
+    finally:
+        page.close()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def setup_notion(cfg, notion_token=None):
+    """
+    Resolve the Notion token, find or create the daily and HH databases and
+    bring their schemas up to date. Returns (db_id, hh_db_id); db_id is None
+    when no token is configured.
+    """
+    global NOTION_TOKEN
 
     # Get Notion token from args, config, or environment
     NOTION_TOKEN = (
-        args.notion_token
+        notion_token
         or cfg.get("notion_token")
         or os.environ.get("NOTION_TOKEN")
     )
     if not NOTION_TOKEN:
         log.error("No Notion token found. Provide via --notion-token, config.json, or NOTION_TOKEN env var")
-        sys.exit(1)
+        return None, None
 
     # Find or create the Notion database
     # notion_fusionsolar_parent_page_id pins the FusionSolar DB to a specific
@@ -1508,7 +2026,33 @@ def main():
     )
     if hh_db_id:
         verify_and_update_hh_db_schema(hh_db_id, db_id)
+    return db_id, hh_db_id
+
+
+def main():
 
+    parser = argparse.ArgumentParser(
+        description="FusionSolar -> Notion Daily Generation Sync",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--backfill", action="store_true", help="Backfill historical data")
+    parser.add_argument("--sync-today", action="store_true", help="Sync today's generation")
+    parser.add_argument("--start-date", default="2025-12-01", help="Backfill start date (YYYY-MM-DD)")
+    parser.add_argument("--end-date", default=None, help="Backfill end date (default: today)")
+    parser.add_argument("--notion-token", default=None, help="Notion API token")
+
+    args = parser.parse_args()
+
+    if not any([args.backfill, args.sync_today]):
+        parser.print_help()
+        sys.exit(1)
+
+    # Load config
+    cfg = load_config()
+
+    db_id, hh_db_id = setup_notion(cfg, notion_token=args.notion_token)
+    if not db_id:
+        sys.exit(1)
 
     if args.backfill:
         start = date.fromisoformat(args.start_date)
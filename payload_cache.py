@@ -0,0 +1,102 @@
+"""
+Payload Cache
+=============
+On-disk cache of raw FusionSolar responses, keyed by station, endpoint and
+period (a day "2026-03-05" or a month "2026-03"), stored as gzip'd JSON:
+
+    .payload_cache/<station>/<endpoint>/<period>.json.gz
+
+An entry written after its period ended (plus a settle margin) never
+changes and is served from disk forever. Anything written earlier -- a
+period that includes today, or one cached while it was still running and
+read after it ended -- is only reused for a short TTL, then re-fetched.
+
+Environment:
+  FUSIONSOLAR_CACHE=0               bypass the cache (neither read nor write)
+  FUSIONSOLAR_CACHE_DIR             cache root (default .payload_cache/)
+  FUSIONSOLAR_CACHE_TODAY_TTL_S     TTL for entries written before their period settled (default 900)
+  FUSIONSOLAR_CACHE_SETTLE_HOURS    hours after a period ends before its data is final (default 2)
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = SCRIPT_DIR / ".payload_cache"
+DEFAULT_TODAY_TTL_S = 15 * 60
+DEFAULT_SETTLE_HOURS = 2.0
+
+
+def enabled():
+    return os.environ.get("FUSIONSOLAR_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def cache_dir():
+    return Path(os.environ.get("FUSIONSOLAR_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(value)).strip("_") or "_"
+
+
+def cache_path(station, endpoint, period):
+    return cache_dir() / _slug(station) / _slug(endpoint) / f"{_slug(period)}.json.gz"
+
+
+def settled_at(last_day):
+    """Local time after which a period ending on last_day is final."""
+    hours = float(os.environ.get("FUSIONSOLAR_CACHE_SETTLE_HOURS", DEFAULT_SETTLE_HOURS))
+    return datetime.combine(last_day + timedelta(days=1), datetime.min.time()) + timedelta(hours=hours)
+
+
+def is_fresh(path, last_day, today=None, now=None):
+    """Immutable if written after the period settled; otherwise younger than the TTL."""
+    today = today or date.today()
+    mtime = path.stat().st_mtime
+    if last_day < today and datetime.fromtimestamp(mtime) >= settled_at(last_day):
+        return True
+    ttl = float(os.environ.get("FUSIONSOLAR_CACHE_TODAY_TTL_S", DEFAULT_TODAY_TTL_S))
+    return (now or time.time()) - mtime < ttl
+
+
+def load(station, endpoint, period, last_day, today=None):
+    """Cached payload for the period, or None when missing, stale or unreadable."""
+    if not enabled():
+        return None
+    path = cache_path(station, endpoint, period)
+    if not path.exists():
+        return None
+    try:
+        if not is_fresh(path, last_day, today=today):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def store(station, endpoint, period, payload):
+    """Write payload atomically; empty payloads are never cached."""
+    if not enabled() or not payload:
+        return
+    path = cache_path(station, endpoint, period)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        json.dump(payload, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def cached(station, endpoint, period, last_day, fetch):
+    """load() or, on a miss, fetch() and store() the result."""
+    payload = load(station, endpoint, period, last_day)
+    if payload is not None:
+        return payload
+    payload = fetch()
+    store(station, endpoint, period, payload)
+    return payload
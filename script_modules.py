@@ -0,0 +1,41 @@
+"""
+Script Modules
+==============
+Loads helper scripts that are not on the import path as packages
+(stark_scraper.py, stark_http_client.py, Elexon_Data/fetch_elexon_data.py)
+by file path, once per process.
+
+A loaded script is registered in sys.modules under its module name, so later
+loads -- and a plain `import stark_scraper` -- get the same module object
+instead of re-executing the file and its top-level imports.
+"""
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+_LOCK = threading.RLock()
+
+
+def load(name, path):
+    """The module at path, executed on first use; None if the file is missing."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    path = Path(path)
+    if not path.exists():
+        return None
+    with _LOCK:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.spec_from_file_location(name, str(path))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(name, None)
+            raise
+        return module
@@ -0,0 +1,25 @@
+"""Which Notion property types a page write may set."""
+
+from __future__ import annotations
+
+from typing import Mapping, Optional
+
+# Computed by Notion; writing any of these fails the whole page update.
+READ_ONLY_TYPES = frozenset({
+    "formula", "rollup", "created_time", "created_by",
+    "last_edited_time", "last_edited_by", "unique_id",
+})
+
+
+def writable_columns(prop_types: Optional[Mapping[str, str]]) -> Optional[frozenset]:
+    """
+    Writable property names for a {name: type} mapping, or None when the
+    schema is unknown. A mapping that already carries a precomputed
+    `writable` set (notion_schema_cache.DatabaseSchema) is used as-is.
+    """
+    if prop_types is None:
+        return None
+    writable = getattr(prop_types, "writable", None)
+    if writable is not None:
+        return writable
+    return frozenset(name for name, typ in prop_types.items() if typ not in READ_ONLY_TYPES)
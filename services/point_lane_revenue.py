@@ -7,6 +7,8 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Mapping, Optional
 
+from services.notion_properties import writable_columns
+
 
 @dataclass(frozen=True)
 class PointLaneRevenueConfig:
@@ -206,11 +208,10 @@ def build_notion_properties(
     prop_types: Optional[Mapping[str, str]] = None,
 ) -> dict:
     """Build a Notion page property payload that respects formula/read-only columns."""
+    writable = writable_columns(prop_types)
 
     def can_write(name: str) -> bool:
-        if prop_types is None:
-            return True
-        return prop_types.get(name) not in (None, "formula")
+        return writable is None or name in writable
 
     props = {"Date": {"title": [{"text": {"content": date_str}}]}}
 
@@ -0,0 +1,195 @@
+"""Settlement-period reconciliation of Stark HH export against FusionSolar generation."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from energy_aggregation import SAMPLES_PER_DAY, aggregate_day, day_slots
+
+SP_COUNT = 48
+
+OK = "ok"
+MISSING_SP = "missing-sp"
+SHIFTED_INTERVAL = "shifted-interval"
+SCALE_ERROR = "scale-error"
+CURTAILMENT = "curtailment"
+UNEXPLAINED = "unexplained"
+NO_REFERENCE = "no-reference"
+
+# Only these point at a broken Stark export that a fresh download can fix.
+RESCRAPE_CATEGORIES = frozenset({MISSING_SP, SHIFTED_INTERVAL, UNEXPLAINED})
+
+MAX_SHIFT_SPS = 4
+ACTIVE_SHARE = 0.05          # SPs above 5% of the day's FusionSolar peak count as "producing"
+SCALE_DISPERSION = 0.05      # max relative MAD of the Stark/Fusion ratio for a clean scale error
+PLATEAU_TOLERANCE = 0.02     # Stark SPs within 2% of its day max are on the export cap
+EXPLAINED_SHARE = 0.6        # share of the daily deficit a pattern must explain
+
+
+@dataclass(frozen=True)
+class DayReconciliation:
+    day: date
+    category: str
+    stark_kwh: float
+    fusion_kwh: float
+    diff_pct: float
+    detail: str = ""
+
+    @property
+    def rescrape(self) -> bool:
+        return self.category in RESCRAPE_CATEGORIES
+
+
+def _matrix(days: Sequence[date], profiles: Mapping[date, Mapping[int, float]]) -> np.ndarray:
+    """(days, 48) kWh matrix, NaN where a day or SP has no value."""
+    out = np.full((len(days), SP_COUNT), np.nan)
+    for i, d in enumerate(days):
+        for sp, kwh in (profiles.get(d) or {}).items():
+            if 1 <= int(sp) <= SP_COUNT and kwh is not None:
+                out[i, int(sp) - 1] = float(kwh)
+    return out
+
+
+def _shift(matrix: np.ndarray, k: int) -> np.ndarray:
+    """Move every row k SPs later (k < 0: earlier), padding with NaN."""
+    out = np.full_like(matrix, np.nan)
+    if k > 0:
+        out[:, k:] = matrix[:, :-k]
+    elif k < 0:
+        out[:, :k] = matrix[:, -k:]
+    else:
+        out[:] = matrix
+    return out
+
+
+def _sse(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    both = ~np.isnan(a) & ~np.isnan(b)
+    return np.where(both, (a - b) ** 2, 0.0).sum(axis=1)
+
+
+def reconcile(
+    days: Sequence[date],
+    stark_sp_kwh: Mapping[date, Mapping[int, float]],
+    fusion_sp_kwh: Mapping[date, Mapping[int, float]],
+    threshold_pct: float = 8.0,
+) -> list[DayReconciliation]:
+    """
+    Line up Stark and FusionSolar per settlement period for every day at
+    once and classify each day (first match wins):
+
+      shifted-interval  Stark profile matches FusionSolar moved by +/-k SPs
+      missing-sp        Stark blank/zero in SPs where FusionSolar produced
+      ok                daily totals within threshold_pct
+      scale-error       Stark is a near-constant multiple of FusionSolar
+      curtailment       deficit sits where Stark is flat at its day maximum
+      unexplained       over threshold with none of the patterns above
+      no-reference      no FusionSolar profile to compare against
+
+    Pass only days whose daily totals already mismatch: missing-sp is checked
+    before ok, so a genuine zero SP on an otherwise good day would be flagged.
+    """
+    days = list(days)
+    stark = _matrix(days, stark_sp_kwh)
+    fusion = _matrix(days, fusion_sp_kwh)
+    has_fusion = ~np.isnan(fusion).all(axis=1)
+
+    stark_total = np.nansum(stark, axis=1)
+    fusion_total = np.nansum(fusion, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff_pct = np.where(
+            fusion_total > 0,
+            np.abs(stark_total - fusion_total) / fusion_total * 100.0,
+            np.where(np.abs(stark_total) <= 0.001, 0.0, 100.0),
+        )
+
+    peak = np.nanmax(np.where(np.isnan(fusion), -np.inf, fusion), axis=1)
+    active = fusion > (ACTIVE_SHARE * peak)[:, None]
+    deficit = np.nan_to_num(fusion - np.nan_to_num(stark, nan=0.0), nan=0.0).clip(min=0.0)
+    total_deficit = deficit.sum(axis=1)
+
+    # missing-sp: Stark blank or zero where the plant was producing
+    hole = active & (np.isnan(stark) | (np.nan_to_num(stark) <= 0.0))
+    hole_count = hole.sum(axis=1)
+
+    # shifted-interval: best lag of Stark against FusionSolar
+    stark_filled = np.nan_to_num(stark, nan=0.0)
+    fusion_filled = np.nan_to_num(fusion, nan=0.0)
+    lags = list(range(-MAX_SHIFT_SPS, MAX_SHIFT_SPS + 1))
+    errors = np.vstack([_sse(stark_filled, _shift(fusion_filled, k)) for k in lags])
+    best_lag = np.asarray(lags)[errors.argmin(axis=0)]
+    zero_err = errors[lags.index(0)]
+    shifted = (best_lag != 0) & (errors.min(axis=0) < 0.25 * zero_err)
+
+    # scale-error: consistent Stark/Fusion ratio away from 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(active & ~np.isnan(stark) & (stark > 0), stark / fusion, np.nan)
+    ratio_ok = ~np.isnan(ratio).all(axis=1)
+    median_ratio = np.full(len(days), np.nan)
+    dispersion = np.full(len(days), np.inf)
+    if ratio_ok.any():
+        median_ratio[ratio_ok] = np.nanmedian(ratio[ratio_ok], axis=1)
+        mad = np.nanmedian(np.abs(ratio[ratio_ok] - median_ratio[ratio_ok][:, None]), axis=1)
+        dispersion[ratio_ok] = mad / np.abs(median_ratio[ratio_ok])
+    scaled = ratio_ok & (dispersion < SCALE_DISPERSION) & (np.abs(median_ratio - 1.0) * 100.0 > threshold_pct)
+
+    # curtailment: deficit concentrated on a plateau at Stark's day maximum
+    stark_max = np.nanmax(np.where(np.isnan(stark), -np.inf, stark), axis=1)
+    plateau = active & (stark_filled >= ((1.0 - PLATEAU_TOLERANCE) * stark_max)[:, None]) & (stark_filled > 0)
+    plateau_deficit = np.where(plateau, deficit, 0.0).sum(axis=1)
+    curtailed = (plateau.sum(axis=1) >= 2) & (plateau_deficit >= EXPLAINED_SHARE * total_deficit)
+
+    results = []
+    for i, d in enumerate(days):
+        over = diff_pct[i] > threshold_pct
+        if not has_fusion[i]:
+            category, detail = NO_REFERENCE, ""
+        elif shifted[i]:
+            category, detail = SHIFTED_INTERVAL, f"Stark offset from FusionSolar by {int(best_lag[i]):+d} SP(s)"
+        elif hole_count[i]:
+            category, detail = MISSING_SP, f"{int(hole_count[i])} producing SP(s) blank in Stark"
+        elif not over:
+            category, detail = OK, ""
+        elif scaled[i]:
+            category, detail = SCALE_ERROR, f"Stark = {median_ratio[i]:.3f} x FusionSolar"
+        elif stark_total[i] < fusion_total[i] and curtailed[i]:
+            category, detail = CURTAILMENT, f"Stark capped at {stark_max[i]:.1f} kWh/SP"
+        else:
+            category, detail = UNEXPLAINED, ""
+        results.append(DayReconciliation(
+            day=d,
+            category=category,
+            stark_kwh=round(float(stark_total[i]), 3),
+            fusion_kwh=round(float(fusion_total[i]), 3),
+            diff_pct=round(float(diff_pct[i]), 2),
+            detail=detail,
+        ))
+    return results
+
+
+def rescrape_dates(results: Sequence[DayReconciliation]) -> list[date]:
+    return [r.day for r in results if r.rescrape]
+
+
+def summarise(results: Sequence[DayReconciliation]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for r in results:
+        counts[r.category] = counts.get(r.category, 0) + 1
+    return counts
+
+
+def fusion_sp_profile(product_power: Optional[Sequence], day: date) -> dict[int, float]:
+    """
+    FusionSolar productPower -> {SP: kWh}, clipped to the 48 SPs the Stark parser keeps.
+
+    Clock-change days (46/50 SPs) return {}: the portal still sends 288
+    samples, so SP indices would drift against Stark by an hour and the day
+    would look shifted. Those days are left to the daily-total check.
+    """
+    if not product_power or day_slots(day) != SAMPLES_PER_DAY:
+        return {}
+    sp = aggregate_day(product_power, day=day).sp_dict()
+    return {k: v for k, v in sp.items() if k <= SP_COUNT}
@@ -19,6 +19,10 @@ Usage:
   python stark_daily_sync.py                            # all available Stark CSVs
   python stark_daily_sync.py --start 2025-12-01 --end 2026-02-18
   python stark_daily_sync.py --start 2025-12-01         # end defaults to today
+  python stark_daily_sync.py --rescrape-mismatch        # also ignore cache for unprofiled mismatch dates
+
+Dates whose stark_gen_data/ CSV passes validation (all periods present,
+plausible total, written after the day settled) are not scraped again.
 """
 
 import argparse
@@ -28,12 +32,16 @@ import os
 import sys
 import time
 import requests
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+from browser_session import browser_options
 from market_data.epex_gb_da_eod_sftp import EpexGbDaEodSftpProvider
 from market_data.nordpool_n2ex_api import NordPoolN2exApiProvider
 from market_data.models import MarketDataError
+import notion_schema_cache
+import payload_cache
+import script_modules
 from services.n2ex_reference_price import derive_reference_price
 from services.point_lane_revenue import (
     InvalidRevenueInputError,
@@ -42,6 +50,7 @@ from services.point_lane_revenue import (
     compute_point_lane_revenue,
     contract_regime_for_date,
 )
+from services.reconciliation import fusion_sp_profile, reconcile, rescrape_dates, summarise
 
 # ---------------------------------------------------------------------------
 # Paths & config
@@ -122,6 +131,7 @@ def find_or_create_db(token, parent_page_id):
         db_id = DB_ID_FILE.read_text().strip()
         r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=h)
         if r.status_code == 200:
+            notion_schema_cache.remember(r.json())
             print(f"[DB] Using cached DB: {db_id}")
             return db_id
         print("[DB] Cached ID invalid, searching…")
@@ -159,12 +169,8 @@ def find_or_create_db(token, parent_page_id):
 
 
 def get_db_property_types(token, db_id):
-    """Return {property_name: notion_type} for the target DB."""
-    h = headers(token)
-    r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=h)
-    r.raise_for_status()
-    props = r.json().get("properties", {})
-    return {name: meta.get("type") for name, meta in props.items()}
+    """Return the target DB's {property_name: notion_type} schema (see notion_schema_cache)."""
+    return notion_schema_cache.get(db_id, headers(token))
 
 
 # ---------------------------------------------------------------------------
@@ -357,6 +363,87 @@ def find_mismatch_dates(fusion_totals, stark_totals, start, end, threshold_pct=8
     return mismatches
 
 
+def load_sp_profiles(cfg, dates):
+    """
+    Per-SP kWh for reconciliation, from local files only: Stark from
+    stark_gen_data/ CSVs, FusionSolar from cached energy-balance payloads.
+    Returns (stark {date: {sp: kWh}}, fusion {date: {sp: kWh}}).
+    """
+    station = cfg.get("station_code")
+    stark, fusion = {}, {}
+    for d in dates:
+        path = GEN_DIR / f"stark_hh_data_{d.isoformat()}.csv"
+        if path.exists():
+            stark[d] = parse_stark_csv(path)
+        payload = payload_cache.load(station, "energy-balance", d.isoformat(), d) if station else None
+        profile = fusion_sp_profile(((payload or {}).get("data") or {}).get("productPower"), d)
+        if profile:
+            fusion[d] = profile
+    return stark, fusion
+
+
+def audit_stark_vs_fusion(cfg, fusion_totals, stark_totals, start, end, threshold_pct):
+    """
+    Decide which dates need a Stark re-scrape.
+
+    Only dates whose daily totals differ by more than threshold_pct are
+    reconciled per settlement period, in one pass over those with both a
+    Stark CSV and a FusionSolar profile; of these, only corrupt exports
+    (missing-sp, shifted-interval, unexplained) are queued. Days whose totals
+    agree are never queued, so a genuine zero SP (a trip) is not re-scraped
+    night after night.
+
+    Returns (corrupt, unprofiled): corrupt dates always bypass the CSV cache
+    (a blank or shifted SP still parses as a complete file). Unprofiled
+    mismatches -- no cached FusionSolar payload, or a clock-change day -- are
+    not re-scraped unless their cached CSV fails validation or
+    --rescrape-mismatch is given.
+    """
+    mismatches = find_mismatch_dates(
+        fusion_totals=fusion_totals,
+        stark_totals=stark_totals,
+        start=start,
+        end=end,
+        threshold_pct=threshold_pct,
+    )
+    if mismatches:
+        print(f"[COMPARE] Found {len(mismatches)} date(s) above {threshold_pct:.1f}% Stark/Fusion variance.")
+        for d, stark_val, fusion_val, pct in mismatches[:10]:
+            print(
+                f"[COMPARE] {d.isoformat()}: Stark={stark_val:.2f} kWh, "
+                f"Fusion={fusion_val:.2f} kWh, diff={pct:.1f}%"
+            )
+    else:
+        print(f"[COMPARE] No Stark/Fusion mismatches above {threshold_pct:.1f}%.")
+
+    mismatch_days = [d for d, _, _, _ in mismatches]
+    stark_sp, fusion_sp = load_sp_profiles(cfg, mismatch_days)
+    profiled = [d for d in mismatch_days if d in stark_sp and d in fusion_sp]
+    results = reconcile(profiled, stark_sp, fusion_sp, threshold_pct=threshold_pct)
+    corrupt = set(rescrape_dates(results))
+    unprofiled = [d for d in mismatch_days if d not in stark_sp or d not in fusion_sp]
+    queued = corrupt | set(unprofiled)
+
+    if results:
+        counts = summarise(results)
+        print(
+            f"[RECON] {len(results)} date(s) reconciled per SP: "
+            + ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        )
+        for r in [r for r in results if r.category != "ok"][:10]:
+            action = "re-scrape" if r.rescrape else "keep"
+            print(f"[RECON] {r.day.isoformat()}: {r.category} ({r.detail or f'diff={r.diff_pct:.1f}%'}) -> {action}")
+    explained = [d for d, _, _, _ in mismatches if d not in queued]
+    if explained:
+        print(f"[RECON] {len(explained)} mismatch date(s) explained without a corrupt export; not re-scraping.")
+    if unprofiled:
+        print(
+            f"[RECON] {len(unprofiled)} mismatch date(s) lack SP data (no cached FusionSolar payload "
+            "or a clock-change day); re-scraped only with --rescrape-mismatch or if the cached CSV fails validation."
+        )
+    return sorted(corrupt), sorted(unprofiled)
+
+
 def find_missing_dates(existing_date_titles, start, end):
     """
     Check which dates in [start, end] are missing from Notion DB.
@@ -379,9 +466,7 @@ class DuplicateNotionRowError(RuntimeError):
 def ensure_schema(token, db_id):
     """Add any missing columns required by the Point Lane revenue model."""
     h = headers(token)
-    r = requests.get(f"https://api.notion.com/v1/databases/{db_id}", headers=h)
-    r.raise_for_status()
-    existing = set(r.json().get("properties", {}).keys())
+    existing = notion_schema_cache.get(db_id, h)
     missing = {}
     for name, spec in _db_schema_props().items():
         if name not in existing:
@@ -394,6 +479,7 @@ def ensure_schema(token, db_id):
             json={"properties": missing},
         )
         r.raise_for_status()
+        notion_schema_cache.remember(r.json())
 
 
 def query_page_ids(token, db_id, date_str):
@@ -409,17 +495,27 @@ def query_page_ids(token, db_id, date_str):
 
 
 def upsert_day(token, db_id, date_str, sp_kwh, sp_ssp, revenue_result, prop_types):
-    """Insert or update one Notion daily row using regime-aware revenue fields."""
+    """
+    Insert or update one Notion daily row using regime-aware revenue fields.
+
+    A 400 usually means the cached schema is stale (a column was deleted or
+    renamed in Notion): the cache entry is dropped, ensure_schema() re-adds
+    missing columns from a fresh read, and the write is retried once.
+    """
     h = headers(token)
     total = round(sum(sp_kwh.values()), 4)
-    props = build_notion_properties(
-        date_str=date_str,
-        sp_kwh=sp_kwh,
-        sp_ssp=sp_ssp,
-        revenue=revenue_result,
-        prop_types=prop_types,
-    )
 
+    def build(types):
+        return build_notion_properties(
+            date_str=date_str,
+            sp_kwh=sp_kwh,
+            sp_ssp=sp_ssp,
+            revenue=revenue_result,
+            prop_types=types,
+        )
+
+    props = build(prop_types)
+    schema_refreshed = False
     for attempt in range(4):
         page_ids = query_page_ids(token, db_id, date_str)
         if len(page_ids) > 1:
@@ -447,6 +543,13 @@ def upsert_day(token, db_id, date_str, sp_kwh, sp_ssp, revenue_result, prop_type
             time.sleep(wait)
         else:
             print(f"    WARN Notion {r.status_code}: {r.text[:200]}")
+            if r.status_code == 400 and not schema_refreshed:
+                schema_refreshed = True
+                print("    Refreshing DB schema and retrying...")
+                notion_schema_cache.invalidate(db_id)
+                ensure_schema(token, db_id)
+                props = build(get_db_property_types(token, db_id))
+                continue
             return False, 0
     return False, 0
 
@@ -483,6 +586,113 @@ def parse_stark_csv(path):
     return sp_kwh
 
 
+# ---------------------------------------------------------------------------
+# Validate a cached Stark CSV before deciding whether to scrape it again
+# ---------------------------------------------------------------------------
+CACHE_SETTLE_HOURS = float(os.environ.get("STARK_CACHE_SETTLE_HOURS", "2"))
+MAX_DAILY_YIELD_HOURS = 12.0   # kWh per kWp per day; well above any UK summer day
+
+
+def expected_sp_count(d):
+    """Settlement periods in a GB day: 46/50 on clock-change days (parser caps at 48)."""
+    try:
+        from zoneinfo import ZoneInfo
+        tz = ZoneInfo("Europe/London")
+    except Exception:
+        return 48
+    start = datetime.combine(d, datetime.min.time(), tzinfo=tz)
+    end = datetime.combine(d + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    hours = (end.astimezone(timezone.utc) - start.astimezone(timezone.utc)).total_seconds() / 3600
+    return min(int(round(hours * 2)), 48)
+
+
+def _zero_marker(path):
+    return Path(path).with_suffix(".zero-confirmed")
+
+
+def confirm_zero_days(fresh, reasons):
+    """
+    After a batch scrape: a date re-scraped for a "zero total" that comes
+    back all-zero again is a genuine zero-generation day (snow, outage).
+    Mark it so validate_cached_csv() stops sending it to the browser.
+    Returns the confirmed date strings.
+    """
+    confirmed = []
+    for date_str, path in fresh.items():
+        if not path or reasons.get(date_str) != "zero total":
+            continue
+        try:
+            sp_kwh = parse_stark_csv(path)
+        except (OSError, csv.Error, UnicodeDecodeError):
+            continue
+        if sp_kwh and sum(sp_kwh.values()) <= 0:
+            _zero_marker(path).touch()
+            confirmed.append(date_str)
+    return confirmed
+
+
+def validate_cached_csv(path, d, capacity_kwp=None, now=None):
+    """
+    Decide whether an existing stark_hh_data_{date}.csv can be used as-is.
+
+    The file must have been written after the day was over (plus a settle
+    margin), hold every settlement period, and carry a plausible total: more
+    than zero and below installed capacity x MAX_DAILY_YIELD_HOURS. A zero
+    total is accepted once a re-scrape has confirmed it (confirm_zero_days()).
+
+    Returns (ok, reason).
+    """
+    path = Path(path)
+    if not path.exists():
+        return False, "missing"
+    now = now or datetime.now()
+    settled_at = datetime.combine(d + timedelta(days=1), datetime.min.time()) + timedelta(hours=CACHE_SETTLE_HOURS)
+    if now < settled_at:
+        return False, "day not settled"
+    if datetime.fromtimestamp(path.stat().st_mtime) < settled_at:
+        return False, "scraped before day settled"
+    try:
+        sp_kwh = parse_stark_csv(path)
+    except (OSError, csv.Error, UnicodeDecodeError) as exc:
+        return False, f"unreadable ({exc})"
+    expected = expected_sp_count(d)
+    if len(sp_kwh) < expected:
+        return False, f"{len(sp_kwh)}/{expected} periods"
+    if any(v < 0 for v in sp_kwh.values()):
+        return False, "negative period value"
+    total = sum(sp_kwh.values())
+    if total <= 0:
+        if _zero_marker(path).exists():
+            return True, "ok (confirmed zero day)"
+        return False, "zero total"
+    if capacity_kwp and total > float(capacity_kwp) * MAX_DAILY_YIELD_HOURS:
+        return False, f"implausible total {total:.0f} kWh"
+    return True, "ok"
+
+
+def plan_scrape(dates, capacity_kwp=None, force_dates=(), now=None):
+    """
+    Split dates into ones served from a valid cached CSV and ones that need
+    the browser. Dates in force_dates are always scraped.
+
+    Returns (cached {date_str: Path}, to_scrape [date], reasons {date_str: reason}).
+    """
+    force_dates = set(force_dates)
+    cached, to_scrape, reasons = {}, [], {}
+    for d in dates:
+        path = GEN_DIR / f"stark_hh_data_{d.isoformat()}.csv"
+        if d in force_dates:
+            ok, reason = False, "forced re-scrape"
+        else:
+            ok, reason = validate_cached_csv(path, d, capacity_kwp=capacity_kwp, now=now)
+        if ok:
+            cached[d.isoformat()] = path
+        else:
+            to_scrape.append(d)
+            reasons[d.isoformat()] = reason
+    return cached, to_scrape, reasons
+
+
 # ---------------------------------------------------------------------------
 # Load SSP  →  {sp_number: ssp_gbp_per_mwh}
 # (tries daily file first, then falls back to combined CSV)
@@ -536,27 +746,25 @@ def load_ssp(date_str):
 # ---------------------------------------------------------------------------
 # Scrape dates from Stark → stark_gen_data/
 # ---------------------------------------------------------------------------
-def _load_scraper():
-    import importlib.util
-    scraper_path = SCRIPT_DIR / "stark_scraper.py"
-    if not scraper_path.exists():
-        return None
-    spec = importlib.util.spec_from_file_location("stark_scraper", str(scraper_path))
-    scraper = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(scraper)
-    return scraper
+STARK_CLIENTS = {
+    "playwright": "stark_scraper",
+    "http": "stark_http_client",
+}
 
 
-def scrape_generation_batch(cfg, date_list):
+def _load_scraper(kind=None):
     """
-    Scrape multiple dates in a single browser session using stark_scraper.run_batch().
-    Returns dict mapping date_str -> Path or None.
+    Load the Stark client module. STARK_CLIENT=http selects the browserless
+    stark_http_client; anything else (default) the Playwright stark_scraper.
+    Both expose run()/run_batch() with the same signature. Each is loaded
+    once per process (see script_modules).
     """
-    scraper = _load_scraper()
-    if not scraper or not hasattr(scraper, "run_batch"):
-        print("  [SCRAPE] stark_scraper.run_batch not available; falling back to per-date scrape")
-        return {d.isoformat(): scrape_generation(cfg, d) for d in date_list}
+    kind = (kind or os.environ.get("STARK_CLIENT") or "playwright").strip().lower()
+    module_name = STARK_CLIENTS.get(kind, STARK_CLIENTS["playwright"])
+    return script_modules.load(module_name, SCRIPT_DIR / f"{module_name}.py")
+
 
+def _run_scraper_batch(scraper, cfg, date_list):
     stark_cfg = cfg.get("stark", {})
     results_raw = scraper.run_batch(
         dates      = [d.isoformat() for d in date_list],
@@ -566,10 +774,39 @@ def scrape_generation_batch(cfg, date_list):
         search_text= stark_cfg.get("search_text"),
         output_dir = str(GEN_DIR),
         headless   = None,
+        browser_opts = browser_options(cfg),
     )
     return {k: Path(v) if v else None for k, v in results_raw.items()}
 
 
+def scrape_generation_batch(cfg, date_list):
+    """
+    Scrape multiple dates in a single session using the configured client's run_batch().
+    With STARK_CLIENT=http, dates the HTTP client could not fetch are retried
+    through the Playwright scraper.
+    Returns dict mapping date_str -> Path or None.
+    """
+    kind = (os.environ.get("STARK_CLIENT") or "playwright").strip().lower()
+    if kind == "http":
+        print("  [SCRAPE] STARK_CLIENT=http is experimental (unverified portal endpoints)")
+        client = _load_scraper("http")
+        results = _run_scraper_batch(client, cfg, date_list) if client else {}
+        failed = [d for d in date_list if not results.get(d.isoformat())]
+        if not failed:
+            return results
+        print(f"  [SCRAPE] HTTP client missed {len(failed)} date(s); falling back to Playwright")
+        scraper = _load_scraper("playwright")
+        if scraper and hasattr(scraper, "run_batch"):
+            results.update(_run_scraper_batch(scraper, cfg, failed))
+        return results
+
+    scraper = _load_scraper()
+    if not scraper or not hasattr(scraper, "run_batch"):
+        print("  [SCRAPE] stark_scraper.run_batch not available; falling back to per-date scrape")
+        return {d.isoformat(): scrape_generation(cfg, d) for d in date_list}
+    return _run_scraper_batch(scraper, cfg, date_list)
+
+
 def scrape_generation(cfg, d):
     """
     Call stark_scraper.run() for a single date d, saving into stark_gen_data/.
@@ -588,6 +825,7 @@ def scrape_generation(cfg, d):
         search_text= stark_cfg.get("search_text"),
         output_dir = str(GEN_DIR),
         headless   = None,
+        browser_opts = browser_options(cfg),
     )
     if result:
         return Path(result)
@@ -635,6 +873,7 @@ def resolve_notion_db_id(token, cfg):
             raise RuntimeError(
                 f"Configured NOTION_DATABASE_ID is invalid or inaccessible: {explicit_db_id}"
             )
+        notion_schema_cache.remember(r.json())
         DB_ID_FILE.write_text(explicit_db_id)
         return explicit_db_id
 
@@ -749,8 +988,23 @@ def main():
         type=float,
         default=8.0,
         help=(
-            "If Stark total differs from FusionSolar daily total by more than this percent, "
-            "auto-backfill that date by scraping and overwriting Stark row (default: 8.0)."
+            "Stark/FusionSolar variance (percent) above which a date is reconciled per "
+            "settlement period. Dates found corrupt (missing-sp, shifted-interval, unexplained) "
+            "are re-scraped; explained differences (scale, curtailment) are kept. Mismatch "
+            "dates without SP data are only re-scraped with --rescrape-mismatch (default: 8.0)."
+        ),
+    )
+    parser.add_argument(
+        "--rescrape-mismatch",
+        action="store_true",
+        help=(
+            "Also re-scrape daily-total mismatch dates that have no SP profile to reconcile "
+            "(no cached FusionSolar payload, or a clock-change day), even when their cached CSV "
+            "passes validation. Dates reconciliation flags as corrupt (missing-sp, "
+            "shifted-interval, unexplained) are always re-scraped. Note: mismatch dates used to "
+            "be re-scraped automatically; they no longer are without this flag. With an empty "
+            "payload cache (e.g. CI) every mismatch is unprofiled, so pass it there to keep the "
+            "old behaviour."
         ),
     )
     parser.add_argument(
@@ -772,7 +1026,6 @@ def main():
     # ---- DB setup ----------------------------------------------------------
     db_id = resolve_notion_db_id(token, cfg)
     ensure_schema(token, db_id)
-    prop_types = get_db_property_types(token, db_id)
     revenue_config = PointLaneRevenueConfig.from_sources(cfg)
     market_data_provider_name, market_data_provider = build_market_data_provider(cfg)
     print(f"[DB] DB ID  : {db_id}")
@@ -785,6 +1038,8 @@ def main():
     requested_dates = all_dates(start, end)
     dates = list(requested_dates)
     stark_totals = {}
+    mismatch_dates = []
+    corrupt_dates, unprofiled_dates = [], []
 
     if args.backfill_check_start:
         backfill_start = date.fromisoformat(args.backfill_check_start)
@@ -818,37 +1073,24 @@ def main():
 
         if fusion_db_id:
             fusion_totals = load_fusion_totals_by_date(token, fusion_db_id)
-            mismatches = find_mismatch_dates(
+            corrupt_dates, unprofiled_dates = audit_stark_vs_fusion(
+                cfg,
                 fusion_totals=fusion_totals,
                 stark_totals=stark_totals,
                 start=backfill_start,
                 end=end,
                 threshold_pct=args.fusion_diff_threshold_pct,
             )
-            if mismatches:
-                print(
-                    f"[COMPARE] Found {len(mismatches)} date(s) above "
-                    f"{args.fusion_diff_threshold_pct:.1f}% Stark/Fusion variance."
-                )
-                for d, stark_val, fusion_val, pct in mismatches[:10]:
-                    print(
-                        f"[COMPARE] {d.isoformat()}: Stark={stark_val:.2f} kWh, "
-                        f"Fusion={fusion_val:.2f} kWh, diff={pct:.1f}%"
-                    )
-                mismatch_dates = [d for d, _, _, _ in mismatches]
-                extra_mismatch = [d for d in mismatch_dates if d not in requested_set]
-                if extra_mismatch:
-                    print(
-                        f"[COMPARE] Adding {len(extra_mismatch)} mismatch date(s) to run: "
-                        f"{extra_mismatch[0]} → {extra_mismatch[-1]}"
-                    )
-                    dates = sorted(set(dates + extra_mismatch))
-                else:
-                    print("[COMPARE] Mismatch dates already in requested sync range.")
-            else:
+            mismatch_dates = sorted(set(corrupt_dates) | set(unprofiled_dates))
+            extra_mismatch = [d for d in mismatch_dates if d not in requested_set]
+            if extra_mismatch:
                 print(
-                    f"[COMPARE] No Stark/Fusion mismatches above {args.fusion_diff_threshold_pct:.1f}%."
+                    f"[COMPARE] Adding {len(extra_mismatch)} re-scrape date(s) to run: "
+                    f"{extra_mismatch[0]} → {extra_mismatch[-1]}"
                 )
+                dates = sorted(set(dates + extra_mismatch))
+            elif mismatch_dates:
+                print("[COMPARE] Re-scrape dates already in requested sync range.")
         else:
             print("[COMPARE] notion_fusionsolar_db_id not configured; skipping Stark/Fusion variance audit.")
     elif args.backfill_window_days > 0:
@@ -883,37 +1125,24 @@ def main():
 
         if fusion_db_id:
             fusion_totals = load_fusion_totals_by_date(token, fusion_db_id)
-            mismatches = find_mismatch_dates(
+            corrupt_dates, unprofiled_dates = audit_stark_vs_fusion(
+                cfg,
                 fusion_totals=fusion_totals,
                 stark_totals=stark_totals,
                 start=backfill_start,
                 end=end,
                 threshold_pct=args.fusion_diff_threshold_pct,
             )
-            if mismatches:
+            mismatch_dates = sorted(set(corrupt_dates) | set(unprofiled_dates))
+            extra_mismatch = [d for d in mismatch_dates if d not in requested_set]
+            if extra_mismatch:
                 print(
-                    f"[COMPARE] Found {len(mismatches)} date(s) above "
-                    f"{args.fusion_diff_threshold_pct:.1f}% Stark/Fusion variance."
-                )
-                for d, stark_val, fusion_val, pct in mismatches[:10]:
-                    print(
-                        f"[COMPARE] {d.isoformat()}: Stark={stark_val:.2f} kWh, "
-                        f"Fusion={fusion_val:.2f} kWh, diff={pct:.1f}%"
-                    )
-                mismatch_dates = [d for d, _, _, _ in mismatches]
-                extra_mismatch = [d for d in mismatch_dates if d not in requested_set]
-                if extra_mismatch:
-                    print(
-                        f"[COMPARE] Adding {len(extra_mismatch)} mismatch date(s) to run: "
-                        f"{extra_mismatch[0]} → {extra_mismatch[-1]}"
-                    )
-                    dates = sorted(set(dates + extra_mismatch))
-                else:
-                    print("[COMPARE] Mismatch dates already in requested sync range.")
-            else:
-                print(
-                    f"[COMPARE] No Stark/Fusion mismatches above {args.fusion_diff_threshold_pct:.1f}%."
+                    f"[COMPARE] Adding {len(extra_mismatch)} re-scrape date(s) to run: "
+                    f"{extra_mismatch[0]} → {extra_mismatch[-1]}"
                 )
+                dates = sorted(set(dates + extra_mismatch))
+            elif mismatch_dates:
+                print("[COMPARE] Re-scrape dates already in requested sync range.")
         else:
             print("[COMPARE] notion_fusionsolar_db_id not configured; skipping Stark/Fusion variance audit.")
     else:
@@ -921,10 +1150,29 @@ def main():
 
     print(f"[SYNC] {len(dates)} dates to process\n")
 
-    # Scrape all dates in a single browser session to avoid per-date login overhead
-    print("[SCRAPE] Starting batch scrape of all dates in one browser session...")
-    scraped = scrape_generation_batch(cfg, dates)
-    print(f"[SCRAPE] Batch complete: {sum(1 for v in scraped.values() if v)} / {len(dates)} succeeded\n")
+    # Reuse validated CSVs from stark_gen_data/; only missing/suspect dates go to the browser.
+    # Reconciliation-flagged CSVs look complete to validate_cached_csv, so they are always forced.
+    force_dates = list(corrupt_dates)
+    if args.rescrape_mismatch:
+        force_dates += unprofiled_dates
+    scraped, to_scrape, reasons = plan_scrape(
+        dates,
+        capacity_kwp=cfg.get("installed_capacity_kwp"),
+        force_dates=force_dates,
+    )
+    print(f"[CACHE] {len(scraped)} / {len(dates)} date(s) served from validated local CSVs")
+    for date_str, reason in list(reasons.items())[:10]:
+        print(f"[CACHE] {date_str}: {reason}")
+    if to_scrape:
+        # Scrape remaining dates in a single browser session to avoid per-date login overhead
+        print(f"[SCRAPE] Starting batch scrape of {len(to_scrape)} date(s) in one browser session...")
+        fresh = scrape_generation_batch(cfg, to_scrape)
+        print(f"[SCRAPE] Batch complete: {sum(1 for v in fresh.values() if v)} / {len(to_scrape)} succeeded\n")
+        for date_str in confirm_zero_days(fresh, reasons):
+            print(f"[CACHE] {date_str}: zero generation confirmed by re-scrape; will not re-scrape again")
+        scraped.update(fresh)
+    else:
+        print("[SCRAPE] Nothing to scrape\n")
 
     ok_count = 0
     fail_count = 0
@@ -951,7 +1199,7 @@ def main():
                 db_id=db_id,
                 target_date=d,
                 csv_path=csv_path,
-                prop_types=prop_types,
+                prop_types=get_db_property_types(token, db_id),  # memory hit; fresh after a refresh
                 revenue_config=revenue_config,
                 market_data_provider=market_data_provider,
             )
@@ -0,0 +1,295 @@
+"""
+Stark HTTP Client
+=================
+Browserless drop-in for stark_scraper.run()/run_batch(): signs in to Stark ID
+with requests (anti-forgery token + cookies), looks up the export meter via
+the Timeline group-tree search and downloads the half-hourly Active Power
+CSV for each date directly from the report export endpoint.
+
+stark_daily_sync uses it when STARK_CLIENT=http and falls back to the
+Playwright scraper for any date it cannot fetch.
+
+EXPERIMENTAL: the search and export endpoints below are inferred, not taken
+from a captured portal session, and have only been run against the local
+stub in tests/stark_portal_fixture.py. Confirm them against the live portal
+(browser dev tools, Network tab) before relying on this client.
+
+Endpoints (override if the portal moves them):
+  STARK_SIGNIN_URL     sign-in form            (default https://id.stark.co.uk/StarkID/SignIn)
+  STARK_PORTAL_BASE    portal origin           (default: wherever sign-in redirects to)
+  STARK_SEARCH_PATH    group-tree search XHR   (default /Portal/api/GroupTree/Search)
+  STARK_EXPORT_PATH    Timeline CSV export     (default /Portal/api/Timeline/Export)
+
+Usage:
+    STARK_CLIENT=http python stark_daily_sync.py --start 2026-03-01
+    python stark_http_client.py --date 2026-03-05 --output-dir stark_gen_data
+"""
+
+import argparse
+import os
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+DEFAULT_SIGNIN_URL = "https://id.stark.co.uk/StarkID/SignIn"
+DEFAULT_SEARCH_PATH = "/Portal/api/GroupTree/Search"
+DEFAULT_EXPORT_PATH = "/Portal/api/Timeline/Export"
+DEFAULT_SEARCH_TEXT = "2100042103940"
+DEFAULT_METER_ID = "K21W001099"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Same report settings the Playwright flow selects in the Timeline view.
+EXPORT_PARAMS = {
+    "energyType": "Power",
+    "powerType": "Active Power (kW)",
+    "interval": "Half Hourly",
+    "format": "csv",
+}
+
+
+class StarkHttpError(RuntimeError):
+    """Raised when the portal answers with something other than what we expect."""
+
+
+class _FormParser(HTMLParser):
+    """Collects the inputs of the first <form> on the sign-in page."""
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.inputs = []
+        self._in_form = False
+        self._done = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and not self._done:
+            self._in_form = True
+            self.action = attrs.get("action")
+        elif tag == "input" and self._in_form:
+            self.inputs.append(attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._in_form:
+            self._in_form = False
+            self._done = True
+
+
+def _on_signin_url(url):
+    return "starkid/signin" in (url or "").lower()
+
+
+def _digits_only(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def score_candidate(text, search_text, meter_id=""):
+    """Score a meter label the same way stark_scraper._pick_best_candidate does."""
+    text_lower = " ".join((text or "").split()).lower()
+    search_digits = _digits_only(search_text)
+    score = 0
+    if search_digits and search_digits in _digits_only(text):
+        score += 100
+    if search_text and search_text.lower() in text_lower:
+        score += 40
+    if meter_id and meter_id.lower() in text_lower:
+        score += 20
+    if re.search(r"\b(export|generation)\b", text_lower):
+        score += 10
+    return score
+
+
+class StarkHttpClient:
+    def __init__(self, signin_url=None, portal_base=None, session=None, timeout=30):
+        self.signin_url = signin_url or os.environ.get("STARK_SIGNIN_URL") or DEFAULT_SIGNIN_URL
+        self.portal_base = portal_base or os.environ.get("STARK_PORTAL_BASE") or None
+        self.search_path = os.environ.get("STARK_SEARCH_PATH") or DEFAULT_SEARCH_PATH
+        self.export_path = os.environ.get("STARK_EXPORT_PATH") or DEFAULT_EXPORT_PATH
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        self.timeout = timeout
+        self._credentials = None
+
+    def login(self, username, password):
+        """Submit the sign-in form; returns True when the portal lets us past it."""
+        self._credentials = (username, password)
+        page = self.session.get(self.signin_url, timeout=self.timeout)
+        page.raise_for_status()
+        parser = _FormParser()
+        parser.feed(page.text)
+        if not parser.inputs:
+            raise StarkHttpError(f"No sign-in form found at {page.url}")
+
+        form = {}
+        for field in parser.inputs:
+            name = field.get("name")
+            if not name:
+                continue
+            field_id = (field.get("id") or "").lower()
+            if field_id == "inputusernameoremail" or name.lower() in ("username", "email"):
+                form[name] = username
+            elif field_id == "inputpassword" or (field.get("type") or "").lower() == "password":
+                form[name] = password
+            elif (field.get("type") or "").lower() in ("hidden", "checkbox") and field.get("value") is not None:
+                form[name] = field["value"]
+
+        action = urljoin(page.url, parser.action or page.url)
+        resp = self.session.post(action, data=form, timeout=self.timeout, allow_redirects=True)
+        resp.raise_for_status()
+        if _on_signin_url(resp.url):
+            return False
+        if not self.portal_base:
+            parsed = urlparse(resp.url)
+            self.portal_base = f"{parsed.scheme}://{parsed.netloc}"
+        return True
+
+    def _get(self, path, params):
+        url = urljoin(self.portal_base + "/", path.lstrip("/"))
+        resp = self.session.get(url, params=params, timeout=self.timeout)
+        if _on_signin_url(resp.url) and self._credentials:
+            # Session expired mid-batch: sign in again once and retry.
+            if not self.login(*self._credentials):
+                raise StarkHttpError("Stark session expired and re-login failed")
+            resp = self.session.get(url, params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp
+
+    def find_meter(self, search_text, meter_id=""):
+        """Return (meter_key, label) of the best-matching export meter, or (None, "")."""
+        items = self._get(self.search_path, {"term": search_text}).json()
+        best = None
+        for item in items if isinstance(items, list) else []:
+            label = str(item.get("name") or item.get("text") or "")
+            score = score_candidate(label, search_text, meter_id)
+            if score > 0 and (best is None or score > best[0]):
+                best = (score, item.get("id"), label)
+        if not best:
+            return None, ""
+        return best[1], best[2]
+
+    def export_day(self, meter_key, target_date, output_path):
+        """Download one day's HH export to output_path; returns the path."""
+        day = target_date.strftime("%d/%m/%Y")
+        params = {"meterId": meter_key, "startDate": day, "endDate": day, **EXPORT_PARAMS}
+        resp = self._get(self.export_path, params)
+        text = resp.content.decode("utf-8-sig", errors="replace")
+        if not re.search(r"^\s*Period\s*,", text, re.M):
+            raise StarkHttpError(f"Export for {day} did not return a Timeline CSV")
+        Path(output_path).write_bytes(resp.content)
+        return Path(output_path)
+
+
+def _resolve_inputs(username, password, search_text):
+    username = (username or os.environ.get("STARK_USERNAME") or "").strip()
+    password = (password or os.environ.get("STARK_PASSWORD") or "").strip()
+    search_text = (
+        (search_text or "").strip()
+        or (os.environ.get("STARK_SEARCH_TEXT") or "").strip()
+        or (os.environ.get("STARK_EXPORT_MPAN") or "").strip()
+        or DEFAULT_SEARCH_TEXT
+    )
+    return username, password, search_text
+
+
+def run_batch(
+    dates,
+    username=None,
+    password=None,
+    site_name=None,
+    search_text=None,
+    output_dir=None,
+    headless=None,
+    browser_opts=None,
+):
+    """
+    Fetch multiple dates over one HTTP session. Same signature and return
+    shape as stark_scraper.run_batch(); site_name, headless and browser_opts are ignored.
+
+    Returns:
+        dict mapping date_str -> output path (str) or None on failure for that date
+    """
+    username, password, search_text = _resolve_inputs(username, password, search_text)
+    meter_id = os.environ.get("STARK_METER_ID") or DEFAULT_METER_ID
+    results = {d: None for d in dates}
+    if not username or not password:
+        print("Missing Stark credentials.")
+        return results
+    out_dir = Path(output_dir) if output_dir else Path.cwd()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    client = StarkHttpClient()
+    try:
+        if not client.login(username, password):
+            print("Stark HTTP login failed.")
+            return results
+        meter_key, label = client.find_meter(search_text, meter_id)
+    except (requests.RequestException, ValueError, StarkHttpError) as e:
+        print(f"Stark HTTP session error: {e}")
+        return results
+    if not meter_key:
+        print(f"MPAN search result not found for '{search_text}'. Aborting batch.")
+        return results
+    print(f"Using meter: {label}")
+
+    for date_str in dates:
+        try:
+            target_date = datetime.strptime(date_str, "%Y-%m-%d")
+        except ValueError:
+            continue
+        output_path = out_dir / f"stark_hh_data_{date_str}.csv"
+        try:
+            client.export_day(meter_key, target_date, output_path)
+            print(f"Success: {output_path.name}")
+            results[date_str] = str(output_path)
+        except (requests.RequestException, StarkHttpError) as e:
+            print(f"Error on {date_str}: {e}")
+    return results
+
+
+def run(
+    date_str,
+    username=None,
+    password=None,
+    site_name=None,
+    search_text=None,
+    output_dir=None,
+    headless=None,
+    browser_opts=None,
+):
+    """Fetch a single date; same signature and return value as stark_scraper.run()."""
+    return run_batch(
+        [date_str],
+        username=username,
+        password=password,
+        site_name=site_name,
+        search_text=search_text,
+        output_dir=output_dir,
+    ).get(date_str)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fetch Stark HH data over HTTP (no browser). EXPERIMENTAL: the portal "
+                    "endpoints are unverified; see the module docstring."
+    )
+    parser.add_argument("--date", type=str, required=True, help="Date in YYYY-MM-DD format")
+    parser.add_argument("--username", type=str, help="Stark username/email")
+    parser.add_argument("--password", type=str, help="Stark password")
+    parser.add_argument("--search-text", type=str, help="Meter search term (MPAN recommended)")
+    parser.add_argument("--output-dir", type=str, help="Directory to save downloaded CSV")
+    args = parser.parse_args()
+    saved = run(
+        date_str=args.date,
+        username=args.username,
+        password=args.password,
+        search_text=args.search_text,
+        output_dir=args.output_dir,
+    )
+    raise SystemExit(0 if saved else 1)
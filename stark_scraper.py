@@ -1,11 +1,28 @@
 import argparse
+import json
 import os
 import re
 import time
 from datetime import datetime
 from pathlib import Path
 
-from playwright.sync_api import sync_playwright
+from browser_session import browser_options, launch_portal_browser, resume_warm_session
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config.json"
+
+
+def _browser_kwargs(browser_opts=None):
+    """
+    launch_portal_browser() options: browser_opts if the caller passed
+    browser_options(cfg), else the "browser" section of config.json.
+    """
+    if browser_opts is not None:
+        return dict(browser_opts)
+    try:
+        cfg = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cfg = {}
+    return browser_options(cfg if isinstance(cfg, dict) else {})
 
 
 def _first_visible(locator, timeout_ms=5000):
@@ -165,6 +182,13 @@ def _open_timeline_from_links(page):
     return _timeline_ready(page, timeout_ms=12000)
 
 
+DEFAULT_SIGNIN_URL = "https://id.stark.co.uk/StarkID/SignIn"
+
+
+def _signin_url():
+    return os.environ.get("STARK_SIGNIN_URL") or DEFAULT_SIGNIN_URL
+
+
 def _on_signin_page(page):
     return "starkid/signin" in page.url.lower()
 
@@ -228,9 +252,11 @@ def _set_input_value(page, selector, value, timeout_ms=15000):
 
 
 def _login(page, username, password, attempts=2):
+    if resume_warm_session(page, "stark", _on_signin_page):
+        return True
     for attempt in range(1, attempts + 1):
         print(f"Logging in... (attempt {attempt}/{attempts})")
-        page.goto("https://id.stark.co.uk/StarkID/SignIn", wait_until="domcontentloaded")
+        page.goto(_signin_url(), wait_until="domcontentloaded")
         try:
             if page.is_visible("#onetrust-accept-btn-handler", timeout=3000):
                 page.click("#onetrust-accept-btn-handler")
@@ -355,6 +381,193 @@ def _open_timeline(page):
     return _open_timeline_from_links(page)
 
 
+def _dismiss_splash(page):
+    """Dismiss any splash/upsell modal that may intercept clicks (e.g. "Cost Reporting" splash)."""
+    try:
+        splash = page.locator("#splashModal")
+        if splash.count() > 0 and splash.first.is_visible(timeout=3000):
+            print("Dismissing splash modal...")
+            # Try the close button first, then Escape key as fallback
+            close_btn = splash.locator("button.close, button[data-dismiss='modal'], button[aria-label='Close'], .btn-close")
+            if close_btn.count() > 0:
+                close_btn.first.click(timeout=3000)
+            else:
+                page.keyboard.press("Escape")
+            splash.first.wait_for(state="hidden", timeout=5000)
+            print("Splash modal dismissed.")
+    except Exception as e:
+        print(f"Splash modal dismiss skipped: {e}")
+
+
+def _select_meter(page, search_text, meter_id):
+    """
+    Select the generation (export) meter in the Timeline group tree.
+    Returns True once the Timeline controls are available for that meter.
+    """
+    print(f"Selecting meter using search term: {search_text}...")
+    _dismiss_splash(page)
+    # Wait for KnockoutJS reportLoading/treeLoading to clear before clicking
+    page.wait_for_function(
+        "() => { const btn = document.querySelector('#btnOpenGroupTreeSearch'); return btn && !btn.disabled; }",
+        timeout=60000,
+    )
+    page.click("#btnOpenGroupTreeSearch")
+    page.wait_for_selector("#groupSearchInput", state="visible")
+    page.fill("#groupSearchInput", search_text)
+    page.press("#groupSearchInput", "Enter")
+    search_result, search_label, search_score = _pick_best_candidate(
+        page.locator("#groupSearchResults button, .groupSearchResult button, .searchItemName"),
+        search_text=search_text,
+        meter_id=meter_id,
+        timeout_ms=12000,
+    )
+    if search_result:
+        print(f"Clicking MPAN search result (score={search_score}): {search_label}")
+        search_result.click()
+        page.wait_for_timeout(1000)
+    else:
+        # Do NOT fall back to site name — that hits the import/consumption meter.
+        # Only the explicit MPAN search returns the generation (export) meter.
+        samples = _sample_locator_text(
+            page.locator("#groupSearchResults button, .groupSearchResult button, .searchItemName")
+        )
+        if samples:
+            print("Available search results:")
+            for sample in samples:
+                print(f"  - {sample}")
+        print(f"MPAN search result not found for '{search_text}'. Aborting to avoid selecting wrong meter.")
+        _save_debug_artifacts(page, "mpan_search_missing")
+        return False
+    tree_item, tree_label, tree_score = _pick_best_candidate(
+        page.locator(".treeItemName"),
+        search_text=search_text,
+        meter_id=meter_id,
+        timeout_ms=12000,
+    )
+    if not tree_item:
+        # Do NOT fall back to site name tree item.
+        samples = _sample_locator_text(page.locator(".treeItemName"))
+        if samples:
+            print("Available tree items:")
+            for sample in samples:
+                print(f"  - {sample}")
+        print(f"Could not locate generation meter tree item for MPAN '{search_text}'. Aborting.")
+        _save_debug_artifacts(page, "tree_item_missing")
+        return False
+    print(f"Double-clicking tree item (score={tree_score}): {tree_label}")
+    time.sleep(1)
+    tree_item.dblclick()
+    time.sleep(1)
+    try:
+        modal = page.locator(".modalCurtain")
+        if modal.count() > 0 and modal.first.is_visible():
+            page.keyboard.press("Escape")
+        page.locator(".modalCurtain").first.wait_for(state="hidden", timeout=5000)
+    except Exception:
+        pass
+
+    if not _timeline_ready(page, timeout_ms=3000):
+        print("Timeline controls not visible after meter selection; reopening Timeline view...")
+        if not _open_timeline(page):
+            print("Could not reopen Timeline view after meter selection.")
+            _save_debug_artifacts(page, "timeline_missing_after_meter")
+            return False
+    return True
+
+
+def _download_report(page, formatted_date, output_path, field_timeout_ms=30000):
+    """Run the Timeline report for one DD/MM/YYYY date and save its CSV export."""
+    print(f"Setting date to {formatted_date}...")
+    page.wait_for_selector("#StartDate", state="attached", timeout=field_timeout_ms)
+    page.evaluate(f"document.getElementById('StartDate').value = '{formatted_date}'")
+    page.evaluate(f"document.getElementById('EndDate').value = '{formatted_date}'")
+    page.evaluate("document.getElementById('StartDate').dispatchEvent(new Event('change'))")
+    page.evaluate("document.getElementById('EndDate').dispatchEvent(new Event('change'))")
+    # Meter selection can reset type; enforce Power right before report run.
+    try:
+        page.select_option("#energyType", label="Power")
+        page.select_option("#powerType", label="Active Power (kW)")
+        page.select_option("#Interval", label="Half Hourly")
+    except Exception:
+        pass
+    print("Running report...")
+    time.sleep(2)
+    page.click("#buttonRunReport")
+    print("Waiting for report generation...")
+    download_menu_btn = page.locator("#btnOpenGraphicDownloadMenu")
+    download_menu_btn.wait_for(state="visible", timeout=60000)
+    print("Initiating download...")
+    download_menu_btn.click()
+    with page.expect_download(timeout=60000) as download_info:
+        page.wait_for_selector("text=CSV", state="visible")
+        page.click("text=CSV")
+    download_info.value.save_as(str(output_path))
+
+
+class _PageHealth:
+    """
+    Tracks per-date latency and JS heap of the batch page so run_batch() can
+    recycle it before the Timeline view's accumulated DOM/chart state slows
+    every report down.
+
+    Thresholds (env):
+      STARK_RECYCLE_HEAP_MB   JSHeapUsedSize above which the page is recycled (default 350)
+      STARK_RECYCLE_SLOWDOWN  recycle when a date takes this many times the baseline (default 2.0)
+      STARK_RECYCLE_EVERY     hard cap on dates per page (default 150, 0 = off)
+    """
+
+    BASELINE_SAMPLES = 3
+
+    def __init__(self):
+        self.heap_limit_mb = float(os.environ.get("STARK_RECYCLE_HEAP_MB", "350"))
+        self.slowdown = float(os.environ.get("STARK_RECYCLE_SLOWDOWN", "2.0"))
+        self.max_dates = int(os.environ.get("STARK_RECYCLE_EVERY", "150"))
+        self.cdp = None
+        self.reset_page(None)
+
+    def reset_page(self, page):
+        self.dates_on_page = 0
+        self.samples = []
+        self.cdp = None
+        if page is None:
+            return
+        try:
+            self.cdp = page.context.new_cdp_session(page)
+            self.cdp.send("Performance.enable")
+        except Exception:
+            self.cdp = None  # non-Chromium or remote browser without CDP access
+
+    def heap_mb(self):
+        if self.cdp is None:
+            return None
+        try:
+            metrics = self.cdp.send("Performance.getMetrics").get("metrics", [])
+        except Exception:
+            return None
+        for metric in metrics:
+            if metric.get("name") == "JSHeapUsedSize":
+                return metric.get("value", 0) / (1024 * 1024)
+        return None
+
+    def record(self, elapsed_s, ok):
+        """Record one date; returns a reason string when the page should be recycled."""
+        self.dates_on_page += 1
+        if not ok:
+            return "report failed"
+        if len(self.samples) < self.BASELINE_SAMPLES:
+            self.samples.append(elapsed_s)
+        else:
+            baseline = sorted(self.samples)[len(self.samples) // 2]
+            if baseline > 0 and elapsed_s > baseline * self.slowdown:
+                return f"slow report ({elapsed_s:.1f}s vs {baseline:.1f}s baseline)"
+        heap = self.heap_mb()
+        if heap is not None and heap > self.heap_limit_mb:
+            return f"JS heap {heap:.0f} MB"
+        if self.max_dates and self.dates_on_page >= self.max_dates:
+            return f"{self.dates_on_page} dates on one page"
+        return None
+
+
 def run(
     date_str,
     username=None,
@@ -363,6 +576,7 @@ def run(
     search_text=None,
     output_dir=None,
     headless=None,
+    browser_opts=None,
 ):
     username = _normalize_secret(username or os.environ.get("STARK_USERNAME"))
     password = _normalize_secret(password or os.environ.get("STARK_PASSWORD"))
@@ -391,18 +605,11 @@ def run(
         headless = _env_headless(default=True)
     print(f"Goal: Scrape HH data for {site_name} (Search: {search_text}) on {formatted_date}")
     print(f"Output: {output_path}")
+    from playwright.sync_api import sync_playwright
+
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=headless,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-        )
+        browser, context, blocker = launch_portal_browser(
+            p, "stark", headless=headless, stealth=True, **_browser_kwargs(browser_opts))
         page = context.new_page()
         try:
             print("Navigating to login page...")
@@ -420,115 +627,10 @@ def run(
                 print(f"Saved navigation debug screenshot to {debug_shot}")
                 return None
 
-            print(f"Selecting meter using search term: {search_text}...")
-            # Dismiss any splash/upsell modal that may intercept clicks (e.g. "Cost Reporting" splash)
-            try:
-                splash = page.locator("#splashModal")
-                if splash.count() > 0 and splash.first.is_visible(timeout=3000):
-                    print("Dismissing splash modal...")
-                    # Try the close button first, then Escape key as fallback
-                    close_btn = splash.locator("button.close, button[data-dismiss='modal'], button[aria-label='Close'], .btn-close")
-                    if close_btn.count() > 0:
-                        close_btn.first.click(timeout=3000)
-                    else:
-                        page.keyboard.press("Escape")
-                    splash.first.wait_for(state="hidden", timeout=5000)
-                    print("Splash modal dismissed.")
-            except Exception as e:
-                print(f"Splash modal dismiss skipped: {e}")
-            # Wait for KnockoutJS reportLoading/treeLoading to clear before clicking
-            page.wait_for_function(
-                "() => { const btn = document.querySelector('#btnOpenGroupTreeSearch'); return btn && !btn.disabled; }",
-                timeout=60000,
-            )
-            page.click("#btnOpenGroupTreeSearch")
-            page.wait_for_selector("#groupSearchInput", state="visible")
-            page.fill("#groupSearchInput", search_text)
-            page.press("#groupSearchInput", "Enter")
-            search_result, search_label, search_score = _pick_best_candidate(
-                page.locator("#groupSearchResults button, .groupSearchResult button, .searchItemName"),
-                search_text=search_text,
-                meter_id=meter_id,
-                timeout_ms=12000,
-            )
-            if search_result:
-                print(f"Clicking MPAN search result (score={search_score}): {search_label}")
-                search_result.click()
-                page.wait_for_timeout(1000)
-            else:
-                # Do NOT fall back to site name — that hits the import/consumption meter.
-                # Only the explicit MPAN search returns the generation (export) meter.
-                samples = _sample_locator_text(
-                    page.locator("#groupSearchResults button, .groupSearchResult button, .searchItemName")
-                )
-                if samples:
-                    print("Available search results:")
-                    for sample in samples:
-                        print(f"  - {sample}")
-                print(f"MPAN search result not found for '{search_text}'. Aborting to avoid selecting wrong meter.")
-                _save_debug_artifacts(page, "mpan_search_missing")
-                return None
-            tree_item, tree_label, tree_score = _pick_best_candidate(
-                page.locator(".treeItemName"),
-                search_text=search_text,
-                meter_id=meter_id,
-                timeout_ms=12000,
-            )
-            if not tree_item:
-                # Do NOT fall back to site name tree item.
-                samples = _sample_locator_text(page.locator(".treeItemName"))
-                if samples:
-                    print("Available tree items:")
-                    for sample in samples:
-                        print(f"  - {sample}")
-                print(f"Could not locate generation meter tree item for MPAN '{search_text}'. Aborting.")
-                _save_debug_artifacts(page, "tree_item_missing")
+            if not _select_meter(page, search_text, meter_id):
                 return None
-            print(f"Double-clicking tree item (score={tree_score}): {tree_label}")
-            time.sleep(1)
-            tree_item.dblclick()
-            time.sleep(1)
-            try:
-                modal = page.locator(".modalCurtain")
-                if modal.count() > 0 and modal.first.is_visible():
-                    page.keyboard.press("Escape")
-                page.locator(".modalCurtain").first.wait_for(state="hidden", timeout=5000)
-            except Exception:
-                pass
 
-            if not _timeline_ready(page, timeout_ms=3000):
-                print("Timeline controls not visible after meter selection; reopening Timeline view...")
-                if not _open_timeline(page):
-                    print("Could not reopen Timeline view after meter selection.")
-                    _save_debug_artifacts(page, "timeline_missing_after_meter")
-                    return None
-
-            print(f"Setting date to {formatted_date}...")
-            page.wait_for_selector("#StartDate", state="attached", timeout=30000)
-            page.evaluate(f"document.getElementById('StartDate').value = '{formatted_date}'")
-            page.evaluate(f"document.getElementById('EndDate').value = '{formatted_date}'")
-            page.evaluate("document.getElementById('StartDate').dispatchEvent(new Event('change'))")
-            page.evaluate("document.getElementById('EndDate').dispatchEvent(new Event('change'))")
-            # Meter selection can reset type; enforce Power right before report run.
-            try:
-                page.select_option("#energyType", label="Power")
-                page.select_option("#powerType", label="Active Power (kW)")
-                page.select_option("#Interval", label="Half Hourly")
-            except Exception:
-                pass
-            print("Running report...")
-            time.sleep(2)
-            page.click("#buttonRunReport")
-            print("Waiting for report generation...")
-            download_menu_btn = page.locator("#btnOpenGraphicDownloadMenu")
-            download_menu_btn.wait_for(state="visible", timeout=60000)
-            print("Initiating download...")
-            download_menu_btn.click()
-            with page.expect_download(timeout=60000) as download_info:
-                page.wait_for_selector("text=CSV", state="visible")
-                page.click("text=CSV")
-            download = download_info.value
-            download.save_as(str(output_path))
+            _download_report(page, formatted_date, output_path)
             print(f"Success! Data saved to: {output_path.name}")
             return str(output_path)
         except Exception as e:
@@ -538,7 +640,49 @@ def run(
             print(f"Saved debug screenshot to {debug_shot}")
             return None
         finally:
+            if blocker:
+                print(blocker.summary())
             browser.close()
+def _prepare_timeline_page(page, username, password, search_text, meter_id):
+    """Log in (or reuse the session), open the Timeline view and select the meter."""
+    if _on_signin_page(page) or page.url in ("", "about:blank"):
+        if not _login(page, username, password):
+            print("Login failed.")
+            return False
+        print("Login successful.")
+    page.wait_for_load_state("networkidle")
+    print("Navigating to Dynamic Reports > Timeline...")
+    if not _open_timeline(page):
+        if not _on_signin_page(page):
+            print("Could not open Timeline view.")
+            return False
+        # Session dropped while recycling; log in again and retry once.
+        if not _login(page, username, password) or not _open_timeline(page):
+            print("Could not open Timeline view.")
+            return False
+    return _select_meter(page, search_text, meter_id)
+
+
+def _recycle_page(context, page, username, password, search_text, meter_id):
+    """
+    Replace a degraded page with a fresh one in the same context (cookies are
+    kept, so no new login is normally needed) and restore the meter selection.
+    """
+    timeline_url = page.url
+    try:
+        page.close()
+    except Exception:
+        pass
+    fresh = context.new_page()
+    try:
+        fresh.goto(timeline_url, wait_until="domcontentloaded")
+        if _prepare_timeline_page(fresh, username, password, search_text, meter_id):
+            return fresh
+    except Exception as e:
+        print(f"Page recycle failed: {e}")
+    return None
+
+
 def run_batch(
     dates,
     username=None,
@@ -547,6 +691,7 @@ def run_batch(
     search_text=None,
     output_dir=None,
     headless=None,
+    browser_opts=None,
 ):
     """
     Scrape multiple dates in a single browser session.
@@ -577,102 +722,24 @@ def run_batch(
     out_dir = Path(output_dir) if output_dir else Path.cwd()
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    from playwright.sync_api import sync_playwright
+
     results = {}
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=headless,
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        )
-        context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-        )
+        browser, context, blocker = launch_portal_browser(
+            p, "stark", headless=headless, stealth=True, **_browser_kwargs(browser_opts))
         page = context.new_page()
+        health = _PageHealth()
         try:
             # --- One-time setup: login, navigate to timeline, select meter ---
             print("Navigating to login page...")
-            if not _login(page, username, password):
-                print("Login failed.")
-                browser.close()
-                return {d: None for d in dates}
-            print("Login successful.")
-            page.wait_for_load_state("networkidle")
-            print("Navigating to Dynamic Reports > Timeline...")
-            if not _open_timeline(page):
-                print("Could not open Timeline view.")
+            if not _prepare_timeline_page(page, username, password, search_text, meter_id):
                 browser.close()
                 return {d: None for d in dates}
-
-            # Dismiss splash modal once
-            try:
-                splash = page.locator("#splashModal")
-                if splash.count() > 0 and splash.first.is_visible(timeout=3000):
-                    print("Dismissing splash modal...")
-                    close_btn = splash.locator("button.close, button[data-dismiss='modal'], button[aria-label='Close'], .btn-close")
-                    if close_btn.count() > 0:
-                        close_btn.first.click(timeout=3000)
-                    else:
-                        page.keyboard.press("Escape")
-                    splash.first.wait_for(state="hidden", timeout=5000)
-                    print("Splash modal dismissed.")
-            except Exception as e:
-                print(f"Splash modal dismiss skipped: {e}")
-
-            print(f"Selecting meter: {search_text}...")
-            page.wait_for_function(
-                "() => { const btn = document.querySelector('#btnOpenGroupTreeSearch'); return btn && !btn.disabled; }",
-                timeout=60000,
-            )
-            page.click("#btnOpenGroupTreeSearch")
-            page.wait_for_selector("#groupSearchInput", state="visible")
-            page.fill("#groupSearchInput", search_text)
-            page.press("#groupSearchInput", "Enter")
-            search_result, search_label, search_score = _pick_best_candidate(
-                page.locator("#groupSearchResults button, .groupSearchResult button, .searchItemName"),
-                search_text=search_text,
-                meter_id=meter_id,
-                timeout_ms=12000,
-            )
-            if not search_result:
-                print(f"MPAN search result not found for '{search_text}'. Aborting batch.")
-                browser.close()
-                return {d: None for d in dates}
-            print(f"Clicking MPAN search result (score={search_score}): {search_label}")
-            search_result.click()
-            page.wait_for_timeout(1000)
-
-            tree_item, tree_label, tree_score = _pick_best_candidate(
-                page.locator(".treeItemName"),
-                search_text=search_text,
-                meter_id=meter_id,
-                timeout_ms=12000,
-            )
-            if not tree_item:
-                print(f"Could not locate generation meter tree item. Aborting batch.")
-                browser.close()
-                return {d: None for d in dates}
-            print(f"Double-clicking tree item (score={tree_score}): {tree_label}")
-            time.sleep(1)
-            tree_item.dblclick()
-            time.sleep(1)
-            try:
-                modal = page.locator(".modalCurtain")
-                if modal.count() > 0 and modal.first.is_visible():
-                    page.keyboard.press("Escape")
-                page.locator(".modalCurtain").first.wait_for(state="hidden", timeout=5000)
-            except Exception:
-                pass
-            if not _timeline_ready(page, timeout_ms=3000):
-                if not _open_timeline(page):
-                    print("Could not reopen Timeline after meter selection. Aborting batch.")
-                    browser.close()
-                    return {d: None for d in dates}
+            health.reset_page(page)
 
             # --- Per-date loop: just change date, run, download ---
-            for date_str in dates:
+            for index, date_str in enumerate(dates):
                 try:
                     target_date = datetime.strptime(date_str, "%Y-%m-%d")
                     formatted_date = target_date.strftime("%d/%m/%Y")
@@ -680,31 +747,9 @@ def run_batch(
                     results[date_str] = None
                     continue
                 output_path = out_dir / f"stark_hh_data_{date_str}.csv"
-                print(f"Setting date to {formatted_date}...")
+                t0 = time.time()
                 try:
-                    page.wait_for_selector("#StartDate", state="attached", timeout=15000)
-                    page.evaluate(f"document.getElementById('StartDate').value = '{formatted_date}'")
-                    page.evaluate(f"document.getElementById('EndDate').value = '{formatted_date}'")
-                    page.evaluate("document.getElementById('StartDate').dispatchEvent(new Event('change'))")
-                    page.evaluate("document.getElementById('EndDate').dispatchEvent(new Event('change'))")
-                    try:
-                        page.select_option("#energyType", label="Power")
-                        page.select_option("#powerType", label="Active Power (kW)")
-                        page.select_option("#Interval", label="Half Hourly")
-                    except Exception:
-                        pass
-                    print("Running report...")
-                    time.sleep(2)
-                    page.click("#buttonRunReport")
-                    print("Waiting for report generation...")
-                    download_menu_btn = page.locator("#btnOpenGraphicDownloadMenu")
-                    download_menu_btn.wait_for(state="visible", timeout=60000)
-                    print("Initiating download...")
-                    download_menu_btn.click()
-                    with page.expect_download(timeout=60000) as download_info:
-                        page.wait_for_selector("text=CSV", state="visible")
-                        page.click("text=CSV")
-                    download_info.value.save_as(str(output_path))
+                    _download_report(page, formatted_date, output_path, field_timeout_ms=15000)
                     print(f"Success: {output_path.name}")
                     results[date_str] = str(output_path)
                 except Exception as e:
@@ -714,10 +759,23 @@ def run_batch(
                     except Exception:
                         pass
                     results[date_str] = None
+
+                reason = health.record(time.time() - t0, ok=results[date_str] is not None)
+                if reason and index < len(dates) - 1:
+                    print(f"Recycling page: {reason}")
+                    page = _recycle_page(context, page, username, password, search_text, meter_id)
+                    if page is None:
+                        print("Could not restore meter selection after recycle. Aborting batch.")
+                        break
+                    health.reset_page(page)
         except Exception as e:
             print(f"Batch session error: {e}")
         finally:
+            if blocker:
+                print(blocker.summary())
             browser.close()
+    for date_str in dates:
+        results.setdefault(date_str, None)
     return results
 
 
@@ -0,0 +1,122 @@
+"""Local stand-in for the FusionSolar Northbound API (/thirdData/*)."""
+
+import json
+import secrets
+import threading
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+USERNAME = "api_user"
+SYSTEM_CODE = "s3cret"
+STATION_CODE = "NE=123"
+SECOND_STATION_CODE = "NE=456"
+DEVICES = [
+    {"id": 101, "devName": "INV-01", "devTypeId": 1, "esnCode": "ES01", "stationCode": STATION_CODE},
+    {"id": 102, "devName": "INV-02", "devTypeId": 1, "esnCode": "ES02", "stationCode": STATION_CODE},
+    {"id": 201, "devName": "EMI-01", "devTypeId": 10, "esnCode": "EM01", "stationCode": STATION_CODE},
+    {"id": 301, "devName": "INV-01", "devTypeId": 1, "esnCode": "ES31", "stationCode": SECOND_STATION_CODE},
+]
+RUN_STATE = {101: 1, 102: 0, 301: 1}
+STATION_TZ = ZoneInfo("Europe/London")
+
+
+def _day_start_ms(day):
+    return int(datetime.combine(day, datetime.min.time(), tzinfo=STATION_TZ).timestamp() * 1000)
+
+
+class NorthboundFixture:
+    """
+    Threaded HTTP server replaying the Northbound calls the client makes.
+    Set rate_limit_next to answer the next N data calls with failCode 407,
+    or clear tokens to force failCode 305.
+    """
+
+    def __init__(self):
+        self.tokens = set()
+        self.logins = 0
+        self.calls = []
+        self.rate_limit_next = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reply(self, endpoint, payload):
+        ids = [int(i) for i in str(payload.get("devIds", "")).split(",") if i]
+        codes = [c for c in str(payload.get("stationCodes", "")).split(",") if c]
+        if endpoint == "getStationRealKpi":
+            return [{"stationCode": code, "dataItemMap": {
+                "day_power": 1234.5 if code == STATION_CODE else 500.0, "total_power": 987654.0, "day_income": 150.25,
+            }} for code in codes]
+        if endpoint == "getDevList":
+            return [d for d in DEVICES if d["stationCode"] in codes]
+        if endpoint == "getDevRealKpi":
+            if payload.get("devTypeId") == 10:
+                return [{"devId": i, "dataItemMap": {"radiant_total": 12.6}} for i in ids]
+            return [{"devId": i, "dataItemMap": {"run_state": RUN_STATE[i]}} for i in ids]
+        if endpoint == "getDevFiveMinutes":
+            start = int(payload["collectTime"])
+            return [
+                {"devId": i, "collectTime": start + slot * 300000, "dataItemMap": {"active_power": 6.0}}
+                for i in ids for slot in range(288)
+            ]
+        if endpoint == "getKpiStationDay":
+            month = datetime.fromtimestamp(int(payload["collectTime"]) / 1000, STATION_TZ).date()
+            return [
+                {"collectTime": _day_start_ms(date(month.year, month.month, d)), "dataItemMap": {
+                    "PVYield": 1000.0 + d, "inverter_power": 990.0 + d, "radiation_intensity": 3.0,
+                }}
+                for d in (1, 2)
+            ]
+        return None
+
+    def _handler_class(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or []):
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                endpoint = self.path.rsplit("/", 1)[-1]
+                if endpoint == "login":
+                    if payload != {"userName": USERNAME, "systemCode": SYSTEM_CODE}:
+                        return self._send({"success": False, "failCode": 20001, "data": None})
+                    fixture.logins += 1
+                    token = secrets.token_hex(8)
+                    fixture.tokens.add(token)
+                    return self._send({"success": True, "failCode": 0, "data": None},
+                                      headers=[("xsrf-token", token)])
+                fixture.calls.append(endpoint)
+                if self.headers.get("xsrf-token") not in fixture.tokens:
+                    return self._send({"success": False, "failCode": 305, "data": "USER_MUST_RELOGIN"})
+                if fixture.rate_limit_next:
+                    fixture.rate_limit_next -= 1
+                    return self._send({"success": False, "failCode": 407, "data": "ACCESS_FREQUENCY_IS_TOO_HIGH"})
+                return self._send({"success": True, "failCode": 0, "data": fixture.reply(endpoint, payload)})
+
+        return Handler
@@ -0,0 +1,152 @@
+"""Local stand-in for the Stark portal: sign-in form, Timeline view and CSV export."""
+
+import json
+import secrets
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "stark_portal"
+
+USERNAME = "ops@example.com"
+PASSWORD = "correct horse"
+MPAN = "2100042103940"
+METER_ID = "K21W001099"
+METERS = [
+    {"id": "import-1", "name": f"Point Lane Import {METER_ID[:-1]}0"},
+    {"id": "export-1", "name": f"{MPAN} Point Lane Export ({METER_ID})"},
+]
+
+
+def export_csv(date_text, active_power_kw=120.0):
+    lines = [
+        "Report,Timeline",
+        f"Dates,{date_text} - {date_text}",
+        "",
+        "Period,Active Power (kW)",
+    ]
+    for sp in range(48):
+        start = f"{sp // 2:02d}:{(sp % 2) * 30:02d}"
+        lines.append(f"{start},{active_power_kw:.1f}")
+    return "\n".join(lines) + "\n"
+
+
+class StarkPortalFixture:
+    """
+    Threaded HTTP server replaying the parts of the Stark portal the scraper
+    touches. Sign-in rejects "HeadlessChrome" user agents, like the bot
+    checks that forced CI onto a headed browser.
+    """
+
+    def __init__(self):
+        self.sessions = set()
+        self.exports = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def signin_url(self):
+        return f"{self.base_url}/StarkID/SignIn"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler_class(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _cookies(self):
+                return SimpleCookie(self.headers.get("Cookie", ""))
+
+            def _logged_in(self):
+                morsel = self._cookies().get("StarkSession")
+                return bool(morsel and morsel.value in fixture.sessions)
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or []):
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _redirect(self, location, headers=None):
+                self._send(302, b"", headers=[("Location", location)] + list(headers or []))
+
+            def _signin_page(self, error=False):
+                token = secrets.token_hex(8)
+                html = (FIXTURE_DIR / "signin.html").read_text(encoding="utf-8")
+                html = html.replace("{{csrf_token}}", token)
+                html = html.replace("{{error_style}}", "" if error else "display: none")
+                self._send(200, html, headers=[("Set-Cookie", f"Antiforgery={token}; Path=/")])
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == "/StarkID/SignIn":
+                    return self._signin_page()
+                if not self._logged_in():
+                    return self._redirect("/StarkID/SignIn")
+                if url.path == "/Portal/Home":
+                    return self._send(200, (FIXTURE_DIR / "home.html").read_bytes())
+                if url.path == "/Portal/Reports/Timeline":
+                    return self._send(200, (FIXTURE_DIR / "timeline.html").read_bytes())
+                if url.path == "/Portal/api/GroupTree/Search":
+                    term = (query.get("term") or [""])[0]
+                    hits = [m for m in METERS if term and term in m["name"]]
+                    return self._send(200, json.dumps(hits), content_type="application/json")
+                if url.path == "/Portal/api/Timeline/Export":
+                    params = {k: v[0] for k, v in query.items()}
+                    fixture.exports.append(params)
+                    if params.get("meterId") != "export-1":
+                        return self._send(400, "wrong meter", content_type="text/plain")
+                    day = params.get("startDate", "")
+                    return self._send(
+                        200,
+                        export_csv(day),
+                        content_type="text/csv",
+                        headers=[("Content-Disposition", 'attachment; filename="Timeline.csv"')],
+                    )
+                return self._send(404, "not found", content_type="text/plain")
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                if url.path != "/StarkID/SignIn":
+                    return self._send(404, "not found", content_type="text/plain")
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+                csrf_cookie = self._cookies().get("Antiforgery")
+                valid = (
+                    csrf_cookie is not None
+                    and form.get("__RequestVerificationToken") == csrf_cookie.value
+                    and form.get("Username") == USERNAME
+                    and form.get("Password") == PASSWORD
+                    and "HeadlessChrome" not in self.headers.get("User-Agent", "")
+                )
+                if not valid:
+                    return self._signin_page(error=True)
+                session = secrets.token_hex(16)
+                fixture.sessions.add(session)
+                return self._redirect(
+                    "/Portal/Home", headers=[("Set-Cookie", f"StarkSession={session}; Path=/; HttpOnly")]
+                )
+
+        return Handler
@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import browser_session
+
+
+class ResourceBlockerTests(unittest.TestCase):
+    def setUp(self):
+        self.blocker = browser_session.ResourceBlocker(
+            first_party_hosts=browser_session.PORTAL_HOSTS["fusionsolar"],
+            allow_hosts=["maps.example.com"],
+        )
+
+    def test_blocks_heavy_resource_types_on_first_party_host(self):
+        url = "https://uni001eu5.fusionsolar.huawei.com/assets/logo.png"
+        self.assertEqual(self.blocker.should_block(url, "image"), "image")
+        self.assertEqual(self.blocker.should_block(url, "font"), "font")
+
+    def test_keeps_first_party_scripts_xhr_and_documents(self):
+        base = "https://uni001eu5.fusionsolar.huawei.com"
+        self.assertIsNone(self.blocker.should_block(f"{base}/app.js", "script"))
+        self.assertIsNone(self.blocker.should_block(f"{base}/rest/pvms/web/x", "xhr"))
+        self.assertIsNone(self.blocker.should_block(f"{base}/cloud.html", "document"))
+
+    def test_blocks_third_party_subresources_but_not_navigations(self):
+        self.assertEqual(
+            self.blocker.should_block("https://www.google-analytics.com/collect", "xhr"),
+            "third-party",
+        )
+        self.assertIsNone(self.blocker.should_block("https://id.other-sso.com/login", "document"))
+
+    def test_allow_list_and_default_cdns_are_never_blocked(self):
+        self.assertIsNone(self.blocker.should_block("https://maps.example.com/tile.png", "image"))
+        self.assertIsNone(self.blocker.should_block("https://cdn.jsdelivr.net/npm/x.js", "script"))
+
+    def test_data_urls_pass_through(self):
+        self.assertIsNone(self.blocker.should_block("data:image/png;base64,AAAA", "image"))
+
+    def test_route_handler_aborts_and_counts(self):
+        route = mock.Mock()
+        route.request = SimpleNamespace(url="https://tracker.example.net/p.gif", resource_type="image")
+        self.blocker.handle_route(route)
+        route.abort.assert_called_once_with()
+        route.continue_.assert_not_called()
+        self.assertEqual(self.blocker.blocked_requests, 1)
+        self.assertIn("tracker.example.net", self.blocker.summary())
+
+
+class LaunchPortalBrowserTests(unittest.TestCase):
+    def _playwright(self):
+        context = mock.Mock()
+        browser = mock.Mock()
+        browser.new_context.return_value = context
+        playwright = mock.Mock()
+        playwright.chromium.launch.return_value = browser
+        return playwright, browser, context
+
+    def test_installs_route_handler_by_default(self):
+        playwright, _, context = self._playwright()
+        with mock.patch.dict(os.environ, {"BROWSER_ALLOW_HOSTS": "extra.example.org"}, clear=False):
+            os.environ.pop("BROWSER_BLOCK_RESOURCES", None)
+            _, _, blocker = browser_session.launch_portal_browser(playwright, "stark")
+        context.route.assert_called_once()
+        self.assertIn("extra.example.org", blocker.allow_hosts)
+
+    def test_third_party_blocking_is_opt_in_per_portal(self):
+        playwright, _, _ = self._playwright()
+        with mock.patch.dict(os.environ):
+            os.environ.pop("BROWSER_BLOCK_RESOURCES", None)
+            os.environ.pop("BROWSER_BLOCK_THIRD_PARTY", None)
+            _, _, blocker = browser_session.launch_portal_browser(playwright, "stark")
+            self.assertIsNone(blocker.should_block("https://cdn.timeline.example/app.js", "script"))
+            self.assertEqual(blocker.should_block("https://x.stark.co.uk/logo.png", "image"), "image")
+            _, _, blocker = browser_session.launch_portal_browser(
+                playwright, "stark", block_third_party=["fusionsolar"])
+            self.assertFalse(blocker.block_third_party)
+            os.environ["BROWSER_BLOCK_THIRD_PARTY"] = "stark"
+            _, _, blocker = browser_session.launch_portal_browser(playwright, "stark")
+            self.assertEqual(blocker.should_block("https://cdn.timeline.example/app.js", "script"), "third-party")
+
+    def test_connects_to_warm_service_with_portal_storage_state(self):
+        playwright, browser, context = self._playwright()
+        playwright.chromium.connect_over_cdp.return_value = browser
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "stark_state.json").write_text("{}")
+            env = {"BROWSER_SERVICE_DIR": tmp, "BROWSER_SERVICE_ENDPOINT": "http://127.0.0.1:9333"}
+            with mock.patch.dict(os.environ, env):
+                browser_session.launch_portal_browser(playwright, "stark")
+        playwright.chromium.connect_over_cdp.assert_called_once()
+        playwright.chromium.launch.assert_not_called()
+        kwargs = browser.new_context.call_args.kwargs
+        self.assertTrue(kwargs["storage_state"].endswith("stark_state.json"))
+
+    def test_falls_back_to_local_launch_when_service_unreachable(self):
+        playwright, _, _ = self._playwright()
+        playwright.chromium.connect_over_cdp.side_effect = RuntimeError("refused")
+        with mock.patch.dict(os.environ, {"BROWSER_SERVICE_ENDPOINT": "http://127.0.0.1:1"}):
+            browser_session.launch_portal_browser(playwright, "fusionsolar")
+        playwright.chromium.launch.assert_called_once()
+
+    def test_env_kill_switch_disables_blocking(self):
+        playwright, _, context = self._playwright()
+        with mock.patch.dict(os.environ, {"BROWSER_BLOCK_RESOURCES": "0"}):
+            _, _, blocker = browser_session.launch_portal_browser(playwright, "stark")
+        self.assertIsNone(blocker)
+        context.route.assert_not_called()
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_user_agent_uses_real_version_without_headless_marker(self):
+        browser = SimpleNamespace(version="150.0.7000.1")
+        ua = browser_session.user_agent_for(browser)
+        self.assertIn("Chrome/150.0.7000.1", ua)
+        self.assertNotIn("Headless", ua)
+
+    def test_context_options_pin_locale_timezone_and_downloads(self):
+        opts = browser_session.context_options(SimpleNamespace(version="150.0"))
+        self.assertEqual(opts["locale"], "en-GB")
+        self.assertEqual(opts["timezone_id"], "Europe/London")
+        self.assertTrue(opts["accept_downloads"])
+
+    def test_headless_launch_falls_back_when_channel_missing(self):
+        playwright = mock.Mock()
+        playwright.chromium.launch.side_effect = [RuntimeError("no channel"), mock.sentinel.browser]
+        browser = browser_session.launch_chromium(playwright, True, [])
+        self.assertIs(browser, mock.sentinel.browser)
+        self.assertEqual(playwright.chromium.launch.call_args_list[0].kwargs["channel"], "chromium")
+
+
+class WarmSessionTests(unittest.TestCase):
+    def test_endpoint_read_from_service_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "endpoint.json").write_text(json.dumps({"endpoint": "http://127.0.0.1:9333", "pid": os.getpid()}))
+            with mock.patch.dict(os.environ, {"BROWSER_SERVICE_DIR": tmp}):
+                os.environ.pop("BROWSER_SERVICE_ENDPOINT", None)
+                self.assertEqual(browser_session.service_endpoint(), "http://127.0.0.1:9333")
+                with mock.patch.dict(os.environ, {"BROWSER_SERVICE": "0"}):
+                    self.assertIsNone(browser_session.service_endpoint())
+
+    def test_endpoint_ignored_when_service_pid_is_dead(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "endpoint.json").write_text(json.dumps({"endpoint": "http://127.0.0.1:9333", "pid": 4242}))
+            with mock.patch.dict(os.environ, {"BROWSER_SERVICE_DIR": tmp}), \
+                    mock.patch.object(browser_session, "pid_alive", return_value=False) as alive:
+                os.environ.pop("BROWSER_SERVICE_ENDPOINT", None)
+                self.assertIsNone(browser_session.service_endpoint())
+            alive.assert_called_once_with(4242)
+
+    def test_resume_skipped_without_seeded_cookies(self):
+        page = mock.Mock()
+        page.context.cookies.return_value = []
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "stark_session.json").write_text(json.dumps({"landing_url": "https://x.stark.co.uk/"}))
+            with mock.patch.dict(os.environ, {"BROWSER_SERVICE_DIR": tmp}):
+                self.assertFalse(browser_session.resume_warm_session(page, "stark", lambda p: False))
+        page.goto.assert_not_called()
+
+    def test_resume_rejects_expired_session(self):
+        page = mock.Mock()
+        page.context.cookies.return_value = [{"name": "sid"}]
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "stark_session.json").write_text(json.dumps({"landing_url": "https://x.stark.co.uk/"}))
+            with mock.patch.dict(os.environ, {"BROWSER_SERVICE_DIR": tmp}):
+                self.assertFalse(browser_session.resume_warm_session(page, "stark", lambda p: True))
+                self.assertTrue(browser_session.resume_warm_session(page, "stark", lambda p: False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import importlib.util
+import json
+import math
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+import calculations
+
+
+def _scalar_or_nan(value):
+    return math.nan if value is None else value
+
+
+class ArrayKernelParityTests(unittest.TestCase):
+    """The *_array kernels must agree element-for-element with the scalar KPIs."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.sites, self.days = 44, 120
+        self.capacity = np.round(rng.uniform(500, 5000, size=(self.sites, 1)), 1)
+        self.capacity[3, 0] = 0.0  # misconfigured site
+        self.irradiance = np.round(rng.uniform(0, 7, size=(self.sites, self.days)), 3)
+        self.irradiance[rng.random(self.irradiance.shape) < 0.05] = np.nan
+        self.irradiance[:, 10] = 0.0
+        self.yield_kwh = np.round(self.irradiance * self.capacity * rng.uniform(0.6, 0.95, self.irradiance.shape), 3)
+        self.yield_kwh[rng.random(self.yield_kwh.shape) < 0.05] = np.nan
+        self.yield_kwh[5, 20] = -1.0
+
+    def _assert_matches(self, array, expected):
+        expected = np.array([[_scalar_or_nan(v) for v in row] for row in expected])
+        np.testing.assert_array_equal(array, expected)
+
+    def _cell(self, values, i, j):
+        v = values[i, j] if values.ndim == 2 and values.shape[1] > 1 else values[i, 0]
+        return None if np.isnan(v) else float(v)
+
+    def test_performance_ratio(self):
+        with self.assertLogs(calculations.log, "WARNING"):
+            pr = calculations.performance_ratio_array(self.yield_kwh, self.irradiance, self.capacity)
+        expected = [
+            [calculations.performance_ratio(self._cell(self.yield_kwh, i, j), self._cell(self.irradiance, i, j),
+                                            self._cell(self.capacity, i, j))
+             for j in range(self.days)]
+            for i in range(self.sites)
+        ]
+        self._assert_matches(pr, expected)
+
+    def test_performance_ratio_period(self):
+        pr = calculations.performance_ratio_period_array(self.yield_kwh, self.irradiance, self.capacity)
+        expected = []
+        for i in range(self.sites):
+            records = [{"pv_kwh": self._cell(self.yield_kwh, i, j), "irradiance_kwh_m2": self._cell(self.irradiance, i, j)}
+                       for j in range(self.days)]
+            expected.append(calculations.performance_ratio_period(records, float(self.capacity[i, 0])))
+        self._assert_matches(pr[None, :], [expected])
+
+    def test_specific_yield_and_energy_availability(self):
+        sy = calculations.specific_yield_array(self.yield_kwh, self.capacity)
+        expected_yield = np.round(self.irradiance * self.capacity, 3)
+        ea = calculations.energy_based_availability_array(self.yield_kwh, expected_yield)
+        self._assert_matches(sy, [
+            [calculations.specific_yield(self._cell(self.yield_kwh, i, j), self._cell(self.capacity, i, j))
+             for j in range(self.days)] for i in range(self.sites)])
+        self._assert_matches(ea, [
+            [calculations.energy_based_availability(self._cell(self.yield_kwh, i, j),
+                                                    self._cell(expected_yield, i, j))
+             for j in range(self.days)] for i in range(self.sites)])
+
+    def test_inverter_availability(self):
+        online = np.array([[3, 4, 0], [2, 2, 1]])
+        total = np.array([[4, 4, 0], [3, 0, 3]])
+        self._assert_matches(calculations.inverter_availability_array(online, total), [
+            [calculations.inverter_availability(int(o), int(t)) for o, t in zip(orow, trow)]
+            for orow, trow in zip(online, total)])
+
+    def test_rounding_ties_match_round(self):
+        values = np.arange(0, 5000, dtype=float) / 8.0  # many exact .xxx5 ties
+        capacity = np.full_like(values, 1000.0)
+        sy = calculations.specific_yield_array(values, capacity)
+        self.assertEqual(list(sy), [calculations.specific_yield(float(v), 1000.0) for v in values])
+
+
+class DaylightTests(unittest.TestCase):
+    SITE = calculations.Site(51.5, -0.1, "Europe/London")
+
+    # London sunrise / sunset (local clock time) at the equinoxes and solstices
+    REFERENCE = [
+        (date(2026, 3, 20), "06:03", "18:13"),
+        (date(2026, 6, 21), "04:43", "21:21"),
+        (date(2026, 9, 23), "06:48", "18:56"),
+        (date(2026, 12, 21), "08:04", "15:53"),
+    ]
+
+    def test_table_matches_reference_sun_times(self):
+        def hours(hhmm):
+            h, m = hhmm.split(":")
+            return int(h) + int(m) / 60
+
+        table = calculations.daylight_table(self.SITE, 2026)
+        for day, sunrise, sunset in self.REFERENCE:
+            i = day.timetuple().tm_yday - 1
+            self.assertAlmostEqual(table.sunrise[i], hours(sunrise), delta=2 / 60, msg=day)
+            self.assertAlmostEqual(table.daylight_hours[i], hours(sunset) - hours(sunrise), delta=2 / 60, msg=day)
+
+    @unittest.skipUnless(importlib.util.find_spec("astral"), "astral is not installed")
+    def test_table_agrees_with_astral(self):
+        from astral import LocationInfo
+        from astral.sun import sun
+        import pytz
+
+        table = calculations.daylight_table(self.SITE, 2026)
+        self.assertEqual(len(table.dates), 365)
+        observer = LocationInfo("", "", self.SITE.timezone, self.SITE.latitude, self.SITE.longitude).observer
+        tz = pytz.timezone(self.SITE.timezone)
+        for i in range(0, 365, 5):
+            times = sun(observer, date=date(2026, 1, 1) + timedelta(days=i), tzinfo=tz)
+            sunrise = times["sunrise"]
+            self.assertAlmostEqual(table.sunrise[i], sunrise.hour + sunrise.minute / 60 + sunrise.second / 3600,
+                                   delta=2 / 60)
+            self.assertAlmostEqual(table.daylight_hours[i],
+                                   (times["sunset"] - sunrise).total_seconds() / 3600, delta=2 / 60)
+
+    def test_years_are_computed_once_and_dates_span_years(self):
+        calculations.daylight_table.cache_clear()
+        dates = ["2025-12-21", date(2026, 6, 21), np.datetime64("2026-12-21")]
+        hours = calculations.daylight_hours(self.SITE, dates)
+        calculations.daylight_hours(self.SITE, dates)
+        self.assertEqual(calculations.daylight_table.cache_info().misses, 2)
+        self.assertEqual(hours[0], hours[2])
+        self.assertGreater(hours[1], 16.0)
+        self.assertEqual(calculations.get_daylight_hours(51.5, -0.1, date(2026, 6, 21)), hours[1])
+
+    def test_polar_day_and_night(self):
+        site = calculations.Site.from_config({"location": {"latitude": 78.2, "longitude": 15.6, "timezone": "UTC"}})
+        self.assertEqual(list(calculations.daylight_hours(site, ["2026-06-21", "2026-12-21"])), [24.0, 0.0])
+        self.assertTrue(np.isnan(calculations.daylight_table(site, 2026).sunrise[171]))
+
+    def test_bad_input_raises_instead_of_reading_as_no_daylight(self):
+        import pytz
+
+        with self.assertRaises(pytz.UnknownTimeZoneError):
+            calculations.get_daylight_hours(51.5, -0.1, date(2026, 6, 21), "Not/AZone")
+        with self.assertRaises(ValueError):
+            calculations.get_daylight_hours(51.5, -0.1, "not a date")
+
+
+class KpiAccumulatorTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        start = date(2025, 12, 20)
+        self.records = []
+        for i in range(60):
+            if i in (5, 6):  # outage gap: no rows at all
+                continue
+            pv = round(float(rng.uniform(0, 900)), 3)
+            self.records.append({
+                "day": start + timedelta(days=i),
+                "pv_kwh": None if i == 9 else pv,
+                "irradiance_kwh_m2": 0.0 if i == 12 else round(float(rng.uniform(0.2, 6)), 3),
+                "availability": round(float(rng.uniform(80, 100)), 2),
+            })
+
+    def _feed(self, acc, records):
+        for rec in records:
+            acc.add(rec["day"], rec["pv_kwh"], rec["irradiance_kwh_m2"], rec["availability"])
+
+    def test_trailing_window_matches_period_pr(self):
+        acc = calculations.KpiAccumulator(250.0, window=7)
+        for rec in self.records:
+            self._feed(acc, [rec])
+            window = [r for r in self.records if 0 <= (rec["day"] - r["day"]).days < 7]
+            self.assertEqual(acc.days, len(window))
+            self.assertAlmostEqual(acc.performance_ratio,
+                                   calculations.performance_ratio_period(window, 250.0), delta=0.01)
+            self.assertAlmostEqual(acc.availability,
+                                   sum(r["availability"] for r in window) / len(window), delta=0.01)
+
+    def test_month_and_year_to_date_reset_at_the_boundary(self):
+        mtd = calculations.KpiAccumulator(250.0, window="mtd")
+        ytd = calculations.KpiAccumulator(250.0, window="ytd")
+        for acc in (mtd, ytd):
+            self._feed(acc, [r for r in self.records if r["day"] <= date(2026, 2, 3)])
+        self.assertEqual(mtd.days, 3)
+        self.assertEqual(ytd.days, 34)
+        ytd.advance(date(2027, 1, 1))
+        self.assertEqual(ytd.days, 0)
+        self.assertIsNone(ytd.performance_ratio)
+        self.assertIsNone(ytd.availability)
+
+    def test_state_round_trips_through_json(self):
+        acc = calculations.KpiAccumulator(250.0, window=30)
+        half = len(self.records) // 2
+        self._feed(acc, self.records[:half])
+        restored = calculations.KpiAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))
+        self._feed(acc, self.records[half:])
+        self._feed(restored, self.records[half:])
+        self.assertEqual(restored.to_dict(), acc.to_dict())
+        self.assertAlmostEqual(restored.performance_ratio, acc.performance_ratio, delta=0.01)
+
+    def test_latest_day_is_replaced_and_older_days_rejected(self):
+        acc = calculations.KpiAccumulator(100.0, window=7)
+        acc.add(date(2026, 6, 1), 300.0, 4.0)
+        acc.add(date(2026, 6, 2), 100.0, 4.0, availability_pct=50.0)
+        acc.add(date(2026, 6, 2), 320.0, 4.0, availability_pct=100.0)
+        self.assertEqual(acc.days, 2)
+        self.assertEqual(acc.performance_ratio, 77.5)
+        self.assertEqual(acc.availability, 100.0)
+        with self.assertRaises(ValueError):
+            acc.add(date(2026, 5, 31), 300.0, 4.0)
+        with self.assertRaises(ValueError):
+            calculations.KpiAccumulator(100.0, window="qtd")
+
+
+if __name__ == "__main__":
+    unittest.main()
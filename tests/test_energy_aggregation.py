@@ -0,0 +1,108 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import energy_aggregation
+import fusionsolar_monitor
+
+SPRING = date(2026, 3, 29)
+AUTUMN = date(2026, 10, 25)
+
+
+def _loop_hourly(power_array):
+    """The original per-hour loop (unrounded), kept as the reference for 288-sample days."""
+    hourly = []
+    for hour in range(24):
+        samples = power_array[hour * 12:hour * 12 + 12]
+        values = [float(s) if s not in (None, "", "null") else 0.0 for s in samples]
+        hourly.append(sum(values) / 12.0)
+    return hourly
+
+
+class AggregateDayTests(unittest.TestCase):
+    def test_matches_the_original_loop_on_a_normal_day(self):
+        rng = np.random.default_rng(7)
+        power = [f"{v:.3f}" for v in rng.uniform(0, 5000, 288)]
+        power[5] = None
+        power[100] = ""
+        energy = energy_aggregation.aggregate_day(power)
+        np.testing.assert_allclose(energy.hourly_kwh, _loop_hourly(power), rtol=1e-12)
+        hourly = fusionsolar_monitor.calculate_hourly_yield_from_power(power)
+        self.assertEqual(list(hourly), [f"{h:02d}:00" for h in range(24)])
+
+    def test_one_pass_gives_all_three_resolutions(self):
+        energy = energy_aggregation.aggregate_day([12.0] * 288, day=date(2026, 6, 1))
+        self.assertEqual(energy.five_min_kwh.size, 288)
+        self.assertEqual(energy.sp_dict()[1], 6.0)
+        self.assertEqual(len(energy.sp_kwh), 48)
+        self.assertEqual(energy.hourly_dict()["23:00"], 12.0)
+        self.assertAlmostEqual(energy.total_kwh, 288.0)
+
+    def test_spring_clock_change_has_46_periods_and_no_0100(self):
+        self.assertEqual(energy_aggregation.day_slots(SPRING), 276)
+        energy = energy_aggregation.aggregate_day([6.0] * 276, day=SPRING)
+        self.assertEqual(len(energy.sp_kwh), 46)
+        hourly = energy.hourly_dict()
+        self.assertEqual(len(hourly), 23)
+        self.assertNotIn("01:00", hourly)
+        self.assertEqual(hourly["02:00"], 6.0)
+
+    def test_autumn_clock_change_has_50_periods_and_doubles_0100(self):
+        self.assertEqual(energy_aggregation.day_slots(AUTUMN), 300)
+        energy = energy_aggregation.aggregate_day([6.0] * 300, day=AUTUMN)
+        self.assertEqual(len(energy.sp_kwh), 50)
+        self.assertEqual(energy.hourly_dict()["01:00"], 12.0)
+        # Length alone identifies the day when no date is given
+        self.assertEqual(fusionsolar_monitor.calculate_hourly_yield_from_power([6.0] * 300)["01:00"], 12.0)
+
+    def test_wall_clock_288_series_on_clock_change_day_is_accepted(self):
+        hourly = fusionsolar_monitor.calculate_hourly_yield_from_power([12.0] * 288, target_date=SPRING)
+        self.assertEqual(list(hourly), [f"{h:02d}:00" for h in range(24)])
+
+    def test_partial_day_is_padded_and_missing_counted(self):
+        energy = energy_aggregation.aggregate_day([12.0] * 144, day=date(2026, 6, 1))
+        self.assertEqual(energy.missing_samples, 144)
+        self.assertEqual(energy.coverage, 0.5)
+        self.assertEqual(energy.hourly_dict()["11:00"], 12.0)
+        self.assertEqual(energy.hourly_dict()["12:00"], 0.0)
+        self.assertEqual(int(energy.sp_missing[47]), 6)
+
+    def test_timestamped_samples_land_on_their_slot_and_gaps_interpolate(self):
+        day = date(2026, 6, 1)
+        start = datetime.combine(day, datetime.min.time())
+        stamps = [start + timedelta(hours=12), start + timedelta(hours=12, minutes=10)]
+        zero = energy_aggregation.aggregate_day([6.0, 12.0], day=day, timestamps=stamps)
+        self.assertEqual(zero.missing_samples, 286)
+        self.assertAlmostEqual(zero.hourly_dict()["12:00"], 1.5)
+        interp = energy_aggregation.aggregate_day([6.0, 12.0], day=day, timestamps=stamps, fill="interpolate")
+        self.assertAlmostEqual(interp.hourly_dict()["12:00"], 2.25)
+
+    def test_over_long_series_is_rejected(self):
+        with self.assertRaises(ValueError):
+            energy_aggregation.aggregate_day([1.0] * 289, day=date(2026, 6, 1))
+        self.assertEqual(fusionsolar_monitor.calculate_hourly_yield_from_power([1.0] * 400), {})
+
+
+class AggregateDaysTests(unittest.TestCase):
+    def test_batch_groups_days_by_length(self):
+        series = {
+            date(2026, 3, 28): [12.0] * 288,
+            SPRING: [12.0] * 276,
+            date(2026, 3, 30): [24.0] * 288,
+        }
+        result = energy_aggregation.aggregate_days(series)
+        self.assertEqual(len(result[SPRING].sp_kwh), 46)
+        self.assertAlmostEqual(result[date(2026, 3, 30)].total_kwh, 576.0)
+        self.assertAlmostEqual(result[date(2026, 3, 28)].total_kwh, 288.0)
+
+    def test_matrix_reduction_matches_per_day(self):
+        matrix = np.random.default_rng(3).uniform(0, 100, (5, 288))
+        _, sp, hourly, _, _ = energy_aggregation.aggregate_matrix(matrix)
+        self.assertEqual(sp.shape, (5, 48))
+        self.assertEqual(hourly.shape, (5, 24))
+        np.testing.assert_allclose(hourly.sum(axis=1), matrix.sum(axis=1) * 5 / 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
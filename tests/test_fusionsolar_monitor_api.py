@@ -0,0 +1,423 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+import fusionsolar_monitor
+import notion_sync
+
+CFG = {"station_code": "NE=123", "station_name": "Point Lane"}
+REST_CFG = {**CFG, "portal_rest": True}
+
+
+class RestExtractionTests(unittest.TestCase):
+    def test_device_list_is_mapped_to_scraper_shape(self):
+        page = mock.Mock()
+        page.evaluate.return_value = {"success": True, "data": {"list": [
+            {"name": "INV-01", "esn": "SN1", "mocTypeName": "Inverter", "runningStatus": 1},
+            {"name": "INV-02", "esn": "SN2", "mocTypeName": "Inverter", "runningStatus": "disconnected"},
+        ]}}
+        devices = fusionsolar_monitor.fetch_device_statuses_api(page, REST_CFG)
+        self.assertEqual([d["status"] for d in devices], ["Online", "Offline"])
+        self.assertEqual(devices[0]["plant"], "Point Lane")
+        self.assertEqual(devices[1]["sn"], "SN2")
+
+    def test_station_kpi_uses_overview_keys(self):
+        page = mock.Mock()
+        page.evaluate.return_value = {"success": True, "data": {
+            "dailyEnergy": "1,234.50", "cumulativeEnergy": 987654.0, "dailyIncome": 150.25,
+        }}
+        data = fusionsolar_monitor.fetch_station_kpi_api(page, REST_CFG)
+        self.assertEqual(data["yield_today_value"], "1234.5")
+        self.assertEqual(data["total_yield_value"], "987654")
+        self.assertEqual(data["revenue"], "150.25")
+
+    def test_irradiance_matches_station_by_dn(self):
+        page = mock.Mock()
+        page.evaluate.return_value = {"success": True, "data": {"list": [
+            {"dn": "NE=999", "name": "Other", "radiationDosage": 1.1},
+            {"dn": "NE=123", "name": "Point Lane", "radiationDosage": "3.42"},
+        ]}}
+        self.assertAlmostEqual(fusionsolar_monitor.fetch_station_irradiance_api(page, REST_CFG), 3.42)
+
+    def test_failed_call_falls_back_to_dom_scraper(self):
+        page = mock.Mock()
+        page.evaluate.side_effect = RuntimeError("API call failed with status 403")
+        scraped = [{"name": "INV-01", "status": "Online"}]
+        with mock.patch.object(fusionsolar_monitor, "navigate_to_page") as nav, \
+                mock.patch.object(fusionsolar_monitor, "extract_inverter_statuses", return_value=scraped):
+            devices = fusionsolar_monitor.get_device_statuses(page, REST_CFG)
+        self.assertEqual(devices, scraped)
+        nav.assert_called_once_with(page, REST_CFG, "device-manage")
+
+    def test_unmapped_status_code_falls_back_to_dom_scraper(self):
+        page = mock.Mock()
+        page.evaluate.return_value = {"success": True, "data": {"list": [
+            {"name": "INV-01", "runningStatus": 1},
+            {"name": "INV-02", "runningStatus": 512},
+        ]}}
+        scraped = [{"name": "INV-01", "status": "Online"}, {"name": "INV-02", "status": "Disconnected"}]
+        with mock.patch.object(fusionsolar_monitor, "navigate_to_page"), \
+                mock.patch.object(fusionsolar_monitor, "extract_inverter_statuses", return_value=scraped), \
+                self.assertLogs(fusionsolar_monitor.log, "WARNING"):
+            devices = fusionsolar_monitor.get_device_statuses(page, REST_CFG)
+        self.assertEqual(devices, scraped)
+
+    def test_portal_rest_is_opt_in(self):
+        page = mock.Mock()
+        with mock.patch.dict(os.environ):
+            os.environ.pop("FUSIONSOLAR_PORTAL_REST", None)
+            self.assertIsNone(fusionsolar_monitor.fetch_station_kpi_api(page, CFG))
+            self.assertEqual(fusionsolar_monitor.fetch_stations_api(page, [CFG], ("devices", "kpi")),
+                             [{"devices": None, "kpi": None}])
+            os.environ["FUSIONSOLAR_PORTAL_REST"] = "1"
+            self.assertTrue(fusionsolar_monitor.portal_rest_enabled(CFG))
+        page.evaluate.assert_not_called()
+
+    def test_rest_overview_skips_page_navigation(self):
+        page = mock.Mock()
+        with mock.patch.object(fusionsolar_monitor, "fetch_station_kpi_api",
+                               return_value={"yield_today_value": "10", "yield_today_unit": "kWh"}), \
+                mock.patch.object(fusionsolar_monitor, "fetch_alarm_counts_api",
+                                  return_value={"critical": 0, "major": 1, "minor": 0, "warning": 2}), \
+                mock.patch.object(fusionsolar_monitor, "navigate_to_page") as nav:
+            data = fusionsolar_monitor.get_overview_data(page, CFG)
+        nav.assert_not_called()
+        self.assertEqual(data["alarms"]["major"], 1)
+
+    def test_failed_alarm_call_keeps_rest_kpis_without_navigating(self):
+        page = mock.Mock()
+        with mock.patch.object(fusionsolar_monitor, "fetch_station_kpi_api",
+                               return_value={"yield_today_value": "10", "yield_today_unit": "kWh"}), \
+                mock.patch.object(fusionsolar_monitor, "fetch_alarm_counts_api", return_value=None), \
+                mock.patch.object(fusionsolar_monitor, "navigate_to_page") as nav, \
+                self.assertLogs(fusionsolar_monitor.log, "WARNING"):
+            data = fusionsolar_monitor.get_overview_data(page, CFG)
+        nav.assert_not_called()
+        self.assertEqual(data, {"yield_today_value": "10", "yield_today_unit": "kWh", "alarms": {}})
+
+    def test_missing_kpis_fall_back_to_overview_page(self):
+        page = mock.Mock()
+        scraped = {"yield_today_value": "9", "alarms": {"major": 0}}
+        with mock.patch.object(fusionsolar_monitor, "fetch_station_kpi_api", return_value=None), \
+                mock.patch.object(fusionsolar_monitor, "fetch_alarm_counts_api",
+                                  return_value={"critical": 0, "major": 1, "minor": 0, "warning": 2}), \
+                mock.patch.object(fusionsolar_monitor, "navigate_to_page") as nav, \
+                mock.patch.object(fusionsolar_monitor, "extract_overview_data", return_value=scraped):
+            data = fusionsolar_monitor.get_overview_data(page, CFG)
+        nav.assert_called_once_with(page, CFG, "overview")
+        self.assertEqual(data["yield_today_value"], "9")
+        self.assertEqual(data["alarms"]["major"], 1)
+
+
+class MultiStationTests(unittest.TestCase):
+    CFG = {
+        "station_code": "NE=123", "station_name": "Point Lane", "notion_token": "t", "portal_rest": True,
+        "stations": [
+            {"station_code": "NE=123", "station_name": "Point Lane"},
+            {"station_code": "NE=456", "station_name": "Second Farm"},
+        ],
+    }
+
+    def test_station_configs_layer_entries_over_shared_settings(self):
+        first, second = fusionsolar_monitor.station_configs(self.CFG)
+        self.assertEqual(second["notion_token"], "t")
+        self.assertEqual((first["log_suffix"], second["log_suffix"]), ("", "NE_456"))
+        self.assertEqual((first["notion_sync"], second["notion_sync"]), (True, False))
+        self.assertNotIn("stations", first)
+        only = fusionsolar_monitor.station_configs(self.CFG, only=["second farm"])
+        self.assertEqual([s["station_code"] for s in only], ["NE=456"])
+
+    def test_single_station_config_is_unchanged(self):
+        self.assertEqual(fusionsolar_monitor.station_configs(CFG), [CFG])
+
+    def test_stations_rest_calls_share_one_evaluate(self):
+        page = mock.Mock()
+        page.evaluate.return_value = [
+            {"success": True, "data": {"list": [{"name": "INV-01", "runningStatus": 1}]}},
+            {"success": True, "data": {"list": [{"name": "INV-09", "runningStatus": 0}]}},
+        ]
+        stations = fusionsolar_monitor.station_configs(self.CFG)
+        rest = fusionsolar_monitor.fetch_stations_api(page, stations, ("devices",))
+        page.evaluate.assert_called_once()
+        self.assertEqual(rest[1]["devices"][0]["status"], "Offline")
+        self.assertEqual(rest[1]["devices"][0]["plant"], "Second Farm")
+
+    def test_identical_requests_are_sent_once(self):
+        page = mock.Mock()
+        page.evaluate.return_value = [{"success": True, "data": {"list": [
+            {"dn": "NE=123", "radiationDosage": 3.1},
+            {"dn": "NE=456", "radiationDosage": 2.9},
+        ]}}]
+        stations = fusionsolar_monitor.station_configs(self.CFG)
+        rest = fusionsolar_monitor.fetch_stations_api(page, stations, ("irradiance",))
+        self.assertEqual(len(page.evaluate.call_args.args[1][0]), 1)
+        self.assertEqual([r["irradiance"] for r in rest], [3.1, 2.9])
+
+    def test_one_login_and_per_station_results(self):
+        page = mock.Mock()
+        page.evaluate.return_value = None
+        context = mock.Mock(new_page=mock.Mock(return_value=page))
+        stations = fusionsolar_monitor.station_configs(self.CFG)
+        devices = {
+            "NE=123": [{"name": "INV-01", "status": "Online"}],
+            "NE=456": [{"name": "INV-09", "status": "Offline"}],
+        }
+        with mock.patch("playwright.sync_api.sync_playwright"), \
+                mock.patch.object(fusionsolar_monitor, "launch_portal_browser",
+                                  return_value=(mock.Mock(), context, None)) as launch, \
+                mock.patch.object(fusionsolar_monitor, "login", return_value=True) as login, \
+                mock.patch.object(fusionsolar_monitor, "get_device_statuses",
+                                  side_effect=lambda page, cfg, rest: devices[cfg["station_code"]]), \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check") as log_check:
+            results = fusionsolar_monitor.run_inverter_checks(stations)
+        launch.assert_called_once()
+        login.assert_called_once()
+        self.assertEqual(results, {"NE=123": True, "NE=456": False})
+        self.assertEqual([c.kwargs["log_suffix"] for c in log_check.call_args_list], ["", "NE_456"])
+
+
+class WatchModeTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("playwright.sync_api.sync_playwright")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.page = mock.Mock(url="https://portal/station")
+        self.context = mock.Mock(new_page=mock.Mock(return_value=self.page))
+
+    def test_portal_watch_relogs_only_when_session_expires(self):
+        devices = [{"name": "INV-01", "status": "Online"}, {"name": "INV-02", "status": "Online"}]
+        offline = [{"name": "INV-01", "status": "Online"}, {"name": "INV-02", "status": "Disconnected"}]
+        polls = iter([
+            [{"devices": devices}],
+            [{"devices": None}],          # session timed out
+            [{"devices": offline}],       # after re-login
+            [{"devices": offline}],
+        ])
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser",
+                               return_value=(mock.Mock(), self.context, None)) as launch, \
+                mock.patch.object(fusionsolar_monitor, "login", return_value=True) as login, \
+                mock.patch.object(fusionsolar_monitor, "fetch_stations_api", side_effect=lambda *a: next(polls)), \
+                mock.patch.object(fusionsolar_monitor, "_fetch_json", return_value=None), \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check") as log_check:
+            ok = fusionsolar_monitor.run_watch([CFG], 600, max_polls=3, sleep=lambda s: None)
+        self.assertTrue(ok)
+        launch.assert_called_once()
+        self.assertEqual(login.call_count, 2)
+        self.assertEqual([c.args[0] for c in log_check.call_args_list], [devices, offline, offline])
+
+    def test_portal_watch_scrapes_table_when_rest_has_no_devices(self):
+        scraped = [{"name": "INV-01", "status": "Online"}]
+        with mock.patch.object(fusionsolar_monitor, "get_device_statuses", return_value=scraped) as dom:
+            devices = fusionsolar_monitor._watch_devices(self.page, CFG, {"devices": None})
+        self.assertEqual(devices, scraped)
+        dom.assert_called_once_with(self.page, CFG, {"devices": None})
+
+    def test_watch_stops_at_until(self):
+        now = [datetime(2026, 6, 1, 17, 30)]
+
+        def sleep(seconds):
+            now[0] += timedelta(seconds=seconds)
+
+        client = mock.Mock()
+        client.device_statuses_many.return_value = {"NE=123": [{"name": "INV-01", "status": "Online"}]}
+        cfg = {**CFG, "data_source": "northbound"}
+        with mock.patch.object(fusionsolar_monitor.northbound_client, "client_from_config", return_value=client), \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check"):
+            fusionsolar_monitor.run_watch([cfg], 600, until=datetime(2026, 6, 1, 18, 0),
+                                          sleep=sleep, clock=lambda: now[0])
+        # polls at 17:30, 17:40 and 17:50; the next one would land on 18:00
+        self.assertEqual(client.device_statuses_many.call_count, 3)
+
+    def test_interval_from_schedule(self):
+        self.assertEqual(fusionsolar_monitor.watch_interval_s({"schedule": {"watch_interval_min": 5}}), 300)
+        self.assertEqual(fusionsolar_monitor.watch_interval_s({}, 15), 900)
+        self.assertEqual(fusionsolar_monitor.watch_interval_s({}), 600)
+
+
+class EnergyBalanceBatchTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"FUSIONSOLAR_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_returns_curve_per_date_from_one_evaluate(self):
+        page = mock.Mock()
+        page.evaluate.return_value = [{"data": {"productPower": ["1.0"] * 288}}, {"data": {}}]
+        days = [date(2026, 3, 1), date(2026, 3, 2)]
+        result = fusionsolar_monitor.fetch_energy_balance_batch(page, CFG, days, concurrency=3)
+        self.assertEqual(result[days[0]], ["1.0"] * 288)
+        self.assertIsNone(result[days[1]])
+        page.evaluate.assert_called_once()
+        urls, concurrency = page.evaluate.call_args.args[1]
+        self.assertEqual(concurrency, 3)
+        self.assertIn("dateStr=2026-03-02 00:00:00", urls[1])
+
+    def test_evaluate_failure_yields_none_for_every_date(self):
+        page = mock.Mock()
+        page.evaluate.side_effect = RuntimeError("Target closed")
+        days = [date(2026, 3, 1)]
+        self.assertEqual(fusionsolar_monitor.fetch_energy_balance_batch(page, CFG, days), {days[0]: None})
+
+    def test_backfill_fetches_curves_once_per_month(self):
+        batches = []
+
+        def power_curves(days):
+            batches.append(list(days))
+            return {d: ["1.0"] * 288 for d in days}
+
+        with mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value=None) as upsert:
+            notion_sync._backfill_days(
+                CFG, "db", "hh", date(2026, 2, 27), date(2026, 3, 2),
+                month_rows=lambda year, month: [], power_curves=power_curves,
+            )
+        self.assertEqual([len(b) for b in batches], [2, 2])
+        self.assertEqual(upsert.call_count, 4)
+        self.assertIsNotNone(upsert.call_args.kwargs["hourly_yield_json"])
+
+    def test_month_hourly_yield_matches_per_day_calculation(self):
+        days = [date(2026, 3, 28), date(2026, 3, 29), date(2026, 3, 30)]
+        curves = {
+            days[0]: [str(i % 7) for i in range(288)],
+            days[1]: ["2.0"] * 276,  # spring-forward day
+            days[2]: [],
+        }
+        hourly = notion_sync._month_hourly_yield(days, curves)
+        for d in days:
+            self.assertEqual(hourly[d], notion_sync.calculate_hourly_yield_from_power(curves[d], target_date=d))
+        self.assertEqual(hourly[days[2]], {})
+
+    def test_backfill_writers_share_one_hh_index_and_count_failures(self):
+        days = [date(2026, 2, 27) + timedelta(days=i) for i in range(4)]
+
+        def upsert(db_id, day_str, **kwargs):
+            if day_str == "2026-02-28":
+                raise RuntimeError("Notion down")
+            return f"page-{day_str}"
+
+        with mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", side_effect=upsert), \
+                mock.patch.object(notion_sync, "load_hh_index", return_value={}) as load_index, \
+                mock.patch.object(notion_sync, "sync_stark_hh_day") as hh_sync:
+            written, failed = notion_sync._backfill_days(
+                CFG, "db", "hh", days[0], days[-1],
+                month_rows=lambda year, month: [], power_curves=lambda ds: {d: ["1.0"] * 288 for d in ds},
+            )
+        self.assertEqual((written, failed), (3, 1))
+        load_index.assert_called_once_with("hh", days[0], days[-1], limiter=mock.ANY)
+        self.assertEqual(sorted(c.args[3] for c in hh_sync.call_args_list), [days[0], days[2], days[3]])
+
+    def test_extraction_failure_stops_writers_and_propagates(self):
+        def month_rows(year, month):
+            if month == 3:
+                raise RuntimeError("portal gone")
+            return []
+
+        with mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value=None) as upsert, \
+                self.assertRaises(RuntimeError):
+            notion_sync._backfill_days(
+                CFG, "db", None, date(2026, 2, 27), date(2026, 3, 2),
+                month_rows=month_rows, power_curves=lambda ds: {},
+            )
+        # February's days were still written before the error surfaced
+        self.assertEqual(upsert.call_count, 2)
+
+    def test_stark_csvs_are_prefetched_in_one_batch(self):
+        stark_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(stark_dir.cleanup)
+        stark_path = notion_sync.Path(stark_dir.name)
+        days = [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3)]
+        (stark_path / "stark_hh_data_2026-03-01.csv").write_text("Period,Energy kWh\n")
+
+        def run_batch(dates, output_dir, **kwargs):
+            for d in dates[:-1]:
+                (notion_sync.Path(output_dir) / f"stark_hh_data_{d}.csv").write_text("Period,Energy kWh\n")
+            return {}
+
+        scraper = mock.Mock(run_batch=mock.Mock(side_effect=run_batch))
+        with mock.patch.object(notion_sync, "STARK_DATA_DIR", stark_path), \
+                mock.patch.object(notion_sync, "SCRIPT_DIR", stark_path), \
+                mock.patch.object(notion_sync, "_load_stark_module", return_value=scraper), \
+                mock.patch.object(notion_sync.subprocess, "run") as subprocess_run:
+            still_missing = notion_sync.prefetch_stark_hh_csvs(CFG, days)
+        scraper.run_batch.assert_called_once()
+        self.assertEqual(scraper.run_batch.call_args.kwargs["dates"], ["2026-03-02", "2026-03-03"])
+        self.assertEqual(still_missing, [days[2]])
+        subprocess_run.assert_not_called()
+
+    def test_cached_dates_are_not_refetched(self):
+        page = mock.Mock()
+        page.evaluate.return_value = [{"data": {"productPower": ["2.0"] * 288}}]
+        day = date(2026, 3, 1)
+        fusionsolar_monitor.fetch_energy_balance_batch(page, CFG, [day])
+        result = fusionsolar_monitor.fetch_energy_balance_batch(page, CFG, [day])
+        self.assertEqual(result[day], ["2.0"] * 288)
+        self.assertEqual(fusionsolar_monitor.fetch_daily_energy_balance_api(page, CFG, day), ["2.0"] * 288)
+        page.evaluate.assert_called_once()
+
+    def test_fully_cached_backfill_never_opens_the_portal(self):
+        days = [date(2026, 1, 30), date(2026, 1, 31)]
+        notion_sync.payload_cache.store(CFG["station_code"], notion_sync.MONTHLY_REPORT_ENDPOINT, "2026-01",
+                                        [{"date": "2026-01-30", "pv_kwh": 5.0, "inv_kwh": 4.0}])
+        for d in days:
+            notion_sync.payload_cache.store(CFG["station_code"], fusionsolar_monitor.ENERGY_BALANCE_ENDPOINT,
+                                            d.isoformat(), {"data": {"productPower": ["1.0"] * 288}})
+        with mock.patch.object(notion_sync, "launch_portal_browser") as launch, \
+                mock.patch.object(notion_sync, "prefetch_stark_hh_csvs") as prefetch, \
+                mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value=None) as upsert:
+            notion_sync.backfill_range(CFG, "db", "hh", days[0], days[1])
+        prefetch.assert_called_once_with(CFG, days)
+        launch.assert_not_called()
+        by_day = {c.args[1]: c.kwargs for c in upsert.call_args_list}
+        self.assertEqual(by_day["2026-01-30"]["pv_kwh"], 5.0)
+        self.assertEqual(upsert.call_count, 2)
+
+
+class CombinedReportSyncTests(unittest.TestCase):
+    def test_report_sync_reuses_session_and_overview(self):
+        page = mock.Mock()
+        context = mock.Mock(new_page=mock.Mock(return_value=page))
+        overview = {"yield_today_value": "10", "yield_today_unit": "kWh", "alarms": {"major": 0}}
+        with mock.patch("playwright.sync_api.sync_playwright"), \
+                mock.patch.object(fusionsolar_monitor, "launch_portal_browser",
+                                  return_value=(mock.Mock(), context, None)) as launch, \
+                mock.patch.object(fusionsolar_monitor, "login", return_value=True) as login, \
+                mock.patch.object(fusionsolar_monitor, "get_overview_data", return_value=overview), \
+                mock.patch.object(fusionsolar_monitor, "get_station_irradiance", return_value=None), \
+                mock.patch.object(fusionsolar_monitor, "log_generation"), \
+                mock.patch.object(notion_sync, "setup_notion", return_value=("db", "hh")), \
+                mock.patch.object(notion_sync, "sync_today_on_page", return_value=True) as sync, \
+                mock.patch.object(fusionsolar_monitor.subprocess, "run") as run:
+            self.assertTrue(fusionsolar_monitor.run_generation_report(CFG, sync=True))
+        launch.assert_called_once()
+        login.assert_called_once()
+        run.assert_not_called()
+        sync.assert_called_once_with(page, CFG, "db", hh_db_id="hh", overview_data=overview)
+
+    def test_sync_on_page_skips_overview_when_supplied(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        today = date.today().isoformat()
+        row = {"date": today, "pv_kwh": 100.0, "inv_kwh": 98.0, "irradiance_kwh_m2": 3.1}
+        with mock.patch.dict(os.environ, {"FUSIONSOLAR_CACHE_DIR": tmp.name}), \
+                mock.patch.object(notion_sync, "navigate_to_page") as nav, \
+                mock.patch.object(notion_sync, "time"), \
+                mock.patch.object(notion_sync, "scrape_monthly_report", return_value=[row]), \
+                mock.patch.object(notion_sync, "fetch_daily_energy_balance_api", return_value=None), \
+                mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value=None) as upsert:
+            ok = notion_sync.sync_today_on_page(
+                mock.Mock(), CFG, "db", overview_data={"alarms": {"critical": 1}})
+        self.assertTrue(ok)
+        self.assertEqual([c.args[2] for c in nav.call_args_list], ["report"])
+        self.assertEqual(upsert.call_args.kwargs["alarms"], {"critical": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
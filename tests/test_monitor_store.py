@@ -0,0 +1,119 @@
+import csv
+import tempfile
+import unittest
+from contextlib import closing
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import fusionsolar_monitor
+import monitor_store
+
+
+def _devices(*offline):
+    return [
+        {"name": name, "type": "Inverter", "status": "Offline" if name in offline else "Online", "statusClass": ""}
+        for name in ("INV-01", "INV-02", "INV-03", "INV-04")
+    ]
+
+
+class MonitorStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = Path(self.tmp.name) / "monitor.db"
+
+    def _check(self, ts, *offline):
+        monitor_store.record_inverter_check(_devices(*offline), ts, path=self.db)
+
+    def test_daily_and_device_availability(self):
+        self._check("2026-03-01 08:00:00")
+        self._check("2026-03-01 13:00:00", "INV-02")
+        self._check("2026-03-02 08:00:00", "INV-02", "INV-03")
+        self._check("2026-03-05 08:00:00")  # outside the queried range
+
+        daily = monitor_store.daily_availability(date(2026, 3, 1), date(2026, 3, 2), path=self.db)
+        self.assertEqual(daily, {"2026-03-01": 87.5, "2026-03-02": 50.0})
+
+        by_device = monitor_store.device_availability(date(2026, 3, 1), date(2026, 3, 1), path=self.db)
+        self.assertEqual(by_device[("2026-03-01", "", "INV-02")], 50.0)
+        self.assertEqual(by_device[("2026-03-01", "", "INV-01")], 100.0)
+
+    def test_monthly_availability_averages_days(self):
+        self._check("2026-03-01 08:00:00")
+        self._check("2026-03-31 08:00:00", "INV-01", "INV-02")
+        self.assertEqual(monitor_store.monthly_availability(2026, 3, path=self.db), 75.0)
+        self.assertIsNone(monitor_store.monthly_availability(2026, 4, path=self.db))
+
+    def test_device_type_filter(self):
+        devices = _devices() + [{"name": "EMI-01", "type": "EMI", "status": "Offline", "statusClass": ""}]
+        monitor_store.record_inverter_check(devices, "2026-03-01 08:00:00", path=self.db)
+        self.assertEqual(monitor_store.daily_availability(date(2026, 3, 1), date(2026, 3, 1), path=self.db),
+                         {"2026-03-01": 80.0})
+        self.assertEqual(monitor_store.daily_availability(date(2026, 3, 1), date(2026, 3, 1),
+                                                          device_type="inverter", path=self.db),
+                         {"2026-03-01": 100.0})
+
+    def test_queries_use_the_date_device_index(self):
+        with closing(monitor_store.connect(self.db)) as conn:
+            plan = " ".join(str(r) for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT date, device, SUM(online) FROM inverter_checks "
+                "WHERE date BETWEEN '2026-03-01' AND '2026-03-31' GROUP BY date, station, device"
+            ))
+        self.assertIn("idx_inverter_checks_date_device", plan)
+
+    def test_import_csv_is_idempotent(self):
+        inv_csv = Path(self.tmp.name) / "inverter_checks.csv"
+        gen_csv = Path(self.tmp.name) / "daily_generation.csv"
+        with open(inv_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "device_name", "device_type", "status", "status_class"])
+            writer.writerow(["2026-03-01 08:00:00", "INV-01", "Inverter", "Online", ""])
+            writer.writerow(["2026-03-01 08:00:00", "INV-02", "Inverter", "Disconnected", ""])
+        with open(gen_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "date", "yield_today", "yield_unit"])
+            writer.writerow(["2026-03-01 22:00:00", "2026-03-01", "1234.5", "kWh"])
+
+        first = monitor_store.import_csv(inv_csv, gen_csv, path=self.db)
+        again = monitor_store.import_csv(inv_csv, gen_csv, path=self.db)
+        self.assertEqual(first, {"inverter_checks": 2, "daily_generation": 1})
+        self.assertEqual(again, {"inverter_checks": 0, "daily_generation": 0})
+        self.assertEqual(monitor_store.daily_availability(date(2026, 3, 1), date(2026, 3, 1), path=self.db),
+                         {"2026-03-01": 50.0})
+        rows = monitor_store.generation_rows(date(2026, 3, 1), date(2026, 3, 1), path=self.db)
+        self.assertEqual(rows[0]["yield_today"], "1234.5")
+
+    def test_import_csv_uses_configured_station_and_relabels_unkeyed_rows(self):
+        inv_csv = Path(self.tmp.name) / "inverter_checks.csv"
+        with open(inv_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "device_name", "device_type", "status", "status_class"])
+            writer.writerow(["2026-03-01 08:00:00", "INV-01", "Inverter", "Online", ""])
+        # History imported before imports were keyed, plus the same check written live
+        self._check("2026-03-01 08:00:00", "INV-02")
+        monitor_store.record_inverter_check(_devices("INV-02"), "2026-03-01 08:00:00", station="NE=1", path=self.db)
+
+        with mock.patch.object(monitor_store, "_configured_station", return_value="NE=1"):
+            monitor_store.import_csv(inv_csv, Path(self.tmp.name) / "missing.csv", path=self.db)
+
+        by_device = monitor_store.device_availability(date(2026, 3, 1), date(2026, 3, 1), path=self.db)
+        self.assertEqual({station for _, station, _ in by_device}, {"NE=1"})
+        self.assertEqual(len(by_device), 4)
+        self.assertEqual(monitor_store.daily_availability(date(2026, 3, 1), date(2026, 3, 1), path=self.db),
+                         {"2026-03-01": 75.0})
+
+    def test_monitor_log_helpers_write_csv_and_store(self):
+        with mock.patch.object(fusionsolar_monitor, "LOGS_DIR", Path(self.tmp.name)), \
+                mock.patch.object(monitor_store, "DEFAULT_DB", self.db):
+            fusionsolar_monitor.log_inverter_check(_devices("INV-04"))
+            fusionsolar_monitor.log_generation({"yield_today_value": "99.0", "yield_today_unit": "kWh"})
+        self.assertTrue((Path(self.tmp.name) / "inverter_checks.csv").exists())
+        today = date.today()
+        self.assertEqual(monitor_store.daily_availability(today, today, path=self.db),
+                         {today.isoformat(): 75.0})
+        self.assertEqual(monitor_store.generation_rows(today, today, path=self.db)[0]["yield_today"], "99.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
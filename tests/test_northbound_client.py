@@ -0,0 +1,249 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+import fusionsolar_monitor
+import northbound_client
+import notion_sync
+from northbound_fixture import SECOND_STATION_CODE, STATION_CODE, SYSTEM_CODE, USERNAME, NorthboundFixture
+
+
+class NorthboundClientTests(unittest.TestCase):
+    def setUp(self):
+        self.api = NorthboundFixture().__enter__()
+        self.addCleanup(self.api.__exit__, None, None, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.sleeps = []
+        self.client = self._client()
+
+    def _client(self):
+        return northbound_client.NorthboundClient(
+            base_url=self.api.base_url,
+            username=USERNAME,
+            system_code=SYSTEM_CODE,
+            token_file=Path(self.tmp.name) / "token.json",
+            min_interval_s=0,
+            sleep=self.sleeps.append,
+        )
+
+    def test_token_is_reused_across_calls_and_clients(self):
+        self.client.overview_data(STATION_CODE)
+        self.client.device_statuses(STATION_CODE)
+        self._client().overview_data(STATION_CODE)
+        self.assertEqual(self.api.logins, 1)
+
+    def test_expired_token_triggers_one_relogin(self):
+        self.client.overview_data(STATION_CODE)
+        self.api.tokens.clear()
+        self.client.overview_data(STATION_CODE)
+        self.assertEqual(self.api.logins, 2)
+
+    def test_rate_limit_backs_off_then_retries(self):
+        self.api.rate_limit_next = 2
+        data = self.client.overview_data(STATION_CODE)
+        self.assertEqual(data["yield_today_value"], "1234.5")
+        self.assertEqual(self.sleeps, [60.0, 120.0])
+
+    def test_persistent_rate_limit_raises(self):
+        self.api.rate_limit_next = 10
+        with self.assertRaises(northbound_client.NorthboundError):
+            self.client.overview_data(STATION_CODE)
+
+    def test_bad_credentials_raise(self):
+        self.client.system_code = "wrong"
+        with self.assertRaises(northbound_client.NorthboundError):
+            self.client.login()
+
+    def test_device_statuses_use_inverter_run_state(self):
+        devices = {d["name"]: d for d in self.client.device_statuses(STATION_CODE, "Point Lane")}
+        self.assertEqual(devices["INV-01"]["status"], "Online")
+        self.assertEqual(devices["INV-02"]["status"], "Offline")
+        self.assertEqual(devices["INV-02"]["sn"], "ES02")
+        self.assertEqual(devices["EMI-01"]["status"], "Online")
+
+    def test_daily_power_curve_sums_inverters_per_slot(self):
+        curve = self.client.daily_power_curve(STATION_CODE, date(2026, 3, 5))
+        self.assertEqual(len(curve), 288)
+        self.assertTrue(all(p == 12.0 for p in curve))
+        hourly = fusionsolar_monitor.calculate_hourly_yield_from_power(curve)
+        self.assertEqual(hourly["12:00"], 12.0)
+
+    def test_irradiance_and_month_report(self):
+        self.assertAlmostEqual(self.client.station_irradiance(STATION_CODE), 3.5)
+        rows = self.client.month_report(STATION_CODE, 2026, 3)
+        self.assertEqual([r["date"] for r in rows], ["2026-03-01", "2026-03-02"])
+        self.assertEqual(rows[1]["inv_kwh"], 992.0)
+
+
+class NorthboundDataSourceTests(unittest.TestCase):
+    def setUp(self):
+        self.api = NorthboundFixture().__enter__()
+        self.addCleanup(self.api.__exit__, None, None, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cfg = {
+            "station_code": STATION_CODE,
+            "station_name": "Point Lane",
+            "data_source": "northbound",
+            "northbound": {"base_url": self.api.base_url, "username": USERNAME,
+                           "system_code": SYSTEM_CODE, "min_interval_s": 0},
+        }
+        patchers = [
+            mock.patch.object(northbound_client, "TOKEN_FILE", Path(self.tmp.name) / "token.json"),
+            mock.patch.dict(os.environ, {}, clear=False),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop("FUSIONSOLAR_DATA_SOURCE", None)
+
+    def test_env_overrides_config_data_source(self):
+        with mock.patch.dict(os.environ, {"FUSIONSOLAR_DATA_SOURCE": "portal"}):
+            self.assertFalse(northbound_client.use_northbound(self.cfg))
+        self.assertTrue(northbound_client.use_northbound(self.cfg))
+
+    def test_inverter_check_runs_without_a_browser(self):
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check") as log_check:
+            ok = fusionsolar_monitor.run_inverter_check(self.cfg, dry_run=True)
+        launch.assert_not_called()
+        self.assertFalse(ok)  # INV-02 reports run_state 0
+        self.assertEqual(len(log_check.call_args.args[0]), 3)
+
+    def test_generation_report_runs_without_a_browser(self):
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(fusionsolar_monitor, "log_generation") as log_gen:
+            self.assertTrue(fusionsolar_monitor.run_generation_report(self.cfg, dry_run=True))
+        launch.assert_not_called()
+        data = log_gen.call_args.args[0]
+        self.assertEqual(data["yield_today_value"], "1234.5")
+        self.assertEqual(data["irradiance_value"], "3.5")
+
+    def test_multi_station_check_batches_calls(self):
+        cfg = {**self.cfg, "stations": [
+            {"station_code": STATION_CODE, "station_name": "Point Lane"},
+            {"station_code": SECOND_STATION_CODE, "station_name": "Second Farm"},
+        ]}
+        stations = fusionsolar_monitor.station_configs(cfg)
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check") as log_check:
+            results = fusionsolar_monitor.run_inverter_checks(stations, dry_run=True)
+        launch.assert_not_called()
+        self.assertEqual(results, {STATION_CODE: False, SECOND_STATION_CODE: True})
+        self.assertEqual(self.api.calls, ["getDevList", "getDevRealKpi"])
+        self.assertEqual(log_check.call_args.kwargs["station"], SECOND_STATION_CODE)
+
+    def test_multi_station_report_batches_calls(self):
+        stations = [
+            {**self.cfg, "station_code": STATION_CODE},
+            {**self.cfg, "station_code": SECOND_STATION_CODE, "station_name": "Second Farm"},
+        ]
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(fusionsolar_monitor, "log_generation") as log_gen:
+            results = fusionsolar_monitor.run_generation_reports(stations, dry_run=True)
+        launch.assert_not_called()
+        self.assertEqual(results, {STATION_CODE: True, SECOND_STATION_CODE: True})
+        self.assertEqual(self.api.calls.count("getStationRealKpi"), 1)
+        second = log_gen.call_args_list[1].args[0]
+        self.assertEqual(second["yield_today_value"], "500")
+        self.assertNotIn("irradiance_value", second)  # no EMI at the second station
+
+    def test_report_sync_writes_notion_without_a_browser(self):
+        today = date.today()
+        row = {"date": today.isoformat(), "pv_kwh": 1010.0, "inv_kwh": 1001.0, "irradiance_kwh_m2": 3.2}
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(notion_sync, "launch_portal_browser") as sync_launch, \
+                mock.patch.object(fusionsolar_monitor, "log_generation"), \
+                mock.patch.object(northbound_client.NorthboundClient, "month_report", return_value=[row]), \
+                mock.patch.object(notion_sync, "setup_notion", return_value=("db", "hh")), \
+                mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value="page") as upsert, \
+                mock.patch.object(notion_sync, "sync_stark_hh_day") as hh_sync:
+            results = fusionsolar_monitor.run_generation_reports([self.cfg], sync=True)
+        self.assertEqual(results, {STATION_CODE: True})
+        launch.assert_not_called()
+        sync_launch.assert_not_called()
+        kwargs = upsert.call_args.kwargs
+        self.assertEqual((kwargs["pv_kwh"], kwargs["inv_kwh"], kwargs["irradiance_kwh_m2"]), (1010.0, 1001.0, 3.2))
+        self.assertIn('"12:00": 12.0', kwargs["hourly_yield_json"])
+        hh_sync.assert_called_once_with(self.cfg, "hh", "page", today, allow_scrape=True)
+
+    def test_report_source_is_decided_per_station(self):
+        stations = [self.cfg, {**self.cfg, "station_code": SECOND_STATION_CODE, "data_source": "portal"}]
+        context = mock.Mock()
+        with mock.patch("playwright.sync_api.sync_playwright"), \
+                mock.patch.object(fusionsolar_monitor, "launch_portal_browser",
+                                  return_value=(mock.Mock(), context, None)), \
+                mock.patch.object(fusionsolar_monitor, "login", return_value=True), \
+                mock.patch.object(fusionsolar_monitor, "fetch_stations_api", return_value=[{}]), \
+                mock.patch.object(fusionsolar_monitor, "_portal_generation_report", return_value=True) as portal, \
+                mock.patch.object(fusionsolar_monitor, "log_generation"):
+            results = fusionsolar_monitor.run_generation_reports(stations, dry_run=True)
+        self.assertEqual(results, {STATION_CODE: True, SECOND_STATION_CODE: True})
+        self.assertEqual([c.args[1]["station_code"] for c in portal.call_args_list], [SECOND_STATION_CODE])
+        self.assertEqual(self.api.calls.count("getStationRealKpi"), 1)
+
+    def test_watch_polls_on_one_client_and_relogs_when_expired(self):
+        stations = fusionsolar_monitor.station_configs(self.cfg)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            self.api.tokens.clear()  # session expires between polls
+
+        with mock.patch.object(fusionsolar_monitor, "launch_portal_browser") as launch, \
+                mock.patch.object(fusionsolar_monitor, "log_inverter_check") as log_check:
+            ok = fusionsolar_monitor.run_watch(stations, 300, max_polls=3, sleep=sleep)
+        launch.assert_not_called()
+        self.assertTrue(ok)
+        self.assertEqual(log_check.call_count, 3)
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(0 < s <= 300 for s in sleeps))
+        self.assertEqual(self.api.logins, 3)
+
+    def test_backfill_range_reads_northbound(self):
+        with mock.patch.object(notion_sync, "launch_portal_browser") as launch, \
+                mock.patch.object(notion_sync, "upsert_notion_row", return_value=None) as upsert, \
+                mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync.time, "sleep"):
+            notion_sync.backfill_range(self.cfg, "db", "hh", date(2026, 3, 1), date(2026, 3, 2))
+        launch.assert_not_called()
+        self.assertEqual(upsert.call_count, 2)
+        first = upsert.call_args_list[0]
+        self.assertEqual(first.args[1], "2026-03-01")
+        self.assertEqual(first.kwargs["inv_kwh"], 991.0)
+        self.assertIn('"12:00": 12.0', first.kwargs["hourly_yield_json"])
+
+    def test_failed_northbound_backfill_resumes_on_the_portal(self):
+        def month_report(client, station_code, year, month):
+            if month == 4:
+                raise northbound_client.NorthboundError("failCode 20001")
+            return []
+
+        with mock.patch.object(northbound_client.NorthboundClient, "month_report", month_report), \
+                mock.patch.object(northbound_client.NorthboundClient, "daily_power_curve", return_value=None), \
+                mock.patch.object(notion_sync, "_write_backfill_day", return_value=True), \
+                mock.patch.object(notion_sync, "_LazyPortalPage"), \
+                mock.patch.object(notion_sync, "_backfill_days", wraps=notion_sync._backfill_days) as backfill, \
+                mock.patch.object(notion_sync, "load_hourly_ssp", return_value={}), \
+                mock.patch.object(notion_sync, "monthly_report_rows", return_value=[]), \
+                mock.patch.object(notion_sync, "fetch_energy_balance_batch", return_value={}):
+            notion_sync.backfill_range(self.cfg, "db", None, date(2026, 3, 30), date(2026, 4, 2))
+        self.assertEqual([c.args[3:5] for c in backfill.call_args_list],
+                         [(date(2026, 3, 30), date(2026, 4, 2)), (date(2026, 4, 1), date(2026, 4, 2))])
+
+    def test_token_file_and_timezone_come_from_module_and_config(self):
+        client = northbound_client.client_from_config({**self.cfg, "location": {"timezone": "Europe/London"}})
+        self.assertEqual(client.token_file, northbound_client.TOKEN_FILE)
+        self.assertTrue(str(client.token_file).startswith(self.tmp.name))
+        # BST midnight is 23:00 UTC the day before, whatever the host timezone
+        self.assertEqual(northbound_client._day_start_ms(date(2026, 6, 1), client.tz),
+                         int(datetime(2026, 5, 31, 23, 0, tzinfo=timezone.utc).timestamp() * 1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
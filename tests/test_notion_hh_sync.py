@@ -0,0 +1,136 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+import notion_sync
+
+DAY = date(2026, 6, 10)
+CFG = {"station_name": "Point Lane", "stark": {"site_name": "Point Lane"}}
+
+
+def _entries():
+    start = datetime(2026, 6, 10)
+    return [
+        {"settlement_period": sp, "interval_end": (start + timedelta(minutes=30 * sp)).strftime("%Y-%m-%d %H:%M"),
+         "consumption_kwh": float(sp)}
+        for sp in range(1, 49)
+    ]
+
+
+def _read_page(page_id, props):
+    """Turn a write payload into what a database query returns for that page."""
+    read = {}
+    for name, spec in props.items():
+        if "title" in spec or "rich_text" in spec:
+            kind = "title" if "title" in spec else "rich_text"
+            read[name] = {kind: [{"plain_text": t["text"]["content"]} for t in spec[kind]]}
+        elif "relation" in spec:
+            read[name] = {"relation": [{"id": r["id"]} for r in spec["relation"]], "has_more": False}
+        else:
+            read[name] = dict(spec)
+    return {"id": page_id, "properties": read}
+
+
+def _response(status=200, payload=None, headers=None):
+    r = mock.Mock(status_code=status, headers=headers or {}, text="")
+    r.json.return_value = payload or {}
+    return r
+
+
+class HHIndexTests(unittest.TestCase):
+    def test_index_is_one_paginated_date_filtered_scan(self):
+        props = notion_sync._hh_props("2026-06-10-SP01", "2026-06-10", 1, "2026-06-10 00:30", 1.0, "Point Lane")
+        pages = [
+            _response(payload={"results": [_read_page("p1", props)], "has_more": True, "next_cursor": "c2"}),
+            _response(payload={"results": [], "has_more": False}),
+        ]
+        with mock.patch.object(notion_sync.requests, "post", side_effect=pages) as post:
+            index = notion_sync.load_hh_index("hh", DAY, DAY + timedelta(days=2))
+        self.assertEqual(list(index), ["2026-06-10-SP01"])
+        self.assertEqual(index["2026-06-10-SP01"]["id"], "p1")
+        first, second = (c.kwargs["json"] for c in post.call_args_list)
+        self.assertEqual([f["rich_text"]["equals"] for f in first["filter"]["or"]],
+                         ["2026-06-10", "2026-06-11", "2026-06-12"])
+        self.assertEqual(second["start_cursor"], "c2")
+
+
+class BulkHHSyncTests(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(notion_sync, "ensure_stark_hh_csv", return_value="stark.csv"),
+            mock.patch.object(notion_sync, "parse_stark_hh_csv", return_value=_entries()),
+            mock.patch.object(notion_sync, "load_settlement_period_ssp", return_value={}),
+            mock.patch.object(notion_sync, "HH_WRITES_PER_SECOND", 0),
+            mock.patch.object(notion_sync.time, "sleep"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _index(self, changed=(), missing=()):
+        index = {}
+        for row in _entries():
+            sp = row["settlement_period"]
+            if sp in missing:
+                continue
+            hh_key = f"2026-06-10-SP{sp:02d}"
+            kwh = row["consumption_kwh"] + (1.0 if sp in changed else 0.0)
+            props = notion_sync._hh_props(hh_key, "2026-06-10", sp, row["interval_end"], kwh,
+                                          "Point Lane", "daily-page-1")
+            index[hh_key] = _read_page(f"page-{sp}", props)
+        # relation ids compare without dashes
+        for page in index.values():
+            page["properties"]["Daily Record"]["relation"][0]["id"] = "daily-page-1".replace("-", "")
+        return index
+
+    def test_only_changed_and_new_rows_are_written(self):
+        index = self._index(changed=(5, 6), missing=(48,))
+        with mock.patch.object(notion_sync.requests, "patch",
+                               side_effect=lambda url, **kw: _response(payload={"id": url.rsplit("/", 1)[1]})) as patch, \
+                mock.patch.object(notion_sync.requests, "post", return_value=_response(payload={"id": "new"})) as post:
+            synced = notion_sync.sync_stark_hh_day(CFG, "hh", "daily-page-1", DAY, hh_index=index)
+        self.assertEqual(synced, 48)
+        self.assertEqual(sorted(c.args[0].rsplit("/", 1)[1] for c in patch.call_args_list), ["page-5", "page-6"])
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(index["2026-06-10-SP48"]["id"], "new")
+
+        # a second pass over the updated index writes nothing
+        with mock.patch.object(notion_sync.requests, "patch") as patch, \
+                mock.patch.object(notion_sync.requests, "post") as post:
+            notion_sync.sync_stark_hh_day(CFG, "hh", "daily-page-1", DAY, hh_index=index)
+        patch.assert_not_called()
+        post.assert_not_called()
+
+    def test_rate_limited_write_is_retried(self):
+        index = self._index(changed=(1,))
+        replies = [_response(429, headers={"Retry-After": "2"}), _response(payload={"id": "page-1"})]
+        with mock.patch.object(notion_sync.requests, "patch", side_effect=replies) as patch:
+            synced = notion_sync.sync_stark_hh_day(CFG, "hh", "daily-page-1", DAY, hh_index=index)
+        self.assertEqual(synced, 48)
+        self.assertEqual(patch.call_count, 2)
+        notion_sync.time.sleep.assert_any_call(2.0)
+
+    def test_without_index_the_day_is_loaded_in_one_query(self):
+        with mock.patch.object(notion_sync, "load_hh_index", return_value=self._index()) as load, \
+                mock.patch.object(notion_sync.requests, "patch") as patch:
+            notion_sync.sync_stark_hh_day(CFG, "hh", "daily-page-1", DAY)
+        load.assert_called_once_with("hh", DAY, DAY, limiter=None)
+        patch.assert_not_called()
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_calls_are_spaced_across_callers(self):
+        now = [100.0]
+        waits = []
+
+        def sleep(s):
+            waits.append(round(s, 3))
+
+        limiter = notion_sync._RateLimiter(4.0, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(waits, [0.25, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
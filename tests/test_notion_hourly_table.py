@@ -0,0 +1,126 @@
+import unittest
+from unittest import mock
+
+import notion_sync
+
+HOURLY = {"07:00": 12.5, "08:00": 40.25}
+SSP = {"07:00": 55.0}
+
+
+def _response(payload=None, status=200, headers=None):
+    r = mock.Mock(status_code=status, text="", headers=headers or {})
+    r.json.return_value = payload or {}
+    r.raise_for_status.return_value = None
+    return r
+
+
+class _Blocks:
+    """requests.request stand-in for the blocks API, answering by method with queued responses."""
+
+    def __init__(self, children, patch=None, delete=None):
+        self.children = children
+        self.patch = list(patch or [_response({"id": "p1"})])
+        self.delete = list(delete or [])
+        self.calls = []
+
+    def __call__(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if method == "GET":
+            return _response(self.children)
+        queue = self.patch if method == "PATCH" else self.delete
+        return queue.pop(0) if len(queue) > 1 else (queue[0] if queue else _response())
+
+    def urls(self, method):
+        return [url for m, url, _ in self.calls if m == method]
+
+
+def _toggle(block_id, title=notion_sync.HOURLY_TABLE_TITLE):
+    return {"id": block_id, "type": "toggle", "toggle": {"rich_text": [{"plain_text": title}]}}
+
+
+class HourlyTableTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(notion_sync, "_get_db_prop_types", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.block = notion_sync.hourly_table_block(HOURLY, SSP)
+
+    def _upsert(self):
+        return notion_sync.upsert_notion_row(
+            "db", "2026-06-10", pv_kwh=52.75, inv_kwh=52.0, station_name="Point Lane",
+            hourly_table=self.block,
+        )
+
+    def test_new_page_is_created_with_its_table(self):
+        with mock.patch.object(notion_sync, "query_notion_row", return_value=None), \
+                mock.patch.object(notion_sync.requests, "post", return_value=_response({"id": "p1"})) as post, \
+                mock.patch.object(notion_sync.requests, "patch") as patch:
+            self.assertEqual(self._upsert(), "p1")
+        post.assert_called_once()
+        self.assertEqual(post.call_args.kwargs["json"]["children"], [self.block])
+        patch.assert_not_called()
+
+    def test_existing_page_table_is_replaced_not_duplicated(self):
+        children = {"results": [_toggle("old-1"), {"id": "para", "type": "paragraph"},
+                                _toggle("old-2"), _toggle("notes", "Notes")], "has_more": False}
+        blocks = _Blocks(children)
+        with mock.patch.object(notion_sync, "query_notion_row", return_value="p1"), \
+                mock.patch.object(notion_sync.requests, "patch", return_value=_response({"id": "p1"})) as page_patch, \
+                mock.patch.object(notion_sync.requests, "request", blocks):
+            self.assertEqual(self._upsert(), "p1")
+        self.assertIn("/pages/p1", page_patch.call_args.args[0])
+        (_, _, append), = [c for c in blocks.calls if c[0] == "PATCH"]
+        self.assertEqual(append["json"], {"children": [self.block]})
+        self.assertEqual([u.rsplit("/", 1)[1] for u in blocks.urls("DELETE")], ["old-1", "old-2"])
+
+    def test_failed_append_keeps_the_old_table(self):
+        blocks = _Blocks({"results": [_toggle("old-1")], "has_more": False}, patch=[_response(status=400)])
+        with mock.patch.object(notion_sync.requests, "request", blocks):
+            notion_sync.replace_hourly_table("p1", self.block)
+        self.assertEqual(blocks.urls("DELETE"), [])
+
+    def test_rate_limited_append_is_retried_and_failed_deletes_logged(self):
+        limited = _response(status=429, headers={"Retry-After": "3"})
+        blocks = _Blocks({"results": [_toggle("old-1"), _toggle("old-2")], "has_more": False},
+                         patch=[limited, _response({"id": "p1"})],
+                         delete=[limited, _response(), _response(status=404)])
+        with mock.patch.object(notion_sync.requests, "request", blocks), \
+                mock.patch.object(notion_sync.time, "sleep") as sleep, \
+                self.assertLogs(notion_sync.log, "WARNING") as logs:
+            notion_sync.replace_hourly_table("p1", self.block)
+        self.assertEqual(len(blocks.urls("PATCH")), 2)
+        self.assertEqual([u.rsplit("/", 1)[1] for u in blocks.urls("DELETE")], ["old-1", "old-1", "old-2"])
+        self.assertEqual(sleep.call_args_list, [mock.call(3.0), mock.call(3.0)])
+        self.assertIn("old-2", logs.output[-1])
+
+    def test_every_request_takes_a_limiter_slot(self):
+        limiter = mock.Mock()
+        children = {"results": [_toggle("old-1")], "has_more": False}
+        with mock.patch.object(notion_sync.requests, "post", return_value=_response({"results": [{"id": "p1"}]})), \
+                mock.patch.object(notion_sync.requests, "patch", return_value=_response({"id": "p1"})), \
+                mock.patch.object(notion_sync.requests, "request", _Blocks(children)):
+            notion_sync.upsert_notion_row("db", "2026-06-10", pv_kwh=52.75, inv_kwh=52.0,
+                                          station_name="Point Lane", hourly_table=self.block, limiter=limiter)
+        # query, page PATCH, children GET, append PATCH, one DELETE
+        self.assertEqual(limiter.wait.call_count, 5)
+
+    def test_rate_limited_query_is_retried_not_read_as_missing(self):
+        responses = [_response(status=429, headers={"Retry-After": "2"}), _response({"results": [{"id": "p1"}]})]
+        with mock.patch.object(notion_sync.requests, "post", side_effect=responses) as post, \
+                mock.patch.object(notion_sync.requests, "patch", return_value=_response({"id": "p1"})), \
+                mock.patch.object(notion_sync.time, "sleep") as sleep:
+            page_id = notion_sync.upsert_notion_row("db", "2026-06-10", pv_kwh=52.75, inv_kwh=52.0,
+                                                    station_name="Point Lane")
+        self.assertEqual(page_id, "p1")
+        self.assertTrue(all(c.args[0].endswith("/query") for c in post.call_args_list))
+        sleep.assert_called_once_with(2.0)
+
+    def test_table_rows(self):
+        rows = self.block["toggle"]["children"][0]["table"]["children"]
+        cells = [[c[0]["text"]["content"] for c in r["table_row"]["cells"]] for r in rows]
+        self.assertEqual(cells[1:], [["07:00", "12.500", "55.000"], ["08:00", "40.250", ""]])
+        self.assertIsNone(notion_sync.hourly_table_block({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import notion_schema_cache
+import notion_sync
+import stark_daily_sync
+
+DB_ID = "1234abcd-0000-0000-0000-000000000001"
+
+
+def _database(extra=None):
+    props = {
+        "Date": {"type": "title"},
+        "Total kWh": {"type": "number"},
+        "Rev £k": {"type": "formula"},
+        "Month Total": {"type": "rollup"},
+    }
+    props.update(extra or {})
+    return {"object": "database", "id": DB_ID, "properties": props}
+
+
+def _response(payload, status=200):
+    r = mock.Mock(status_code=status, text="")
+    r.json.return_value = payload
+    r.raise_for_status.return_value = None
+    return r
+
+
+class NotionSchemaCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_file = Path(self.tmp.name) / "schema.json"
+        patchers = [
+            mock.patch.dict(os.environ, {"NOTION_SCHEMA_CACHE_FILE": str(self.cache_file)}),
+            mock.patch.object(notion_schema_cache, "_MEMORY", {}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_writable_plan_excludes_computed_columns(self):
+        schema = notion_schema_cache.DatabaseSchema.from_database(_database())
+        self.assertEqual(schema.writable, {"Date", "Total kWh"})
+        self.assertEqual(schema["Rev £k"], "formula")
+        self.assertIs(notion_schema_cache.writable_columns(schema), schema.writable)
+        self.assertIsNone(notion_schema_cache.writable_columns(None))
+
+    def test_fetched_once_per_process_and_reused_from_disk(self):
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(_database())) as get:
+            first = notion_schema_cache.get(DB_ID, {}, now=1000.0)
+            again = notion_schema_cache.get(DB_ID.replace("-", ""), {}, now=1001.0)
+        self.assertIs(first, again)
+        self.assertEqual(get.call_count, 1)
+
+        # a new process inside the TTL reads the file instead of Notion
+        notion_schema_cache._MEMORY.clear()
+        with mock.patch.object(notion_schema_cache.requests, "get") as get:
+            schema = notion_schema_cache.get(DB_ID, {}, now=1000.0 + 60)
+        get.assert_not_called()
+        self.assertEqual(schema.writable, {"Date", "Total kWh"})
+
+        # past the TTL it is fetched again
+        notion_schema_cache._MEMORY.clear()
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(_database())) as get:
+            notion_schema_cache.get(DB_ID, {}, now=1000.0 + notion_schema_cache.DEFAULT_TTL_S + 1)
+        self.assertEqual(get.call_count, 1)
+
+    def test_remember_picks_up_added_columns_and_invalidate_forces_refetch(self):
+        notion_schema_cache.remember(_database())
+        patched = notion_schema_cache.remember(_database({"Gen MWh": {"type": "number"}}))
+        self.assertIn("Gen MWh", notion_schema_cache.get(DB_ID, {}).writable)
+        self.assertIs(notion_schema_cache.get(DB_ID, {}), patched)
+
+        notion_schema_cache.invalidate(DB_ID)
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(_database())) as get:
+            notion_schema_cache.get(DB_ID, {})
+        self.assertEqual(get.call_count, 1)
+
+    def test_stark_startup_reads_schema_once(self):
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(_database())) as get, \
+                mock.patch.object(stark_daily_sync.requests, "patch",
+                                  return_value=_response(_database(stark_daily_sync._db_schema_props()))) as patch:
+            stark_daily_sync.ensure_schema("token", DB_ID)
+            prop_types = stark_daily_sync.get_db_property_types("token", DB_ID)
+        self.assertEqual(get.call_count, 1)
+        patch.assert_called_once()
+        self.assertIn("SP01_kWh", prop_types.writable)
+
+    def test_stark_rejected_write_refreshes_schema_and_retries(self):
+        notion_schema_cache.remember(_database(stark_daily_sync._db_schema_props()))  # stale: has "Gen MWh"
+        live = _database()  # column deleted in Notion since
+        page_writes = [_response({}, status=400), _response({"id": "p1"})]
+
+        def patch(url, headers=None, json=None):
+            if "/databases/" in url:
+                return _response(_database(json["properties"]))
+            return page_writes.pop(0)
+
+        def build(date_str, sp_kwh, sp_ssp, revenue, prop_types):
+            return {name: {} for name in prop_types.writable}
+
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(live)) as get, \
+                mock.patch.object(stark_daily_sync.requests, "post", return_value=_response({"results": [{"id": "p1"}]})), \
+                mock.patch.object(stark_daily_sync.requests, "patch", side_effect=patch) as patch_mock, \
+                mock.patch.object(stark_daily_sync, "build_notion_properties", side_effect=build), \
+                mock.patch("builtins.print"):
+            ok, _ = stark_daily_sync.upsert_day("token", DB_ID, "2026-06-10", {1: 1.0}, {}, None,
+                                                notion_schema_cache.get(DB_ID, {}))
+        self.assertTrue(ok)
+        self.assertEqual(get.call_count, 1)
+        db_patch = [c for c in patch_mock.call_args_list if "/databases/" in c.args[0]]
+        self.assertIn("Gen MWh", db_patch[0].kwargs["json"]["properties"])
+        self.assertIn("Gen MWh", notion_schema_cache.get(DB_ID, {}).writable)
+
+    def test_notion_sync_upserts_share_one_schema_fetch(self):
+        schema_db = _database({"PV Yield (kWh)": {"type": "number"}, "PV Yield (MWh)": {"type": "formula"}})
+        with mock.patch.object(notion_schema_cache.requests, "get", return_value=_response(schema_db)) as get, \
+                mock.patch.object(notion_sync, "query_notion_row", return_value=None), \
+                mock.patch.object(notion_sync.requests, "post", return_value=_response({"id": "p1"})) as post:
+            for day in ("2026-06-10", "2026-06-11"):
+                notion_sync.upsert_notion_row(DB_ID, day, pv_kwh=1000.0, inv_kwh=990.0, station_name="Point Lane")
+        self.assertEqual(get.call_count, 1)
+        props = post.call_args.kwargs["json"]["properties"]
+        self.assertEqual(sorted(props), ["Date", "PV Yield (kWh)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import payload_cache
+
+
+class PayloadCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"FUSIONSOLAR_CACHE_DIR": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip_is_gzipped_under_station_and_endpoint(self):
+        payload_cache.store("NE=123", "energy-balance", "2026-03-01", {"data": [1, 2]})
+        path = payload_cache.cache_path("NE=123", "energy-balance", "2026-03-01")
+        self.assertTrue(path.name.endswith(".json.gz"))
+        self.assertEqual(path.read_bytes()[:2], b"\x1f\x8b")
+        self.assertEqual(
+            payload_cache.load("NE=123", "energy-balance", "2026-03-01", date(2026, 3, 1)),
+            {"data": [1, 2]},
+        )
+
+    def test_past_periods_written_after_they_settled_never_expire(self):
+        payload_cache.store("NE=123", "monthly-report", "2020-01", [{"date": "2020-01-01"}])
+        path = payload_cache.cache_path("NE=123", "monthly-report", "2020-01")
+        written = datetime(2020, 2, 1, 3, 0).timestamp()
+        os.utime(path, (written, written))
+        self.assertIsNotNone(payload_cache.load("NE=123", "monthly-report", "2020-01", date(2020, 1, 31)))
+
+    def test_cached_during_the_period_expires_after_it(self):
+        payload_cache.store("NE=123", "monthly-report", "2020-01", [{"date": "2020-01-01"}])
+        path = payload_cache.cache_path("NE=123", "monthly-report", "2020-01")
+        for written in (datetime(2020, 1, 15, 14, 0), datetime(2020, 2, 1, 0, 30)):  # mid-month, before settling
+            os.utime(path, (written.timestamp(), written.timestamp()))
+            self.assertIsNone(payload_cache.load("NE=123", "monthly-report", "2020-01", date(2020, 1, 31)))
+        # a re-fetch after settling is kept for good
+        now = time.time()
+        os.utime(path, (now, now))
+        self.assertIsNotNone(payload_cache.load("NE=123", "monthly-report", "2020-01", date(2020, 1, 31)))
+
+    def test_today_expires_after_ttl(self):
+        today = date.today()
+        payload_cache.store("NE=123", "energy-balance", today.isoformat(), {"x": 1})
+        path = payload_cache.cache_path("NE=123", "energy-balance", today.isoformat())
+        self.assertIsNotNone(payload_cache.load("NE=123", "energy-balance", today.isoformat(), today))
+        old = time.time() - payload_cache.DEFAULT_TODAY_TTL_S - 5
+        os.utime(path, (old, old))
+        self.assertIsNone(payload_cache.load("NE=123", "energy-balance", today.isoformat(), today))
+
+    def test_cached_fetches_once_and_skips_empty_results(self):
+        fetch = mock.Mock(side_effect=[[], [{"date": "2026-02-01"}], AssertionError("refetched")])
+        args = ("NE=123", "monthly-report", "2026-02", date(2026, 2, 28))
+        self.assertEqual(payload_cache.cached(*args, fetch), [])
+        self.assertEqual(payload_cache.cached(*args, fetch), [{"date": "2026-02-01"}])
+        self.assertEqual(payload_cache.cached(*args, fetch), [{"date": "2026-02-01"}])
+
+    def test_disabled_cache_neither_reads_nor_writes(self):
+        with mock.patch.dict(os.environ, {"FUSIONSOLAR_CACHE": "0"}):
+            payload_cache.store("NE=123", "energy-balance", "2026-03-01", {"x": 1})
+        self.assertFalse(payload_cache.cache_path("NE=123", "energy-balance", "2026-03-01").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+import payload_cache
+import stark_daily_sync
+from services import reconciliation
+
+DAY = date(2026, 6, 10)
+
+
+def _bell(peak=40.0):
+    """48-SP kWh profile: zero at night, a smooth curve from SP11 to SP38."""
+    sp = np.arange(1, 49)
+    values = np.where((sp >= 11) & (sp <= 38), peak * np.sin(np.pi * (sp - 10) / 29), 0.0)
+    return {int(k): float(v) for k, v in zip(sp, values)}
+
+
+class ReconcileTests(unittest.TestCase):
+    def _one(self, stark, fusion=None):
+        fusion = _bell() if fusion is None else fusion
+        fusion_map = {DAY: fusion} if fusion else {}
+        return reconciliation.reconcile([DAY], {DAY: stark}, fusion_map)[0]
+
+    def test_matching_profile_is_ok(self):
+        stark = {sp: v * 1.02 for sp, v in _bell().items()}
+        self.assertEqual(self._one(stark).category, reconciliation.OK)
+
+    def test_blank_producing_sps_are_missing(self):
+        stark = dict(_bell())
+        for sp in (20, 21, 22):
+            stark[sp] = 0.0
+        result = self._one(stark)
+        self.assertEqual(result.category, reconciliation.MISSING_SP)
+        self.assertTrue(result.rescrape)
+
+    def test_offset_profile_is_shifted(self):
+        fusion = _bell()
+        stark = {sp: fusion.get(sp - 2, 0.0) for sp in range(1, 49)}
+        result = self._one(stark, fusion)
+        self.assertEqual(result.category, reconciliation.SHIFTED_INTERVAL)
+        self.assertIn("+2", result.detail)
+        self.assertTrue(result.rescrape)
+
+    def test_constant_ratio_is_scale_error(self):
+        stark = {sp: v * 0.5 for sp, v in _bell().items()}
+        result = self._one(stark)
+        self.assertEqual(result.category, reconciliation.SCALE_ERROR)
+        self.assertFalse(result.rescrape)
+
+    def test_clipped_peak_is_curtailment(self):
+        stark = {sp: min(v, 25.0) for sp, v in _bell().items()}
+        result = self._one(stark)
+        self.assertEqual(result.category, reconciliation.CURTAILMENT)
+        self.assertFalse(result.rescrape)
+
+    def test_day_without_fusion_profile_has_no_reference(self):
+        self.assertEqual(self._one(_bell(), fusion={}).category, reconciliation.NO_REFERENCE)
+
+    def test_many_days_classified_in_one_pass(self):
+        days = [DAY + timedelta(days=i) for i in range(3)]
+        fusion = {d: _bell() for d in days}
+        stark = {
+            days[0]: _bell(),
+            days[1]: {sp: v * 0.5 for sp, v in _bell().items()},
+            days[2]: {sp: (0.0 if sp == 24 else v) for sp, v in _bell().items()},
+        }
+        results = reconciliation.reconcile(days, stark, fusion)
+        self.assertEqual([r.category for r in results],
+                         [reconciliation.OK, reconciliation.SCALE_ERROR, reconciliation.MISSING_SP])
+        self.assertEqual(reconciliation.rescrape_dates(results), [days[2]])
+        self.assertEqual(reconciliation.summarise(results),
+                         {"ok": 1, "scale-error": 1, "missing-sp": 1})
+
+    def test_fusion_profile_from_product_power(self):
+        profile = reconciliation.fusion_sp_profile([12.0] * 288, DAY)
+        self.assertEqual(len(profile), 48)
+        self.assertEqual(profile[1], 6.0)
+
+
+class AuditStarkVsFusionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        gen_dir = Path(self.tmp.name) / "gen"
+        gen_dir.mkdir()
+        self.gen_dir = gen_dir
+        patchers = [
+            mock.patch.object(stark_daily_sync, "GEN_DIR", gen_dir),
+            mock.patch.dict(os.environ, {"FUSIONSOLAR_CACHE_DIR": str(Path(self.tmp.name) / "cache")}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cfg = {"station_code": "NE=123"}
+
+    def _stark(self, d, profile):
+        with open(self.gen_dir / f"stark_hh_data_{d.isoformat()}.csv", "w", encoding="utf-8") as fh:
+            fh.write("Period,Energy kWh\n")
+            for sp in range(1, 49):
+                fh.write(f"{sp},{profile.get(sp, 0.0)}\n")
+
+    def _fusion(self, d, kw):
+        payload_cache.store(self.cfg["station_code"], "energy-balance", d.isoformat(),
+                            {"data": {"productPower": kw}})
+
+    def test_only_corrupt_or_unprofiled_mismatches_are_rescraped(self):
+        scaled, shifted, bare = DAY, DAY + timedelta(days=1), DAY + timedelta(days=2)
+        # FusionSolar 5-min power that aggregates to the _bell() SP profile
+        kw = [v * 2.0 for sp in range(1, 49) for v in [_bell()[sp]] * 6]
+        for d in (scaled, shifted):
+            self._fusion(d, kw)
+        self._stark(scaled, {sp: v * 0.5 for sp, v in _bell().items()})
+        self._stark(shifted, {sp: _bell().get(sp - 2, 0.0) for sp in range(1, 49)})
+
+        fusion_totals = {d.isoformat(): 100.0 for d in (scaled, shifted, bare)}
+        stark_totals = {scaled.isoformat(): 50.0, shifted.isoformat(): 80.0, bare.isoformat(): 50.0}
+        with mock.patch("builtins.print"):
+            corrupt, unprofiled = stark_daily_sync.audit_stark_vs_fusion(
+                self.cfg, fusion_totals, stark_totals, scaled, bare, threshold_pct=8.0,
+            )
+        # scale error is explained, the shift is caught, and the day without
+        # SP data is left to the daily-total check
+        self.assertEqual(corrupt, [shifted])
+        self.assertEqual(unprofiled, [bare])
+
+    def test_days_with_agreeing_totals_are_not_reconciled(self):
+        # a real zero SP (a trip) with totals inside the threshold is left alone
+        self._stark(DAY, {sp: (0.0 if sp == 24 else v) for sp, v in _bell().items()})
+        self._fusion(DAY, [v * 2.0 for sp in range(1, 49) for v in [_bell()[sp]] * 6])
+        with mock.patch("builtins.print"):
+            corrupt, unprofiled = stark_daily_sync.audit_stark_vs_fusion(
+                self.cfg, {DAY.isoformat(): 100.0}, {DAY.isoformat(): 97.0}, DAY, DAY, threshold_pct=8.0,
+            )
+        self.assertEqual((corrupt, unprofiled), ([], []))
+
+    def test_clock_change_day_is_not_profiled(self):
+        spring = date(2026, 3, 29)
+        self.assertEqual(reconciliation.fusion_sp_profile([12.0] * 288, spring), {})
+        self._stark(spring, _bell())
+        self._fusion(spring, [v * 2.0 for sp in range(1, 49) for v in [_bell()[sp]] * 6])
+        with mock.patch("builtins.print"):
+            corrupt, unprofiled = stark_daily_sync.audit_stark_vs_fusion(
+                self.cfg, {spring.isoformat(): 100.0}, {spring.isoformat(): 50.0}, spring, spring, threshold_pct=8.0,
+            )
+        self.assertEqual((corrupt, unprofiled), ([], [spring]))
+
+    def test_nightly_run_rescrapes_corrupt_cached_csv(self):
+        # a blank producing SP parses as 0.0, so the file passes validate_cached_csv
+        self._stark(DAY, {sp: ("" if sp == 24 else v) for sp, v in _bell().items()})
+        self._fusion(DAY, [v * 2.0 for sp in range(1, 49) for v in [_bell()[sp]] * 6])
+        ok, _ = stark_daily_sync.validate_cached_csv(
+            self.gen_dir / f"stark_hh_data_{DAY.isoformat()}.csv", DAY, now=datetime.now())
+        self.assertTrue(ok)
+
+        argv = ["stark_daily_sync.py", "--start", DAY.isoformat(), "--end", DAY.isoformat(),
+                "--backfill-check-start", DAY.isoformat(), "--allow-scrape-fail"]
+        cfg = dict(self.cfg, notion_token="token", notion_fusionsolar_db_id="fusion-db")
+        with mock.patch.object(sys, "argv", argv), \
+                mock.patch.object(stark_daily_sync, "load_config", return_value=cfg), \
+                mock.patch.object(stark_daily_sync, "resolve_notion_db_id", return_value="stark-db"), \
+                mock.patch.object(stark_daily_sync, "ensure_schema"), \
+                mock.patch.object(stark_daily_sync, "get_db_property_types", return_value={}), \
+                mock.patch.object(stark_daily_sync, "build_market_data_provider", return_value=("test", None)), \
+                mock.patch.object(stark_daily_sync, "load_existing_date_titles",
+                                  return_value=({DAY.isoformat()}, {DAY.isoformat(): 800.0})), \
+                mock.patch.object(stark_daily_sync, "load_fusion_totals_by_date",
+                                  return_value={DAY.isoformat(): 900.0}), \
+                mock.patch.object(stark_daily_sync, "scrape_generation_batch", return_value={}) as scrape, \
+                mock.patch("builtins.print"), \
+                self.assertRaises(SystemExit):
+            stark_daily_sync.main()
+        scrape.assert_called_once_with(cfg, [DAY])
+
+
+if __name__ == "__main__":
+    unittest.main()
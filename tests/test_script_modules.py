@@ -0,0 +1,47 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import notion_sync
+import script_modules
+import stark_daily_sync
+
+
+class ScriptModulesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(sys.modules.pop, "counting_script", None)
+        self.path = Path(self.tmp.name) / "counting_script.py"
+        self.path.write_text("RUNS = []\nRUNS.append(1)\n")
+
+    def test_script_is_executed_once_per_process(self):
+        first = script_modules.load("counting_script", self.path)
+        second = script_modules.load("counting_script", self.path)
+        self.assertIs(first, second)
+        self.assertIs(sys.modules["counting_script"], first)
+        self.assertEqual(first.RUNS, [1])
+
+    def test_missing_file_and_failed_load(self):
+        self.assertIsNone(script_modules.load("no_such_script", Path(self.tmp.name) / "missing.py"))
+        broken = Path(self.tmp.name) / "broken_script.py"
+        broken.write_text("raise ImportError('boom')\n")
+        with self.assertRaises(ImportError):
+            script_modules.load("broken_script", broken)
+        self.assertNotIn("broken_script", sys.modules)
+
+    def test_scraper_loaders_share_the_registered_module(self):
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop("stark_scraper", None)
+            playwright_loaded = "playwright.sync_api" in sys.modules
+            scraper = stark_daily_sync._load_scraper("playwright")
+            self.assertIs(notion_sync._load_stark_module(), scraper)
+            self.assertIs(stark_daily_sync._load_scraper(), scraper)
+            # Playwright is only imported once a scrape actually starts
+            self.assertEqual("playwright.sync_api" in sys.modules, playwright_loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import os
 import tempfile
 import unittest
 from datetime import date, datetime, timezone
@@ -269,5 +270,87 @@ class StarkDailySyncPipelineTests(unittest.TestCase):
         self.assertEqual(total, 0)
 
 
+class StarkCsvCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.gen_dir = Path(self.tmp.name)
+        patcher = mock.patch.object(stark_daily_sync, "GEN_DIR", self.gen_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.now = datetime(2026, 3, 10, 23, 0)
+
+    def _csv(self, d, active_power_kw=100, periods=48, mtime=None):
+        path = self.gen_dir / f"stark_hh_data_{d.isoformat()}.csv"
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            handle.write("Period,Active Power kW\n")
+            for index in range(1, periods + 1):
+                handle.write(f"{index},{active_power_kw}\n")
+        ts = (mtime or datetime(2026, 3, 10, 12, 0)).timestamp()
+        os.utime(path, (ts, ts))
+        return path
+
+    def test_complete_settled_csv_is_reused(self):
+        d = date(2026, 3, 5)
+        self._csv(d)
+        cached, to_scrape, _ = stark_daily_sync.plan_scrape([d], capacity_kwp=8601, now=self.now)
+        self.assertIn(d.isoformat(), cached)
+        self.assertEqual(to_scrape, [])
+
+    def test_suspect_csvs_are_sent_to_scraper(self):
+        partial, empty, early, missing = (date(2026, 3, day) for day in (5, 6, 7, 8))
+        self._csv(partial, periods=30)
+        self._csv(empty, active_power_kw=0)
+        self._csv(early, mtime=datetime(2026, 3, 7, 15, 0))
+        cached, to_scrape, reasons = stark_daily_sync.plan_scrape(
+            [partial, empty, early, missing], capacity_kwp=8601, now=self.now
+        )
+        self.assertEqual(cached, {})
+        self.assertEqual(to_scrape, [partial, empty, early, missing])
+        self.assertEqual(reasons[missing.isoformat()], "missing")
+        self.assertEqual(reasons[empty.isoformat()], "zero total")
+
+    def test_implausible_total_is_rejected(self):
+        d = date(2026, 3, 5)
+        self._csv(d, active_power_kw=50000)
+        ok, reason = stark_daily_sync.validate_cached_csv(
+            self.gen_dir / f"stark_hh_data_{d.isoformat()}.csv", d, capacity_kwp=8601, now=self.now
+        )
+        self.assertFalse(ok)
+        self.assertIn("implausible", reason)
+
+    def test_clock_change_day_needs_fewer_periods(self):
+        d = date(2026, 3, 29)
+        self._csv(d, periods=46, mtime=datetime(2026, 3, 31, 1, 0))
+        ok, _ = stark_daily_sync.validate_cached_csv(
+            self.gen_dir / f"stark_hh_data_{d.isoformat()}.csv", d, now=datetime(2026, 4, 1)
+        )
+        self.assertTrue(ok)
+
+    def test_zero_day_is_accepted_once_a_rescrape_confirms_it(self):
+        zero, recovered = date(2026, 3, 5), date(2026, 3, 6)
+        for d in (zero, recovered):
+            self._csv(d, active_power_kw=0)
+        _, to_scrape, reasons = stark_daily_sync.plan_scrape([zero, recovered], now=self.now)
+        self.assertEqual(to_scrape, [zero, recovered])
+
+        # the re-scrape returns zeros again for one day and real data for the other
+        fresh = {zero.isoformat(): self._csv(zero, active_power_kw=0),
+                 recovered.isoformat(): self._csv(recovered)}
+        self.assertEqual(stark_daily_sync.confirm_zero_days(fresh, reasons), [zero.isoformat()])
+
+        cached, to_scrape, _ = stark_daily_sync.plan_scrape([zero, recovered], now=self.now)
+        self.assertEqual(sorted(cached), [zero.isoformat(), recovered.isoformat()])
+        self.assertEqual(to_scrape, [])
+
+    def test_forced_dates_bypass_cache(self):
+        d = date(2026, 3, 5)
+        self._csv(d)
+        cached, to_scrape, reasons = stark_daily_sync.plan_scrape([d], force_dates=[d], now=self.now)
+        self.assertEqual(cached, {})
+        self.assertEqual(to_scrape, [d])
+        self.assertEqual(reasons[d.isoformat()], "forced re-scrape")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import requests
+
+import stark_daily_sync
+import stark_scraper
+from stark_portal_fixture import MPAN, PASSWORD, USERNAME, StarkPortalFixture
+
+
+def _chromium_available():
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+        return True
+    except Exception:
+        return False
+
+
+class StarkPortalFixtureTests(unittest.TestCase):
+    """The stub itself must enforce what the real portal enforces."""
+
+    def test_signin_requires_csrf_token_and_rejects_headless_user_agent(self):
+        with StarkPortalFixture() as portal:
+            session = requests.Session()
+            page = session.get(portal.signin_url)
+            token = page.text.split('name="__RequestVerificationToken" value="')[1].split('"')[0]
+            form = {"__RequestVerificationToken": token, "Username": USERNAME, "Password": PASSWORD}
+
+            headless = session.post(
+                portal.signin_url, data=form, headers={"User-Agent": "HeadlessChrome/150.0"}
+            )
+            self.assertIn("/StarkID/SignIn", headless.url)
+
+            token = headless.text.split('name="__RequestVerificationToken" value="')[1].split('"')[0]
+            form["__RequestVerificationToken"] = token
+            ok = session.post(portal.signin_url, data=form, headers={"User-Agent": "Chrome/150.0"})
+            self.assertTrue(ok.url.endswith("/Portal/Home"))
+
+
+@unittest.skipUnless(_chromium_available(), "Playwright Chromium is not installed")
+class StarkHeadlessHarnessTests(unittest.TestCase):
+    """Replays login -> meter search -> report -> CSV download headless against the stub portal."""
+
+    def setUp(self):
+        self.portal = StarkPortalFixture().__enter__()
+        self.addCleanup(self.portal.__exit__, None, None, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = {
+            "STARK_SIGNIN_URL": self.portal.signin_url,
+            "BROWSER_SERVICE": "0",
+            "BROWSER_ALLOW_HOSTS": "127.0.0.1",
+        }
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_date_run_downloads_export_meter_csv(self):
+        saved = stark_scraper.run(
+            date_str="2026-03-05",
+            username=USERNAME,
+            password=PASSWORD,
+            search_text=MPAN,
+            output_dir=self.tmp.name,
+            headless=True,
+        )
+        self.assertIsNotNone(saved)
+        sp_kwh = stark_daily_sync.parse_stark_csv(Path(saved))
+        self.assertEqual(len(sp_kwh), 48)
+        self.assertAlmostEqual(sum(sp_kwh.values()), 48 * 60.0)
+        self.assertEqual(self.portal.exports[-1]["startDate"], "05/03/2026")
+        self.assertEqual(self.portal.exports[-1]["interval"], "Half Hourly")
+
+    def test_batch_reuses_one_login_for_all_dates(self):
+        results = stark_scraper.run_batch(
+            dates=["2026-03-05", "2026-03-06"],
+            username=USERNAME,
+            password=PASSWORD,
+            search_text=MPAN,
+            output_dir=self.tmp.name,
+            headless=True,
+        )
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(self.portal.sessions), 1)
+        self.assertEqual([e["startDate"] for e in self.portal.exports], ["05/03/2026", "06/03/2026"])
+
+
+if __name__ == "__main__":
+    unittest.main()
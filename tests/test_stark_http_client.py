@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import stark_daily_sync
+import stark_http_client
+from stark_portal_fixture import MPAN, PASSWORD, USERNAME, StarkPortalFixture
+
+
+class StarkHttpClientTests(unittest.TestCase):
+    def setUp(self):
+        self.portal = StarkPortalFixture().__enter__()
+        self.addCleanup(self.portal.__exit__, None, None, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"STARK_SIGNIN_URL": self.portal.signin_url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run_batch_logs_in_once_and_downloads_each_date(self):
+        results = stark_http_client.run_batch(
+            dates=["2026-03-05", "2026-03-06"],
+            username=USERNAME,
+            password=PASSWORD,
+            search_text=MPAN,
+            output_dir=self.tmp.name,
+        )
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(self.portal.sessions), 1)
+        self.assertEqual([e["meterId"] for e in self.portal.exports], ["export-1", "export-1"])
+        self.assertEqual(self.portal.exports[0]["interval"], "Half Hourly")
+        sp_kwh = stark_daily_sync.parse_stark_csv(Path(results["2026-03-06"]))
+        self.assertEqual(len(sp_kwh), 48)
+        self.assertAlmostEqual(sum(sp_kwh.values()), 48 * 60.0)
+
+    def test_bad_credentials_return_none_for_every_date(self):
+        results = stark_http_client.run_batch(
+            dates=["2026-03-05"],
+            username=USERNAME,
+            password="wrong",
+            search_text=MPAN,
+            output_dir=self.tmp.name,
+        )
+        self.assertEqual(results, {"2026-03-05": None})
+        self.assertEqual(self.portal.exports, [])
+
+    def test_expired_session_is_renewed_mid_batch(self):
+        client = stark_http_client.StarkHttpClient()
+        self.assertTrue(client.login(USERNAME, PASSWORD))
+        meter_key, label = client.find_meter(MPAN, "K21W001099")
+        self.assertEqual(meter_key, "export-1")
+        self.assertIn("Export", label)
+
+        self.portal.sessions.clear()
+        out = Path(self.tmp.name) / "day.csv"
+        client.export_day(meter_key, date(2026, 3, 7), out)
+        self.assertTrue(out.exists())
+        self.assertEqual(len(self.portal.sessions), 1)
+
+    def test_sync_falls_back_to_playwright_for_dates_http_missed(self):
+        http_client = mock.Mock()
+        http_client.run_batch.return_value = {"2026-03-05": "/tmp/a.csv", "2026-03-06": None}
+        playwright = mock.Mock()
+        playwright.run_batch.return_value = {"2026-03-06": "/tmp/b.csv"}
+        loaders = {"http": http_client, "playwright": playwright}
+        with mock.patch.dict(os.environ, {"STARK_CLIENT": "http"}), \
+                mock.patch.object(stark_daily_sync, "_load_scraper", side_effect=lambda kind=None: loaders[kind]):
+            results = stark_daily_sync.scrape_generation_batch({}, [date(2026, 3, 5), date(2026, 3, 6)])
+        self.assertEqual(results["2026-03-06"], Path("/tmp/b.csv"))
+        self.assertEqual(playwright.run_batch.call_args.kwargs["dates"], ["2026-03-06"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import stark_scraper
+
+
+class PageHealthTests(unittest.TestCase):
+    def _health(self, heap_bytes=50 * 1024 * 1024, **env):
+        with mock.patch.dict(os.environ, env):
+            health = stark_scraper._PageHealth()
+        page = mock.Mock()
+        cdp = page.context.new_cdp_session.return_value
+        cdp.send.side_effect = lambda method: (
+            {"metrics": [{"name": "JSHeapUsedSize", "value": heap_bytes}]}
+            if method == "Performance.getMetrics" else {}
+        )
+        health.reset_page(page)
+        return health
+
+    def test_steady_latency_keeps_page(self):
+        health = self._health()
+        for _ in range(10):
+            self.assertIsNone(health.record(5.0, ok=True))
+
+    def test_slowdown_against_baseline_triggers_recycle(self):
+        health = self._health()
+        for _ in range(3):
+            health.record(5.0, ok=True)
+        self.assertIn("slow report", health.record(12.0, ok=True))
+
+    def test_heap_growth_triggers_recycle(self):
+        health = self._health(heap_bytes=600 * 1024 * 1024, STARK_RECYCLE_HEAP_MB="350")
+        self.assertIn("JS heap", health.record(5.0, ok=True))
+
+    def test_failed_report_and_date_cap_trigger_recycle(self):
+        health = self._health(STARK_RECYCLE_EVERY="2")
+        self.assertEqual(health.record(5.0, ok=False), "report failed")
+        self.assertIn("dates on one page", health.record(5.0, ok=True))
+        health.reset_page(None)
+        self.assertEqual(health.dates_on_page, 0)
+
+    def test_missing_cdp_session_is_tolerated(self):
+        health = stark_scraper._PageHealth()
+        page = mock.Mock()
+        page.context.new_cdp_session.side_effect = RuntimeError("no CDP")
+        health.reset_page(page)
+        self.assertIsNone(health.heap_mb())
+        self.assertIsNone(health.record(1.0, ok=True))
+
+
+
+class BrowserOptionsTests(unittest.TestCase):
+    def test_config_browser_section_reaches_launch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / "config.json"
+            config.write_text(json.dumps({"browser": {"allow_hosts": ["cdn.stark.example"], "block_resources": False}}))
+            with mock.patch.object(stark_scraper, "CONFIG_PATH", config):
+                opts = stark_scraper._browser_kwargs()
+        self.assertEqual(opts["allow_hosts"], ["cdn.stark.example"])
+        self.assertIs(opts["block_resources"], False)
+
+    def test_caller_options_win_over_config(self):
+        with mock.patch.object(stark_scraper, "CONFIG_PATH", Path("/nonexistent/config.json")):
+            self.assertEqual(stark_scraper._browser_kwargs({"allow_hosts": ["x.example"]}),
+                             {"allow_hosts": ["x.example"]})
+            self.assertEqual(stark_scraper._browser_kwargs()["allow_hosts"], ())
+
+if __name__ == "__main__":
+    unittest.main()